@@ -0,0 +1,95 @@
+"""对比 .gitignore 过滤方式的遍历耗时
+
+旧实现：遍历全部文件并对每个文件调用 `gitignorefile.ignored` (dev 依赖组)。
+新实现：`GitIgnoreMatcher` 分层解析 .gitignore，并在目录级别剪枝。
+
+用法: python -m benchmarks.bench_gitignore [--vendor-files 20000] [--src-files 500]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import gitignorefile
+
+from src.fis_scan import walk_project_files
+
+
+def build_repo(root: str, vendor_files: int, src_files: int):
+    """构建包含大型被忽略 vendor 目录的示例仓库"""
+
+    os.makedirs(os.path.join(root, ".git"))
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("vendor/\nnode_modules/\n*.log\n!keep.log\n")
+
+    for i in range(vendor_files):
+        directory = os.path.join(root, "vendor", f"pkg{i // 100}", "lib")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod{i}.py"), "w") as f:
+            f.write("x = 1\n")
+
+    for i in range(src_files):
+        directory = os.path.join(root, "src", f"pkg{i // 50}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod{i}.py"), "w") as f:
+            f.write("x = 1\n")
+        if i % 10 == 0:
+            with open(os.path.join(directory, f"run{i}.log"), "w") as f:
+                f.write("log\n")
+
+
+def walk_with_gitignorefile(project_path: str):
+    """旧实现：逐个文件调用 gitignorefile.ignored"""
+
+    files = []
+
+    def recursive_traversal(current_path: str):
+        for entry in os.scandir(current_path):
+            if entry.is_dir():
+                recursive_traversal(entry.path)
+            else:
+                relative_path = os.path.relpath(entry.path, project_path)
+                if gitignorefile.ignored(entry.path) or relative_path.startswith(
+                    ".git"
+                ):
+                    continue
+                files.append(relative_path)
+
+    recursive_traversal(project_path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vendor-files", type=int, default=20000)
+    parser.add_argument("--src-files", type=int, default=500)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="fis_bench_gitignore_")
+    try:
+        build_repo(root, args.vendor_files, args.src_files)
+
+        sta_time = time.perf_counter()
+        old_files = walk_with_gitignorefile(root)
+        old_elapsed = time.perf_counter() - sta_time
+
+        sta_time = time.perf_counter()
+        new_files = walk_project_files(root, None, False, True)
+        new_elapsed = time.perf_counter() - sta_time
+
+        # 旧实现会连带忽略 .gitignore 等以 .git 开头的文件，比较时排除
+        same = sorted(f.replace(os.sep, "/") for f in old_files) == sorted(
+            f for f in new_files if not f.startswith(".git")
+        )
+        print(f"vendor 文件数: {args.vendor_files}, src 文件数: {args.src_files}")
+        print(f"gitignorefile.ignored: {old_elapsed:.3f}s ({len(old_files)} 个文件)")
+        print(f"GitIgnoreMatcher:      {new_elapsed:.3f}s ({len(new_files)} 个文件)")
+        print(f"加速比: {old_elapsed / new_elapsed:.1f}x, 结果一致: {same}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""对比 [REPLACE] 与 [PATCH] 两种变更方式的回复大小
+
+对若干示例修改分别构造整文件替换与 unified diff 补丁形式的 FIS 回复，
+统计字符数与估算 token 数 (约 4 个字符 1 个 token)，并校验补丁应用结果。
+
+用法: python -m benchmarks.bench_patch_tokens [--lines 2000]
+"""
+
+import argparse
+import difflib
+from typing import Callable, List, Tuple
+
+from src.fis_patch import apply_patch
+from src.setting import FILE_START_PREFIX
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def build_source(lines: int) -> List[str]:
+    """生成由若干函数组成的示例源文件"""
+
+    source = []
+    for i in range(lines // 5):
+        source += [
+            f"def handler_{i}(request):",
+            f'    """处理第 {i} 类请求"""',
+            f"    value = request.get('field_{i}', {i})",
+            f"    return value * {i % 7 + 1}",
+            "",
+        ]
+    return source
+
+
+def edit_one_line(source: List[str]) -> List[str]:
+    edited = list(source)
+    pos = len(edited) // 2 + 3  # 函数的 return 行
+    edited[pos] = edited[pos].replace("value", "result")
+    return edited
+
+
+def edit_three_spots(source: List[str]) -> List[str]:
+    edited = list(source)
+    for pos in (10, len(edited) // 2, len(edited) - 10):
+        edited[pos] += "  # checked"
+    return edited
+
+
+def insert_function(source: List[str]) -> List[str]:
+    edited = list(source)
+    edited[100:100] = [
+        "def helper(request):",
+        "    return request.get('helper')",
+        "",
+    ]
+    return edited
+
+
+def rename_everywhere(source: List[str]) -> List[str]:
+    return [line.replace("request", "req") for line in source]
+
+
+EDITS: List[Tuple[str, Callable[[List[str]], List[str]]]] = [
+    ("修改 1 行", edit_one_line),
+    ("修改 3 处", edit_three_spots),
+    ("插入函数", insert_function),
+    ("全局重命名", rename_everywhere),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2000)
+    args = parser.parse_args()
+
+    source = build_source(args.lines)
+    original = "\n".join(source)
+    print(f"示例文件: {len(source)} 行, {len(original)} 字符")
+    print(f"{'修改':<10}{'REPLACE tokens':>16}{'PATCH tokens':>14}{'节省':>8}  校验")
+
+    for name, edit in EDITS:
+        edited = edit(source)
+        expected = "\n".join(edited)
+        replace_reply = f"{FILE_START_PREFIX}app.py [REPLACE]\n{expected}"
+        hunks = "\n".join(difflib.unified_diff(source, edited, n=3, lineterm=""))
+        hunks = hunks[hunks.index("@@") :]  # 去除 ---/+++ 文件头
+        patch_reply = f"{FILE_START_PREFIX}app.py [PATCH]\n{hunks}"
+
+        replace_tokens = estimate_tokens(replace_reply)
+        patch_tokens = estimate_tokens(patch_reply)
+        ok = apply_patch(original, hunks) == expected
+        print(
+            f"{name:<10}{replace_tokens:>16}{patch_tokens:>14}"
+            f"{1 - patch_tokens / replace_tokens:>8.1%}  {'通过' if ok else '失败'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""多进程分片生成的扩展性测试
+
+在合成仓库 (见 benchmarks/synthetic_repo.py) 上分别以 1 到 N 个进程生成 FIS 描述，
+输出每种进程数的耗时 (多次运行取中位数)、相对单进程 (线程池读取) 的加速比，
+并检查输出与单进程生成的结果逐字节一致。
+
+用法: python -m benchmarks.bench_processes [--files 30000] [--processes 1,2,4,8] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic_repo import SyntheticRepoSpec, build_synthetic_repo
+from src.prj_forge import generate_description
+
+
+def _generate(repo: str, fis_file: str, processes: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        sta_time = time.perf_counter()
+        generate_description(
+            repo, fis_file, "", True, False, False, processes=processes
+        )
+        return time.perf_counter() - sta_time
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=30000)
+    parser.add_argument(
+        "--processes",
+        help=f"逗号分隔的进程数 (默认: 1 至 CPU 核数 {cpu_count} 之间的 2 的幂)",
+        default=None,
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--repo", help="使用已有的项目目录 (不生成合成仓库)")
+    args = parser.parse_args()
+
+    if args.processes:
+        counts = sorted({1, *(int(count) for count in args.processes.split(","))})
+    else:
+        counts = [1 << i for i in range(cpu_count.bit_length()) if 1 << i <= cpu_count]
+        if counts[-1] != cpu_count:
+            counts.append(cpu_count)
+
+    work_dir = tempfile.mkdtemp(prefix="fis_bench_processes_")
+    try:
+        repo = args.repo
+        if not repo:
+            repo = os.path.join(work_dir, "repo")
+            print(build_synthetic_repo(repo, SyntheticRepoSpec(files=args.files)))
+        baseline_file = os.path.join(work_dir, "baseline.fis")
+        _generate(repo, baseline_file, 1)  # 预热文件系统缓存
+
+        print(f"CPU 核数: {cpu_count}")
+        if counts[-1] > cpu_count:
+            print("警告: 进程数超过 CPU 核数，超出部分的耗时不能反映多核扩展性")
+        baseline = None
+        for processes in counts:
+            fis_file = os.path.join(work_dir, f"p{processes}.fis")
+            elapsed = statistics.median(
+                _generate(repo, fis_file, processes) for _ in range(args.repeat)
+            )
+            baseline = baseline or elapsed
+            same = filecmp.cmp(baseline_file, fis_file, shallow=False)
+            print(
+                f"进程数 {processes:>3}: {elapsed:7.3f}s  "
+                f"加速比 {baseline / elapsed:5.2f}x  输出一致: {same}"
+            )
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
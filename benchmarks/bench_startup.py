@@ -0,0 +1,143 @@
+"""统计各子命令的冷启动耗时与模块导入耗时分布
+
+每个子命令以独立的 `python -X importtime -m src.fis_tool ...` 子进程运行多次，
+输出总耗时的中位数、导入耗时 (importtime 顶层模块累计耗时之和)、
+导入耗时最高的顶层模块，以及是否导入了交互界面或服务商 SDK 等较重的依赖。
+
+用法: python -m benchmarks.bench_startup [--runs 5] [--top 8] [--files 50]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+# 非交互子命令不应导入的较重依赖
+HEAVY_MODULES = (
+    "inquirer",
+    "yaml",
+    "openai",
+    "httpx",
+    "google.generativeai",
+    "grpc",
+    "asyncio",
+)
+
+
+def build_project(root: str, files: int):
+    """构建用于 generate / apply 的示例项目与 FIS 变更文件"""
+
+    for i in range(files):
+        directory = os.path.join(root, "prj", f"pkg{i // 10}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod{i}.py"), "w") as f:
+            f.write(f"def func{i}(x):\n    return x + {i}\n")
+    with open(os.path.join(root, "changes.fis"), "w", encoding="utf-8") as f:
+        f.write("$$$ pkg0/mod0.py [REPLACE]\ndef func0(x):\n    return x\n")
+
+
+def commands(root: str) -> Dict[str, List[str]]:
+    prj = os.path.join(root, "prj")
+    fis_file = os.path.join(root, "prj.fis")
+    return {
+        "--help": ["--help"],
+        "generate": ["generate", prj, "-o", fis_file],
+        "generate --dry-run": ["generate", prj, "--dry-run"],
+        "create": ["create", fis_file, "-o", os.path.join(root, "created")],
+        "apply": ["apply", prj, os.path.join(root, "changes.fis")],
+        "apply --rollback": ["apply", prj, "--rollback"],
+    }
+
+
+def parse_importtime(stderr: str) -> Tuple[Dict[str, int], set]:
+    """解析 -X importtime 输出，返回 (顶层模块 -> 累计耗时 us, 全部已导入模块)"""
+
+    top_level: Dict[str, int] = {}
+    imported = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        module = name.strip()
+        imported.add(module)
+        # 顶层模块的名称前只有一个空格
+        if not name.startswith("  "):
+            top_level[module] = top_level.get(module, 0) + int(cumulative)
+    return top_level, imported
+
+
+def run_once(args: List[str]) -> Tuple[float, Dict[str, int], set]:
+    cmd = [sys.executable, "-X", "importtime", "-m", "src.fis_tool", *args]
+    sta_time = time.perf_counter()
+    proc = subprocess.run(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    elapsed = time.perf_counter() - sta_time
+    top_level, imported = parse_importtime(proc.stderr.decode("utf-8", "replace"))
+    return elapsed, top_level, imported
+
+
+def run_import(module: str) -> Tuple[float, Dict[str, int], set]:
+    """仅导入模块 (用于交互模式，避免进入交互界面)"""
+
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    sta_time = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - sta_time
+    top_level, imported = parse_importtime(proc.stderr.decode("utf-8", "replace"))
+    return elapsed, top_level, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--files", type=int, default=50)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="fis-bench-startup-")
+    try:
+        build_project(root, args.files)
+        cases = {name: (run_once, argv) for name, argv in commands(root).items()}
+        cases["(import interactive)"] = (run_import, "src.interactive_main")
+
+        for name, (runner, argv) in cases.items():
+            times: List[float] = []
+            import_times: List[int] = []
+            breakdown: Dict[str, List[int]] = {}
+            imported: set = set()
+            for _ in range(args.runs):
+                elapsed, top_level, imported = runner(argv)  # type: ignore
+                times.append(elapsed)
+                import_times.append(sum(top_level.values()))
+                for module, us in top_level.items():
+                    breakdown.setdefault(module, []).append(us)
+
+            heavy = [
+                module
+                for module in HEAVY_MODULES
+                if any(m == module or m.startswith(f"{module}.") for m in imported)
+            ]
+            print(
+                f"{name:<24} 总耗时 {statistics.median(times) * 1000:7.1f}ms  "
+                f"导入 {statistics.median(import_times) / 1000:7.1f}ms  "
+                f"重依赖: {', '.join(heavy) or '-'}"
+            )
+            slowest = sorted(
+                breakdown.items(),
+                key=lambda item: statistics.median(item[1]),
+                reverse=True,
+            )[: args.top]
+            for module, us in slowest:
+                print(f"    {statistics.median(us) / 1000:7.1f}ms  {module}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""生成 / 解析 / 应用 FIS 的基准测试套件
+
+对每个规模 (文件数) 生成合成仓库 (见 benchmarks/synthetic_repo.py)，并在独立子进程中
+分别测量以下操作的耗时与内存峰值 (ru_maxrss)：
+
+- generate: generate_description 生成 FIS 描述文件；
+- parse: read_fis_description_from_content 与 iter_fis_changes 解析全部文件块；
+- index: FisDocument 以内存映射建立文件块索引并列出全部文件；
+- apply: apply_changes_from_fis_file 将 FIS 应用到空目录 (即 `fis-tool create`)。
+
+结果以 JSON 格式写入 --output，使用 --compare 与其他版本的结果对比，
+耗时或内存增长超过 --threshold 时标记为退化并以非零状态码退出。
+
+用法: python -m benchmarks.bench_suite [--scales 1000,10000,100000] [--output result.json]
+      python -m benchmarks.bench_suite --compare old.json [--output new.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic_repo import SyntheticRepoSpec, build_synthetic_repo
+
+OPERATIONS = ("generate", "parse", "index", "apply")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_operation(operation: str, repo: str, fis_file: str, use_config: bool) -> Dict:
+    """在当前进程中执行一次操作 (由子进程调用)"""
+
+    from src.fis_document import FisDocument
+    from src.prj_forge import (
+        apply_changes_from_fis_file,
+        generate_description,
+        iter_fis_changes,
+        read_fis_description_from_content,
+    )
+
+    rss_before = _peak_rss_mb()
+    result: Dict = {}
+    # 逐文件的进度输出不计入比较 (输出到终端的开销因环境而异)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sta_time = time.perf_counter()
+        if operation == "generate":
+            generate_description(
+                repo, fis_file, "", True, True, use_config, use_cache=False
+            )
+            result["fis_bytes"] = os.path.getsize(fis_file)
+        elif operation == "parse":
+            with open(fis_file, "r", encoding="utf-8") as f:
+                content = read_fis_description_from_content(f.read())
+            result["changes"] = sum(1 for _ in iter_fis_changes(content))
+        elif operation == "index":
+            with FisDocument(fis_file) as document:
+                result["changes"] = len(document.list())
+        elif operation == "apply":
+            target = tempfile.mkdtemp(prefix="fis-bench-apply-")
+            try:
+                apply_changes_from_fis_file(target, fis_file)
+                sta_cleanup = time.perf_counter()
+            finally:
+                shutil.rmtree(target, ignore_errors=True)
+            result["seconds"] = sta_cleanup - sta_time
+        else:
+            raise ValueError(f"未知操作: {operation}")
+        result.setdefault("seconds", time.perf_counter() - sta_time)
+
+    rss_after = _peak_rss_mb()
+    result["peak_rss_mb"] = rss_after
+    if rss_before is not None and rss_after is not None:
+        result["rss_growth_mb"] = rss_after - rss_before
+    return result
+
+
+def _run_in_subprocess(
+    operation: str, repo: str, fis_file: str, use_config: bool
+) -> Dict:
+    cmd = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_suite",
+        "--worker",
+        operation,
+        repo,
+        fis_file,
+        "1" if use_config else "0",
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_suite(
+    scales: List[int], spec: SyntheticRepoSpec, repeat: int, work_dir: str
+) -> List[Dict]:
+    results = []
+    for scale in scales:
+        repo = os.path.join(work_dir, f"repo_{scale}")
+        fis_file = os.path.join(work_dir, f"repo_{scale}.fis")
+        scale_spec = spec._replace(files=scale)
+        sta_time = time.perf_counter()
+        stats = build_synthetic_repo(repo, scale_spec)
+        print(
+            f"[{scale}] 合成仓库: {stats['files']} 个文件, "
+            f"{stats['bytes'] / 1024 / 1024:.1f} MB "
+            f"({time.perf_counter() - sta_time:.1f}s)",
+            file=sys.stderr,
+        )
+        for operation in OPERATIONS:
+            # 取多次运行中耗时最短的一次，减少系统噪声的影响
+            runs = [
+                _run_in_subprocess(
+                    operation, repo, fis_file, bool(scale_spec.config_rules)
+                )
+                for _ in range(repeat)
+            ]
+            best = min(runs, key=lambda run: run["seconds"])
+            best.update(scale=scale, operation=operation, repo=stats)
+            results.append(best)
+            print(
+                f"[{scale}] {operation:<8} {best['seconds']:8.3f}s  "
+                f"峰值内存 {best['peak_rss_mb'] or 0:7.1f} MB",
+                file=sys.stderr,
+            )
+        shutil.rmtree(repo, ignore_errors=True)
+        os.remove(fis_file)
+    return results
+
+
+def _version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(old: Dict, new: Dict, threshold: float) -> bool:
+    """打印两次结果的对比，返回是否存在退化"""
+
+    old_results = {(r["scale"], r["operation"]): r for r in old["results"]}
+    regressed = False
+    print(f"对比 {old.get('version')} -> {new.get('version')}")
+    print(f"{'规模':>8} {'操作':<10}{'耗时':>20}{'峰值内存 (MB)':>24}")
+    for result in new["results"]:
+        key = (result["scale"], result["operation"])
+        if key not in old_results:
+            continue
+        before = old_results[key]
+        cells = []
+        for metric in ("seconds", "peak_rss_mb"):
+            if not before.get(metric) or result.get(metric) is None:
+                cells.append("-")
+                continue
+            ratio = result[metric] / before[metric] - 1
+            mark = ""
+            if ratio > threshold:
+                mark = " !"
+                regressed = True
+            cells.append(
+                f"{before[metric]:.2f}->{result[metric]:.2f} ({ratio:+.0%}){mark}"
+            )
+        print(f"{key[0]:>8} {key[1]:<10}{cells[0]:>22}{cells[1]:>24}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FIS 生成 / 解析 / 应用基准测试")
+    parser.add_argument(
+        "--scales", default="1000,10000,100000", help="文件数规模，逗号分隔"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="每项操作的运行次数")
+    parser.add_argument("--median-size", type=int, default=2048)
+    parser.add_argument("--size-sigma", type=float, default=1.0)
+    parser.add_argument("--binary-ratio", type=float, default=0.05)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--gitignore-rules", type=int, default=10)
+    parser.add_argument("--config-rules", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="结果 JSON 文件路径")
+    parser.add_argument("--compare", help="与之对比的历史结果 JSON 文件")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="判定为退化的增长比例"
+    )
+    parser.add_argument("--worker", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        operation, repo, fis_file, use_config = args.worker
+        result = run_operation(operation, repo, fis_file, use_config == "1")
+        print(json.dumps(result))
+        return
+
+    spec = SyntheticRepoSpec(
+        median_size=args.median_size,
+        size_sigma=args.size_sigma,
+        binary_ratio=args.binary_ratio,
+        depth=args.depth,
+        gitignore_rules=args.gitignore_rules,
+        config_rules=args.config_rules,
+        seed=args.seed,
+    )
+    work_dir = tempfile.mkdtemp(prefix="fis-bench-suite-")
+    try:
+        results = run_suite(
+            [int(scale) for scale in args.scales.split(",")],
+            spec,
+            args.repeat,
+            work_dir,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "version": _version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.time(),
+        "spec": spec._asdict(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已保存至: {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        if compare(old, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
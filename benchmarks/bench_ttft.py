@@ -0,0 +1,164 @@
+"""对比 ChatGPTChatbot 每次提问新建客户端与复用 (预热) 连接池的首 token 延迟
+
+在本地启动一个模拟 OpenAI 流式接口的 HTTP 服务，每个新连接在处理前等待
+--connect-latency 秒，用于模拟 DNS、TCP、TLS 与代理握手的开销。
+
+- 新建客户端：与旧实现相同，每次提问创建新的 httpx.Client 与 openai.OpenAI；
+- 连接池：整个会话共用一个客户端，首次提问后复用连接；
+- 连接池 + 预热：每次提问前调用 warmup()，并等待 --typing 秒模拟用户输入。
+
+用法: python -m benchmarks.bench_ttft [--questions 5] [--connect-latency 0.3]
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from statistics import mean
+from typing import Callable, List
+
+import httpx
+import openai
+
+from src.chat_models.chatgpt import ChatGPTChatbot
+
+CONNECT_LATENCY = 0.3
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def setup(self):
+        super().setup()
+        time.sleep(CONNECT_LATENCY)  # 每个新连接的握手开销
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        events = []
+        for text in ["$$$ ", "main.py", " [REPLACE]\n", "print('hi')\n"]:
+            chunk = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "bench",
+                "choices": [
+                    {"index": 0, "delta": {"content": text}, "finish_reason": None}
+                ],
+            }
+            events.append(f"data: {json.dumps(chunk)}\n\n")
+        events.append("data: [DONE]\n\n")
+        body = "".join(events).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_chatbot(base_url: str) -> ChatGPTChatbot:
+    """跳过交互式配置，直接创建指向本地服务的 ChatGPTChatbot"""
+
+    chatbot = ChatGPTChatbot.__new__(ChatGPTChatbot)
+    chatbot._api_key = "sk-bench"
+    chatbot._base_url = base_url
+    chatbot._proxy = ""
+    chatbot._model = "bench"
+    chatbot._create_client()
+    return chatbot
+
+
+def ask_with_new_client(base_url: str, question: str):
+    """旧实现：每次提问创建新的客户端"""
+
+    response = openai.OpenAI(
+        api_key="sk-bench", http_client=httpx.Client(), base_url=base_url
+    ).chat.completions.create(
+        model="bench",
+        messages=[{"role": "user", "content": question}],
+        stream=True,
+    )
+    for chunk in response:
+        content = chunk.choices[0].delta.content
+        if content:
+            yield content
+
+
+def measure(
+    ask: Callable[[], object], before: Callable[[], None], questions: int
+) -> List[float]:
+    """返回每次提问的首 token 延迟 (秒)"""
+
+    ttft = []
+    for _ in range(questions):
+        before()
+        sta_time = time.perf_counter()
+        stream = iter(ask())
+        next(stream)
+        ttft.append(time.perf_counter() - sta_time)
+        for _ in stream:
+            pass
+    return ttft
+
+
+def main():
+    global CONNECT_LATENCY
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--connect-latency", type=float, default=0.3)
+    parser.add_argument("--typing", type=float, default=1.0)
+    args = parser.parse_args()
+    CONNECT_LATENCY = args.connect_latency
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    try:
+        cold = measure(
+            lambda: ask_with_new_client(base_url, "hi"), lambda: None, args.questions
+        )
+
+        pooled_bot = make_chatbot(base_url)
+        pooled = measure(
+            lambda: pooled_bot.ask_question("hi"), lambda: None, args.questions
+        )
+        pooled_bot.close()
+
+        warm_bot = make_chatbot(base_url)
+
+        def before_warm():
+            warm_bot._last_warmup = 0.0  # 忽略预热间隔，保证每次提问前都预热
+            warm_bot.warmup()
+            time.sleep(args.typing)
+
+        warm = measure(lambda: warm_bot.ask_question("hi"), before_warm, args.questions)
+        warm_bot.close()
+    finally:
+        server.shutdown()
+
+    print(
+        f"模拟连接开销: {args.connect_latency * 1000:.0f}ms, 提问次数: {args.questions}"
+    )
+    for name, ttft in [
+        ("新建客户端", cold),
+        ("连接池", pooled),
+        ("连接池 + 预热", warm),
+    ]:
+        print(
+            f"{name:<12} 首次 {ttft[0] * 1000:7.1f}ms  "
+            f"后续平均 {mean(ttft[1:] or ttft) * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
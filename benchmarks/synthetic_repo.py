@@ -0,0 +1,142 @@
+"""生成用于基准测试的合成项目仓库
+
+文件数、文件大小分布 (对数正态分布)、二进制文件比例、目录深度、
+.gitignore 规则复杂度与 .fis_config.yaml 规则数均可配置，相同参数与随机种子
+生成的仓库完全相同，便于跨版本对比。
+
+用法: python -m benchmarks.synthetic_repo <输出目录> [--files 1000] [--median-size 2048]
+"""
+
+import argparse
+import math
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+from src.setting import DEFAULT_FIS_CONFIG_FILE
+
+
+class SyntheticRepoSpec(NamedTuple):
+    files: int = 1000
+    median_size: int = 2048  # 文本文件大小中位数 (字节)
+    size_sigma: float = 1.0  # 对数正态分布的 sigma，越大长尾越明显
+    max_size: int = 512 * 1024
+    binary_ratio: float = 0.05
+    depth: int = 4  # 最大目录深度
+    fanout: int = 8  # 每层子目录数
+    gitignore_rules: int = 10  # 根目录 .gitignore 规则数 (另有嵌套 .gitignore)
+    ignored_ratio: float = 0.1  # 被 .gitignore 或 FIS 配置忽略的文件比例
+    config_rules: int = 0  # .fis_config.yaml 忽略规则数，为 0 时不生成配置文件
+    seed: int = 0
+
+
+_WORDS = (
+    "request response value result handler config index item buffer cache "
+    "token parser stream change block project record status client server"
+).split()
+
+
+def _text_content(rng: random.Random, size: int) -> str:
+    """生成约 size 字节的类 Python 源码"""
+
+    lines: List[str] = []
+    total = 0
+    i = 0
+    while total < size:
+        name = f"{rng.choice(_WORDS)}_{i}"
+        chunk = (
+            f"def {name}({rng.choice(_WORDS)}):\n"
+            f"    {rng.choice(_WORDS)} = {rng.choice(_WORDS)}.get('{name}', {i})\n"
+            f"    return {rng.choice(_WORDS)} * {rng.randint(1, 99)}\n\n"
+        )
+        lines.append(chunk)
+        total += len(chunk)
+        i += 1
+    return "".join(lines)[:size]
+
+
+def _directories(rng: random.Random, spec: SyntheticRepoSpec) -> List[str]:
+    """生成深度不超过 spec.depth 的目录列表 (越深的目录越多)"""
+
+    directories = [""]
+    level = [""]
+    for depth in range(1, spec.depth + 1):
+        next_level = []
+        for parent in level:
+            for k in range(rng.randint(1, spec.fanout)):
+                next_level.append(os.path.join(parent, f"d{depth}_{k}"))
+        directories += next_level
+        level = next_level[: max(1, spec.files // (spec.fanout * 4))]
+    return directories
+
+
+def build_synthetic_repo(root: str, spec: SyntheticRepoSpec) -> Dict[str, int]:
+    """在 root 下生成合成仓库，返回文件数与总字节数等统计"""
+
+    rng = random.Random(spec.seed)
+    os.makedirs(os.path.join(root, ".git"), exist_ok=True)
+    directories = _directories(rng, spec)
+
+    # 根目录 .gitignore：忽略目录、扩展名与带否定的规则，另在部分子目录中放置嵌套规则
+    ignore_rules = ["*.log", "!keep.log", "build/", "__pycache__/"]
+    for k in range(max(0, spec.gitignore_rules - len(ignore_rules))):
+        ignore_rules.append(
+            rng.choice([f"*.tmp{k}", f"cache_{k}/", f"/d1_{k % spec.fanout}/gen_{k}/"])
+        )
+    with open(os.path.join(root, ".gitignore"), "w") as f:
+        f.write("\n".join(ignore_rules[: max(spec.gitignore_rules, 1)]) + "\n")
+    for directory in directories[1 : 1 + spec.gitignore_rules // 5]:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+        with open(os.path.join(root, directory, ".gitignore"), "w") as f:
+            f.write("*.out\nlocal/\n")
+
+    if spec.config_rules:
+        rules = "\n".join(
+            f"- '{rng.choice(_WORDS)}_{k}\\.dat$'" for k in range(spec.config_rules)
+        )
+        with open(os.path.join(root, DEFAULT_FIS_CONFIG_FILE), "w") as f:
+            f.write(f"ignore_regex:\n{rules}\n")
+
+    mu = math.log(max(spec.median_size, 1))
+    stats = {"files": 0, "bytes": 0, "binary_files": 0, "ignored_files": 0}
+    for i in range(spec.files):
+        directory = rng.choice(directories)
+        if rng.random() < spec.ignored_ratio:
+            name = rng.choice(["build/out.py", f"run{i}.log", "__pycache__/m.pyc"])
+            stats["ignored_files"] += 1
+        elif rng.random() < spec.binary_ratio:
+            name = f"asset{i}.bin"
+            stats["binary_files"] += 1
+        else:
+            name = f"mod{i}.py"
+        path = os.path.join(root, directory, f"f{i}_{name}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        size = min(int(rng.lognormvariate(mu, spec.size_sigma)), spec.max_size)
+        if name.endswith(".bin"):
+            with open(path, "wb") as f:
+                f.write(b"\x00" + rng.randbytes(max(size - 1, 0)))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(_text_content(rng, size))
+        stats["files"] += 1
+        stats["bytes"] += size
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成用于基准测试的合成项目仓库")
+    parser.add_argument("root", help="输出目录")
+    for field, default in SyntheticRepoSpec._field_defaults.items():
+        parser.add_argument(
+            f"--{field.replace('_', '-')}", type=type(default), default=default
+        )
+    args = parser.parse_args()
+    spec = SyntheticRepoSpec(
+        **{field: getattr(args, field) for field in SyntheticRepoSpec._fields}
+    )
+    print(build_synthetic_repo(args.root, spec))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """返回在后台守护线程中运行的共享事件循环 (首次调用时启动)
+
+    异步客户端 (如 httpx.AsyncClient) 与创建它的事件循环绑定，
+    同步代码中的所有异步调用都应通过该循环执行。
+    """
+
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="fis-event-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def run_coroutine(coro: Awaitable[T]) -> T:
+    """在共享事件循环中运行协程并等待结果；等待被中断 (如 Ctrl+C) 时取消协程"""
+
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())  # type: ignore
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate_sync(aiterator: AsyncIterator[T]) -> Iterator[T]:
+    """将异步迭代器适配为同步迭代器 (逐项在共享事件循环中获取)"""
+
+    try:
+        while True:
+            try:
+                yield run_coroutine(aiterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(aiterator, "aclose", None)
+        if aclose:
+            try:
+                run_coroutine(aclose())
+            except RuntimeError:
+                pass  # 被取消的 __anext__ 仍在执行，生成器会随取消一同结束
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """将同步迭代器适配为异步迭代器 (每一项在线程池中获取，不阻塞事件循环)"""
+
+    loop = asyncio.get_running_loop()
+    sentinel = object()
+    try:
+        while True:
+            item = await loop.run_in_executor(None, next, iterator, sentinel)
+            if item is sentinel:
+                return
+            yield item  # type: ignore
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            try:
+                close()
+            except ValueError:
+                pass  # 生成器仍在线程池中执行，待其产出下一项后由垃圾回收关闭
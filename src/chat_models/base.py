@@ -1,10 +1,59 @@
 # src/chat_models/base.py
-from abc import ABC, abstractmethod
-from typing import Generator
+from abc import ABC
+from typing import Any, AsyncIterator, Dict, Generator, List
+
+from src.chat_models.aio import iterate_in_thread, iterate_sync
+
+
+def format_messages(messages: List[Dict[str, str]]) -> str:
+    """将对话历史拼接为单个提问文本"""
+
+    if len(messages) == 1:
+        return messages[0]["content"]
+    parts = [
+        f"[{'USER' if message['role'] == 'user' else 'ASSISTANT'}]\n{message['content']}"
+        for message in messages
+    ]
+    return "以下是我们之前的对话记录，请继续回答最后一个问题：\n\n" + "\n\n".join(parts)
 
 
 class Chatbot(ABC):
+    """对话模型基类，子类至少需要实现 ask_question 与 ask_question_async 其中之一"""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if (
+            cls.ask_question is Chatbot.ask_question
+            and cls.ask_question_async is Chatbot.ask_question_async
+        ):
+            raise TypeError(
+                f"{cls.__name__} 需要实现 ask_question 或 ask_question_async"
+            )
 
-    @abstractmethod
     def ask_question(self, question: str) -> Generator[str, None, None]:
-        pass
+        """同步流式提问；默认在共享事件循环中运行 ask_question_async"""
+        yield from iterate_sync(self.ask_question_async(question))
+
+    async def ask_question_async(self, question: str) -> AsyncIterator[str]:
+        """异步流式提问；默认在线程池中运行同步的 ask_question"""
+        async for chunk in iterate_in_thread(self.ask_question(question)):
+            yield chunk
+
+    def ask_messages(
+        self, messages: List[Dict[str, str]]
+    ) -> Generator[str, None, None]:
+        """多轮对话 (messages 为 role 为 user / assistant 的消息列表，最后一条为本轮提问)
+
+        默认将对话历史拼接为单个提问，支持多轮对话的模型应提供原生实现。
+        """
+        yield from self.ask_question(format_messages(messages))
+
+    def cache_identity(self) -> Dict[str, Any]:
+        """返回影响回复内容的模型标识 (服务商、模型、采样参数等)，用作回复缓存键的一部分"""
+        return {"provider": type(self).__name__}
+
+    def warmup(self):
+        """在后台预先建立与模型服务的连接 (用户输入问题期间调用，默认不做任何事)"""
+
+    def close(self):
+        """释放连接等资源 (退出对话模式时调用，默认不做任何事)"""
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from src.chat_models.base import Chatbot
+from src.setting import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_REPLAY_SPEED
+from src.utils import get_cache_dir
+
+
+def response_cache_key(identity: Dict[str, Any], prompt: str) -> str:
+    """由模型标识 (服务商、模型、采样参数等) 与完整提示词哈希计算缓存键"""
+
+    payload = {
+        "identity": identity,
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """基于内容寻址的 LLM 回复磁盘缓存
+
+    每条缓存为 `<缓存目录>/<键前两位>/<键>.json`，记录流式回复的每个数据块
+    及其与上一个数据块的时间间隔。命中时更新文件修改时间，写入新缓存后
+    目录总大小超过 max_bytes 时按修改时间淘汰最久未使用的缓存。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir or get_cache_dir("responses")
+        self.max_bytes = max_bytes
+
+    def _entry_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Tuple[float, str]]]:
+        """读取缓存的 (时间间隔, 数据块) 列表，未命中时返回 None"""
+
+        entry_file = self._entry_file(key)
+        try:
+            with open(entry_file, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(entry_file)  # 记录最近使用时间
+        except (OSError, ValueError):
+            return None
+        return [(delay, text) for delay, text in entry["chunks"]]
+
+    def put(self, key: str, identity: Dict[str, Any], chunks: List[Tuple[float, str]]):
+        """写入一条完整的回复并按需淘汰旧缓存"""
+
+        entry_file = self._entry_file(key)
+        os.makedirs(os.path.dirname(entry_file), exist_ok=True)
+        entry = {
+            "identity": identity,
+            "created_at": time.time(),
+            "chunks": chunks,
+        }
+        tmp = f"{entry_file}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, default=str)
+        os.replace(tmp, entry_file)
+        self.evict()
+
+    def evict(self):
+        """淘汰最久未使用的缓存，直到目录总大小不超过上限"""
+
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            try:
+                os.rmdir(os.path.dirname(path))  # 仅清理已空的子目录
+            except OSError:
+                pass
+
+
+class CachedChatbot(Chatbot):
+    """为任意 Chatbot 增加回复缓存
+
+    相同服务商、模型、采样参数与提示词的提问直接回放缓存的流式回复，
+    replay_speed 为回放速度倍率 (1 为原始速度，0 为不等待)。
+    只有完整生成的回复会被缓存，中断或出错的回复不会写入缓存。
+    """
+
+    def __init__(
+        self,
+        chatbot: Chatbot,
+        cache: Optional[ResponseCache] = None,
+        replay_speed: float = RESPONSE_CACHE_REPLAY_SPEED,
+    ):
+        self.chatbot = chatbot
+        self.cache = cache or ResponseCache()
+        self.replay_speed = replay_speed
+        self.last_from_cache = False
+
+    def cache_identity(self) -> Dict[str, Any]:
+        return self.chatbot.cache_identity()
+
+    def warmup(self):
+        self.chatbot.warmup()
+
+    def close(self):
+        self.chatbot.close()
+
+    def _cached_stream(
+        self,
+        prompt: str,
+        generate: Callable[[], Iterator[str]],
+        refresh: bool,
+    ) -> Generator[str, None, None]:
+        identity = self.cache_identity()
+        key = response_cache_key(identity, prompt)
+
+        chunks = None if refresh else self.cache.get(key)
+        self.last_from_cache = chunks is not None
+        if chunks is not None:
+            for delay, text in chunks:
+                if self.replay_speed > 0 and delay > 0:
+                    time.sleep(delay / self.replay_speed)
+                yield text
+            return
+
+        recorded: List[Tuple[float, str]] = []
+        last_time = time.perf_counter()
+        for text in generate():
+            now = time.perf_counter()
+            recorded.append((round(now - last_time, 4), text))
+            last_time = now
+            yield text
+        self.cache.put(key, identity, recorded)
+
+    def ask_question(
+        self, question: str, refresh: bool = False
+    ) -> Generator[str, None, None]:
+        """提问；refresh 为 True 时跳过缓存重新生成，并用新回复覆盖缓存"""
+        return self._cached_stream(
+            question, lambda: self.chatbot.ask_question(question), refresh
+        )
+
+    def ask_messages(
+        self, messages: List[Dict[str, str]], refresh: bool = False
+    ) -> Generator[str, None, None]:
+        """多轮对话，以完整对话历史作为缓存键"""
+        return self._cached_stream(
+            json.dumps(messages, ensure_ascii=False),
+            lambda: self.chatbot.ask_messages(messages),
+            refresh,
+        )
+
+    async def ask_question_async(
+        self, question: str, refresh: bool = False
+    ) -> AsyncIterator[str]:
+        """异步提问，缓存规则与 ask_question 相同"""
+
+        identity = self.cache_identity()
+        key = response_cache_key(identity, question)
+
+        chunks = None if refresh else self.cache.get(key)
+        self.last_from_cache = chunks is not None
+        if chunks is not None:
+            for delay, text in chunks:
+                if self.replay_speed > 0 and delay > 0:
+                    await asyncio.sleep(delay / self.replay_speed)
+                yield text
+            return
+
+        recorded: List[Tuple[float, str]] = []
+        last_time = time.perf_counter()
+        async for text in self.chatbot.ask_question_async(question):
+            now = time.perf_counter()
+            recorded.append((round(now - last_time, 4), text))
+            last_time = now
+            yield text
+        self.cache.put(key, identity, recorded)
@@ -1,15 +1,34 @@
 import os
-from typing import Generator, List
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Generator, List, Optional
 
 import httpx
 import inquirer
 import openai
 
+from src.chat_models.aio import run_coroutine
 from src.chat_models.base import Chatbot
+from src.chat_models.model_list import ModelListCache
 from src.options.choices import DynamicalChoices
+from src.setting import CHAT_KEEPALIVE_EXPIRY, CHAT_WARMUP_INTERVAL
+
+SYSTEM_PROMPT = "You are an experienced software master."
+
+
+def _http2_available() -> bool:
+    """安装了 h2 时启用 HTTP/2 (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
 
 
 class ChatGPTChatbot(Chatbot):
+    # 额外传递给 chat.completions.create 的采样参数 (如 temperature)
+    sampling_params: Dict[str, Any] = {}
+
     def __init__(self):
         self._api_key = os.environ.get("OPENAI_API_KEY")
         self._base_url = os.environ.get("OPENAI_BASE_URL")
@@ -60,11 +79,14 @@ class ChatGPTChatbot(Chatbot):
         else:
             self._proxy = os.environ["OPENAI_PROXY"]
 
+        self._create_client()
+
+        model_cache = ModelListCache("openai", self._base_url, self._api_key)
         try:
-            models = self.available_models()
-        except openai.AuthenticationError:
+            models = model_cache.get_models(self.available_models)
+        except openai.APIError:
             print(
-                "OpenAI API Key 无效或非官方 API，无法获取最新模型列表，使用内置模型列表"
+                "OpenAI API Key 无效、非官方 API 或网络不可用，无法获取最新模型列表，使用内置模型列表"
             )
             models = [
                 "gpt-3.5-turbo",
@@ -89,42 +111,134 @@ class ChatGPTChatbot(Chatbot):
                 "gpt-4o-2024-05-13",
                 "自定义",
             ]
+        last_model = model_cache.last_model
+        if last_model and last_model not in models:
+            models = [last_model, *models]  # 上次使用的自定义模型
         self._model = DynamicalChoices(
-            prompt_message="请选择生成模型", choices=models
+            prompt_message="请选择生成模型", choices=models, default=last_model
         ).action()
         if self._model == "自定义":
             self._model = inquirer.text(
                 message="请输入自定义模型名称",
                 validate=lambda _, x: len(x) > 0,
             )
+        model_cache.remember_model(self._model)
 
         print(f"使用模型: {self._model}")
 
-    def ask_question(self, question: str) -> Generator[str, None, None]:
-        proxy_client = (
-            httpx.Client(proxy=httpx.Proxy(self._proxy), follow_redirects=True)
-            if self._proxy
-            else None
+    def _create_client(self):
+        """创建整个会话共用的客户端，连接池中的连接在多次提问之间复用"""
+
+        self._http_client = httpx.Client(
+            proxy=httpx.Proxy(self._proxy) if self._proxy else None,
+            follow_redirects=True,
+            http2=_http2_available(),
+            limits=httpx.Limits(keepalive_expiry=CHAT_KEEPALIVE_EXPIRY),
         )
-        response = openai.OpenAI(
-            api_key=self._api_key, http_client=proxy_client, base_url=self._base_url
-        ).chat.completions.create(
+        self._client = openai.OpenAI(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            http_client=self._http_client,
+        )
+        self._async_http_client: Optional[httpx.AsyncClient] = None
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self._warmup_thread: Optional[threading.Thread] = None
+        self._last_warmup = 0.0
+
+    def warmup(self):
+        """在后台线程中向 API 地址发送 HEAD 请求，提前完成 DNS、TCP、TLS 与代理握手"""
+
+        if self._warmup_thread and self._warmup_thread.is_alive():
+            return
+        if time.monotonic() - self._last_warmup < CHAT_WARMUP_INTERVAL:
+            return
+        self._last_warmup = time.monotonic()
+
+        def _warmup():
+            try:
+                self._http_client.head(str(self._client.base_url), timeout=10)
+            except Exception:
+                pass  # 预热失败不影响正常提问
+
+        self._warmup_thread = threading.Thread(target=_warmup, daemon=True)
+        self._warmup_thread.start()
+
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        """首次异步提问时创建异步客户端 (与共享事件循环绑定)"""
+
+        if self._async_client is None:
+            self._async_http_client = httpx.AsyncClient(
+                proxy=httpx.Proxy(self._proxy) if self._proxy else None,
+                follow_redirects=True,
+                http2=_http2_available(),
+                limits=httpx.Limits(keepalive_expiry=CHAT_KEEPALIVE_EXPIRY),
+            )
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                http_client=self._async_http_client,
+            )
+        return self._async_client
+
+    def close(self):
+        self._http_client.close()
+        if self._async_http_client:
+            run_coroutine(self._async_http_client.aclose())
+
+    def cache_identity(self) -> Dict[str, Any]:
+        return {
+            "provider": "openai",
+            "base_url": str(self._client.base_url),
+            "model": self._model or "gpt-3.5-turbo",
+            "system": SYSTEM_PROMPT,
+            "params": self.sampling_params,
+        }
+
+    def _completion_params(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        return dict(
             model=self._model or "gpt-3.5-turbo",
             messages=[
                 {
                     "role": "system",
-                    "content": "You are an experienced software master.",
+                    "content": SYSTEM_PROMPT,
                 },
-                {"role": "user", "content": question},
+                *messages,
             ],
             stream=True,
+            **self.sampling_params,
         )
 
-        for chunk in response:
-            content = chunk.choices[0].delta.content
-            if content:
-                yield content
+    def ask_question(self, question: str) -> Generator[str, None, None]:
+        yield from self.ask_messages([{"role": "user", "content": question}])
+
+    def ask_messages(
+        self, messages: List[Dict[str, str]]
+    ) -> Generator[str, None, None]:
+        response = self._client.chat.completions.create(
+            **self._completion_params(messages)
+        )
+
+        try:
+            for chunk in response:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        finally:
+            # 流式响应中断或 SDK 未读完响应体时连接不会放回连接池，下次输入时重新预热
+            self._last_warmup = 0.0
+
+    async def ask_question_async(self, question: str) -> AsyncIterator[str]:
+        response = await self._get_async_client().chat.completions.create(
+            **self._completion_params([{"role": "user", "content": question}])
+        )
+        try:
+            async for chunk in response:
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        finally:
+            await response.close()  # 被取消 (如竞速落败) 时及时释放连接
 
     def available_models(self) -> List[str]:
-        models = openai.models.list()
+        models = self._client.models.list()
         return [str(model.id) for model in models if "gpt" in str(model.id)]
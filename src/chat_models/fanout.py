@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from src.chat_models.aio import run_coroutine
+from src.chat_models.base import Chatbot
+from src.chat_models.cache import CachedChatbot
+from src.fis_stream import FisStreamParser
+
+FANOUT_RACE = "race"
+FANOUT_COLLECT = "collect"
+
+
+class FanoutResult:
+    """扇出提问中单个模型的回复与耗时"""
+
+    __slots__ = (
+        "name",
+        "content",
+        "changes",
+        "first_token_time",
+        "elapsed",
+        "valid",
+        "completed",
+        "cancelled",
+        "error",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.content = ""
+        self.changes = 0  # 已完整解析的文件变更数
+        self.first_token_time: Optional[float] = None
+        self.elapsed = 0.0
+        self.valid = False  # 是否包含完整的 FIS 变更
+        self.completed = False
+        self.cancelled = False
+        self.error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return f"失败: {self.error}"
+        if self.cancelled:
+            return "已取消"
+        if self.valid:
+            return "完成"
+        return "完成 (无 FIS 变更)" if self.completed else "未完成"
+
+
+def _ask_async(chatbot: Chatbot, question: str, refresh: bool) -> AsyncIterator[str]:
+    if isinstance(chatbot, CachedChatbot):
+        return chatbot.ask_question_async(question, refresh=refresh)
+    return chatbot.ask_question_async(question)
+
+
+async def _run_one(
+    chatbot: Chatbot,
+    question: str,
+    result: FanoutResult,
+    refresh: bool,
+    stop_when_valid: bool,
+):
+    """流式读取单个模型的回复；stop_when_valid 为 True 时 fis 代码块结束即停止"""
+
+    parser = FisStreamParser()
+    sta_time = time.perf_counter()
+    stream = _ask_async(chatbot, question, refresh)
+    try:
+        async for chunk in stream:
+            if result.first_token_time is None:
+                result.first_token_time = time.perf_counter() - sta_time
+            result.content += chunk
+            result.changes += len(parser.feed(chunk))
+            if stop_when_valid and parser.fence_closed and result.changes:
+                break
+        else:
+            result.changes += len(parser.close())
+        result.valid = result.changes > 0
+        result.completed = True
+    except asyncio.CancelledError:
+        result.cancelled = True
+        raise
+    except Exception as e:
+        result.error = str(e)
+    finally:
+        result.elapsed = time.perf_counter() - sta_time
+        await stream.aclose()  # type: ignore
+
+
+async def race_async(
+    chatbots: Dict[str, Chatbot], question: str, refresh: bool = False
+) -> Tuple[Optional[FanoutResult], List[FanoutResult]]:
+    """同时向多个模型提问，最先给出完整 FIS 变更的回复胜出，其余请求被取消
+
+    返回 (胜出的回复, 所有模型的回复)，没有任何模型给出有效变更时胜出者为 None。
+    """
+
+    results = [FanoutResult(name) for name in chatbots]
+    tasks = {
+        asyncio.ensure_future(
+            _run_one(chatbot, question, result, refresh, stop_when_valid=True)
+        ): result
+        for chatbot, result in zip(chatbots.values(), results)
+    }
+    winner: Optional[FanoutResult] = None
+    pending = set(tasks)
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            finished = [tasks[task] for task in done if tasks[task].valid]
+            if finished:
+                winner = min(finished, key=lambda result: result.elapsed)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return winner, results
+
+
+async def collect_async(
+    chatbots: Dict[str, Chatbot], question: str, refresh: bool = False
+) -> List[FanoutResult]:
+    """同时向多个模型提问并等待全部回复完成，用于对比"""
+
+    results = [FanoutResult(name) for name in chatbots]
+    await asyncio.gather(
+        *(
+            _run_one(chatbot, question, result, refresh, stop_when_valid=False)
+            for chatbot, result in zip(chatbots.values(), results)
+        )
+    )
+    return results
+
+
+def race(
+    chatbots: Dict[str, Chatbot], question: str, refresh: bool = False
+) -> Tuple[Optional[FanoutResult], List[FanoutResult]]:
+    """race_async 的同步版本 (在共享事件循环中执行)"""
+    return run_coroutine(race_async(chatbots, question, refresh))
+
+
+def collect(
+    chatbots: Dict[str, Chatbot], question: str, refresh: bool = False
+) -> List[FanoutResult]:
+    """collect_async 的同步版本 (在共享事件循环中执行)"""
+    return run_coroutine(collect_async(chatbots, question, refresh))
+
+
+def print_fanout_summary(results: List[FanoutResult]):
+    """打印各模型的首 token 延迟、总耗时、回复长度与状态"""
+
+    print(f"{'模型':<32}{'首 token':>10}{'总耗时':>10}{'字符数':>10}{'变更':>6}  状态")
+    for result in results:
+        first_token = (
+            f"{result.first_token_time:.2f}s"
+            if result.first_token_time is not None
+            else "-"
+        )
+        print(
+            f"{result.name:<32}{first_token:>10}{result.elapsed:>9.2f}s"
+            f"{len(result.content):>10}{result.changes:>6}  {result.status}"
+        )
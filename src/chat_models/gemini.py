@@ -1,13 +1,21 @@
 import os
-from typing import Generator, List
+from typing import Any, AsyncIterator, Dict, Generator, List
 
 import inquirer
 from google.generativeai.types import HarmBlockThreshold, HarmCategory
 
 from src.chat_models.base import Chatbot
 from src.chat_models.gemini_patch import patch_gemini_proxy
+from src.chat_models.model_list import ModelListCache
 from src.options.choices import DynamicalChoices
 
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
 
 class GeminiChatbot(Chatbot):
     def __init__(self):
@@ -41,30 +49,63 @@ class GeminiChatbot(Chatbot):
             if confirm:
                 os.system(f"setx GEMINI_API_KEY {api_key} /m")
         else:
-            genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+            api_key = os.environ["GEMINI_API_KEY"]
+            genai.configure(api_key=api_key)
 
+        model_cache = ModelListCache("gemini", api_key=api_key)
         use_model = DynamicalChoices(
-            prompt_message="请选择生成模型", choices=self.available_models(genai)
+            prompt_message="请选择生成模型",
+            choices=model_cache.get_models(lambda: self.available_models(genai)),
+            default=model_cache.last_model,
         ).action()
+        model_cache.remember_model(use_model)
         print(f"使用模型: {use_model}")
 
         self._chat_model = genai.GenerativeModel(use_model)
 
-    def ask_question(self, question: str) -> Generator[str, None, None]:
-        safety_settings = {
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    def cache_identity(self) -> Dict[str, Any]:
+        return {
+            "provider": "gemini",
+            "model": self._chat_model.model_name,
+            "params": {"safety_settings": "BLOCK_NONE"},
         }
+
+    def ask_question(self, question: str) -> Generator[str, None, None]:
         response = self._chat_model.generate_content(
             question,
-            safety_settings=safety_settings,
+            safety_settings=SAFETY_SETTINGS,
             stream=True,
         )
         for chunk in response:
             yield chunk.text
 
+    def ask_messages(
+        self, messages: List[Dict[str, str]]
+    ) -> Generator[str, None, None]:
+        contents = [
+            {
+                "role": "user" if message["role"] == "user" else "model",
+                "parts": [message["content"]],
+            }
+            for message in messages
+        ]
+        response = self._chat_model.generate_content(
+            contents,
+            safety_settings=SAFETY_SETTINGS,
+            stream=True,
+        )
+        for chunk in response:
+            yield chunk.text
+
+    async def ask_question_async(self, question: str) -> AsyncIterator[str]:
+        response = await self._chat_model.generate_content_async(
+            question,
+            safety_settings=SAFETY_SETTINGS,
+            stream=True,
+        )
+        async for chunk in response:
+            yield chunk.text
+
     def available_models(self, gai) -> List[str]:
         return [
             m.name
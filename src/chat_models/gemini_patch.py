@@ -1,11 +1,15 @@
 from typing import Optional
-from google.api_core import grpc_helpers
+from google.api_core import grpc_helpers, grpc_helpers_async
 from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc import (
     ga_credentials,
     Sequence,
     grpc,
     GenerativeServiceGrpcTransport,
 )
+from google.ai.generativelanguage_v1beta.services.generative_service.transports.grpc_asyncio import (
+    aio,
+    GenerativeServiceGrpcAsyncIOTransport,
+)
 
 
 def patch_gemini_proxy(proxy_url):
@@ -40,4 +44,35 @@ def patch_gemini_proxy(proxy_url):
             **kwargs,
         )
 
+    @classmethod
+    def create_channel_async(
+        cls,
+        host: str = "generativelanguage.googleapis.com",
+        credentials: Optional[ga_credentials.Credentials] = None,
+        credentials_file: Optional[str] = None,
+        scopes: Optional[Sequence[str]] = None,
+        quota_project_id: Optional[str] = None,
+        **kwargs,
+    ) -> aio.Channel:
+        nonlocal proxy_url
+
+        if "options" in kwargs:
+            kwargs["options"] = [
+                ("grpc.max_send_message_length", -1),
+                ("grpc.max_receive_message_length", -1),
+                ("grpc.http_proxy", proxy_url),
+            ]
+
+        return grpc_helpers_async.create_channel(
+            host,
+            credentials=credentials,
+            credentials_file=credentials_file,
+            quota_project_id=quota_project_id,
+            default_scopes=cls.AUTH_SCOPES,
+            scopes=scopes,
+            default_host=cls.DEFAULT_HOST,
+            **kwargs,
+        )
+
     GenerativeServiceGrpcTransport.create_channel = create_channel  # type: ignore
+    GenerativeServiceGrpcAsyncIOTransport.create_channel = create_channel_async  # type: ignore
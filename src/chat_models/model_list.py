@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.setting import MODEL_LIST_TTL
+from src.utils import get_cache_dir
+
+
+class ModelListCache:
+    """服务商模型列表的磁盘缓存
+
+    按服务商、API 地址与 API Key 指纹分别缓存模型列表，同时记录上次选择的模型。
+    缓存未过期时直接使用；过期后仍先返回旧列表，并在后台线程中刷新缓存
+    (stale-while-revalidate)；没有缓存或要求强制刷新时同步获取。
+    """
+
+    # 缓存有效期 (秒)
+    ttl: float = MODEL_LIST_TTL
+    # 为 True 时忽略缓存重新获取模型列表 (每个缓存在一次会话中只强制刷新一次)
+    force_refresh: bool = False
+    _refreshed: Set[str] = set()
+    # 后台刷新与记录所选模型可能同时写入缓存文件
+    _lock = threading.Lock()
+
+    def __init__(self, provider: str, base_url: str = "", api_key: str = ""):
+        key_fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        identity = json.dumps([provider, base_url, key_fingerprint])
+        self.key = hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+        self.provider = provider
+        self.base_url = base_url
+        self.cache_file = os.path.join(get_cache_dir("models"), f"{self.key}.json")
+        self.refresh_thread: Optional[threading.Thread] = None
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, **fields):
+        with self._lock:
+            entry = self._load()
+            entry.update(provider=self.provider, base_url=self.base_url, **fields)
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = f"{self.cache_file}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_file)
+
+    def _fetch(self, fetch: Callable[[], List[str]]) -> List[str]:
+        models = fetch()
+        self._save(models=models, fetched_at=time.time())
+        return models
+
+    def _revalidate(self, fetch: Callable[[], List[str]]):
+        try:
+            self._fetch(fetch)
+        except Exception:
+            pass  # 后台刷新失败时保留旧缓存，下次启动再尝试
+
+    def get_models(self, fetch: Callable[[], List[str]]) -> List[str]:
+        """返回模型列表；fetch 为实际请求服务商的函数，同步获取失败时抛出其异常"""
+
+        entry = self._load()
+        models = entry.get("models")
+        if not models or (
+            self.force_refresh and self.key not in ModelListCache._refreshed
+        ):
+            ModelListCache._refreshed.add(self.key)
+            return self._fetch(fetch)
+
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            self.refresh_thread = threading.Thread(
+                target=self._revalidate, args=(fetch,), daemon=True
+            )
+            self.refresh_thread.start()
+        return models
+
+    @property
+    def last_model(self) -> Optional[str]:
+        """上次选择的模型"""
+        return self._load().get("last_model")
+
+    def remember_model(self, model: str):
+        try:
+            self._save(last_model=model)
+        except OSError:
+            pass
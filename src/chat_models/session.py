@@ -0,0 +1,187 @@
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from src.fis_delta import FisSnapshot, build_delta_fis, load_fis_snapshot
+from src.setting import SESSION_MAX_REQUEST_RATIO
+from src.tokens import Tokenizer, get_tokenizer
+
+QUESTION_PROMPT_TEMPLATE = """
+{prj_fis}
+
+请基于以上 FIS 结构来回答我的问题：
+{question}
+"""
+
+DELTA_PROMPT_TEMPLATE = """
+自上一轮对话以来，项目中以下文件发生了变化 (未列出的文件保持不变)：
+```fis
+{delta_fis}
+```
+
+请基于最新的项目结构来回答我的问题：
+{question}
+"""
+
+
+class SessionTurn(NamedTuple):
+    """一轮对话待发送的提问，回复完成后通过 ChatSession.commit 记录"""
+
+    message: str
+    snapshot: Optional[FisSnapshot]
+    full: bool  # 是否发送了完整 FIS
+    sent_bytes: int
+    sent_tokens: int
+    full_bytes: int  # 重新发送完整 FIS 所需的字节数
+    full_tokens: int
+    changed_files: int
+
+
+class ChatSession:
+    """多轮对话会话
+
+    在本地保存对话历史，首轮发送完整 FIS，之后每轮只发送相对上一轮快照
+    (基于生成清单中的文件内容哈希) 变化的文件。没有生成清单时每轮发送完整 FIS。
+    请求不保存状态，每轮都要重新发送对话历史；对话历史与本轮增量的 token 数
+    达到单独发送完整 FIS 的 SESSION_MAX_REQUEST_RATIO 倍时，改为发送完整 FIS
+    并清空对话历史，请求大小不会随对话轮数无限增长。
+    """
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        self.tokenizer = tokenizer or get_tokenizer()
+        self.messages: List[Dict[str, str]] = []
+        self._message_bytes: List[int] = []
+        self._message_tokens: List[int] = []
+        self._snapshot: Optional[FisSnapshot] = None
+        # 完整提问中文件块与问题以外部分 (说明提示词、模板等) 的 token 数
+        self._overhead_tokens = 0
+        # 每轮提问前的快照，用于撤销最近一轮对话
+        self._history: List[Optional[FisSnapshot]] = []
+
+    def reset(self):
+        """清空对话历史，下一轮重新发送完整 FIS"""
+        self.messages = []
+        self._message_bytes = []
+        self._message_tokens = []
+        self._snapshot = None
+        self._history = []
+
+    def _full_turn(self, fis_file: str, question: str) -> SessionTurn:
+        prj_fis = Path(fis_file).read_text(encoding="utf-8")
+        message = QUESTION_PROMPT_TEMPLATE.format(prj_fis=prj_fis, question=question)
+        tokens = self.tokenizer.count(message)
+        snapshot = load_fis_snapshot(fis_file, self.tokenizer.count)
+        if snapshot is not None:
+            self._overhead_tokens = (
+                tokens
+                - sum(t for _, t in snapshot.values())
+                - self.tokenizer.count(question)
+            )
+        size = len(message.encode("utf-8"))
+        return SessionTurn(message, snapshot, True, size, tokens, size, tokens, 0)
+
+    def prepare(self, fis_file: str, question: str) -> SessionTurn:
+        """构造本轮提问 (首轮、没有生成清单或携带对话历史的增量请求超出上限时
+        为完整 FIS，否则为增量 FIS)"""
+
+        if self._snapshot is None or not self.messages:
+            return self._full_turn(fis_file, question)
+        result = build_delta_fis(fis_file, self._snapshot, self.tokenizer.count)
+        if result is None:
+            return self._full_turn(fis_file, question)
+
+        delta, snapshot = result
+        if delta.empty:
+            message = question
+        else:
+            message = DELTA_PROMPT_TEMPLATE.format(
+                delta_fis=delta.text.rstrip("\n"), question=question
+            )
+        full_bytes = os.path.getsize(fis_file) + len(
+            QUESTION_PROMPT_TEMPLATE.format(prj_fis="", question=question).encode(
+                "utf-8"
+            )
+        )
+        full_tokens = (
+            self._overhead_tokens
+            + sum(t for _, t in snapshot.values())
+            + self.tokenizer.count(question)
+        )
+        sent_tokens = self.tokenizer.count(message)
+        if (
+            sum(self._message_tokens) + sent_tokens
+            >= full_tokens * SESSION_MAX_REQUEST_RATIO
+        ):
+            return self._full_turn(fis_file, question)
+        return SessionTurn(
+            message,
+            snapshot,
+            False,
+            len(message.encode("utf-8")),
+            sent_tokens,
+            full_bytes,
+            full_tokens,
+            len(delta.changed) + len(delta.created) + len(delta.deleted),
+        )
+
+    def request_messages(self, turn: SessionTurn) -> List[Dict[str, str]]:
+        """本轮请求发送的完整消息列表 (对话历史 + 本轮提问)
+
+        发送完整 FIS 时重新开始对话，不携带对话历史 (与 commit 一致)。
+        """
+        history = [] if turn.full else self.messages
+        return [*history, {"role": "user", "content": turn.message}]
+
+    def commit(self, turn: SessionTurn, reply: str):
+        """记录完整完成的一轮对话"""
+
+        self._history.append(self._snapshot)
+        if turn.full:
+            self.messages = []
+            self._message_bytes = []
+            self._message_tokens = []
+            self._history = [None]
+        self.messages += [
+            {"role": "user", "content": turn.message},
+            {"role": "assistant", "content": reply},
+        ]
+        self._message_bytes += [turn.sent_bytes, len(reply.encode("utf-8"))]
+        self._message_tokens += [turn.sent_tokens, self.tokenizer.count(reply)]
+        self._snapshot = turn.snapshot
+
+    def pop(self) -> bool:
+        """撤销最近一轮对话 (用于重试)，返回是否存在可撤销的对话"""
+
+        if not self._history:
+            return False
+        self.messages = self.messages[:-2]
+        self._message_bytes = self._message_bytes[:-2]
+        self._message_tokens = self._message_tokens[:-2]
+        self._snapshot = self._history.pop()
+        return True
+
+    def print_turn_stats(self, turn: SessionTurn):
+        """打印本轮请求实际发送的数据量 (对话历史与本轮提问中所有消息的总和)
+
+        请求是无状态的，每轮都会重新发送包含首轮完整 FIS 的对话历史，
+        因此同时列出不带历史、单独发送完整 FIS 的数据量以便对比。
+        """
+
+        if turn.full:
+            print(
+                f"[会话] 本轮请求: 1 条消息 (完整 FIS), "
+                f"{turn.sent_bytes} 字节 / {turn.sent_tokens} tokens"
+                + (" (重新开始对话，清空对话历史)" if self.messages else "")
+            )
+            return
+        history_bytes = sum(self._message_bytes)
+        history_tokens = sum(self._message_tokens)
+        print(
+            f"[会话] 本轮请求: {len(self.messages) + 1} 条消息, "
+            f"{history_bytes + turn.sent_bytes} 字节 / "
+            f"{history_tokens + turn.sent_tokens} tokens "
+            f"(对话历史 {history_bytes} 字节 / {history_tokens} tokens, "
+            f"本轮 {turn.changed_files} 个变化文件 {turn.sent_bytes} 字节 / "
+            f"{turn.sent_tokens} tokens); "
+            f"不带历史重新发送完整 FIS: {turn.full_bytes} 字节 / {turn.full_tokens} tokens"
+        )
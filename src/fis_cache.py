@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+from src.setting import FIS_MANIFEST_SUFFIX
+
+# 清单格式版本，文件块的渲染方式变化时需要递增以使旧缓存失效
+MANIFEST_VERSION = 2
+
+# 修改时间距离上次生成过近的文件不信任缓存 (文件系统时间戳精度有限)
+MTIME_SAFETY_WINDOW_NS = 2 * 10**9
+
+
+class FileBlock(NamedTuple):
+    """单个文件渲染后的 FIS 文件块"""
+
+    relative_path: str
+    text: str
+    digest: Optional[str] = None
+    mtime_ns: int = 0
+    size: int = 0
+    cached: bool = False
+
+
+def content_digest(content: str) -> str:
+    """计算文件内容哈希"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ManifestCache:
+    """FIS 生成清单缓存
+
+    清单保存在 FIS 输出文件旁 (`<fis_file>.manifest`)，记录每个文件的路径、
+    修改时间、大小、内容哈希与渲染后的文件块。再次生成时文件状态未变化的
+    文件直接复用缓存的文件块，无需重新读取。
+
+    清单由一行 JSON 头部和若干条记录组成，每条记录为一行 JSON 元数据，
+    后接 `length` 字节的文件块内容，加载时只解析元数据并记录文件块偏移。
+    同一实例可多次在 with 语句中使用 (如监听模式)，每次退出后直接以新写出的
+    清单作为缓存，无需重新加载。
+    """
+
+    def __init__(self, fis_file: str, options_key: str = ""):
+        self.manifest_file = f"{fis_file}{FIS_MANIFEST_SUFFIX}"
+        self.options_key = options_key
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # 路径 -> (修改时间, 大小, 内容哈希, 文件块偏移, 文件块长度, 记录起始偏移)
+        self._index: Dict[str, Tuple[int, int, Optional[str], int, int, int]] = {}
+        self._new_index: Dict[str, Tuple[int, int, Optional[str], int, int, int]] = {}
+        self._generated_at_ns = 0
+        self._loaded_options: Optional[str] = None
+        self._header_written = False
+        self._old_file: Optional[BinaryIO] = None
+        self._new_file: Optional[BinaryIO] = None
+        self._tmp_file = f"{self.manifest_file}.tmp"
+        self._started_at_ns = time.time_ns()
+
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.manifest_file):
+            return
+        try:
+            f = open(self.manifest_file, "rb")
+        except OSError:
+            return
+        try:
+            header = json.loads(f.readline() or b"{}")
+            if header.get("version") != MANIFEST_VERSION:
+                f.close()
+                return
+            self._loaded_options = header.get("options", "")
+            self._generated_at_ns = header.get("generated_at_ns", 0)
+            while True:
+                record_offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                meta = json.loads(line)
+                self._index[meta["path"]] = (
+                    meta["mtime_ns"],
+                    meta["size"],
+                    meta["digest"],
+                    record_offset + len(line),
+                    meta["length"],
+                    record_offset,
+                )
+                f.seek(meta["length"], os.SEEK_CUR)
+        except (ValueError, KeyError):
+            # 清单损坏时放弃全部缓存
+            self._index.clear()
+            f.close()
+            return
+        self._old_file = f
+
+    def set_options_key(self, options_key: str):
+        """设置影响文件块渲染的生成选项 (需在查找与记录之前调用)，
+        与清单中记录的选项不同时不复用旧的缓存文件块
+        """
+
+        assert not self._header_written, "清单头部已写出，无法修改生成选项"
+        self.options_key = options_key
+
+    def __enter__(self) -> "ManifestCache":
+        if self._old_file is None and self._index:
+            try:
+                self._old_file = open(self.manifest_file, "rb")
+            except OSError:
+                self._index.clear()
+        self._new_file = open(self._tmp_file, "wb")
+        self._new_index = {}
+        self._started_at_ns = time.time_ns()
+        return self
+
+    def _write_header(self):
+        # 头部推迟到首次记录时写出，以便在加载 FIS 配置后再确定生成选项
+        header = {
+            "version": MANIFEST_VERSION,
+            "options": self.options_key,
+            "generated_at_ns": self._started_at_ns,
+        }
+        self._new_file.write(json.dumps(header).encode("utf-8") + b"\n")
+        self._header_written = True
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._old_file:
+            self._old_file.close()
+            self._old_file = None
+        if self._new_file:
+            if exc_type is None and not self._header_written:
+                self._write_header()
+            self._new_file.close()
+            self._new_file = None
+        self._header_written = False
+        if exc_type is None:
+            os.replace(self._tmp_file, self.manifest_file)
+            # 新清单成为下次生成的缓存
+            self._index = self._new_index
+            self._loaded_options = self.options_key
+            self._generated_at_ns = self._started_at_ns
+        elif os.path.exists(self._tmp_file):
+            os.remove(self._tmp_file)
+
+    def close(self):
+        """关闭清单文件 (仅读取清单、未在 with 语句中使用时调用)"""
+        if self._old_file:
+            self._old_file.close()
+            self._old_file = None
+
+    def fingerprints(self) -> Dict[str, str]:
+        """返回清单中每个文件的内容指纹 (文本文件为内容哈希，二进制文件为修改时间与大小)"""
+        return {
+            path: digest or f"stat:{mtime_ns}:{size}"
+            for path, (mtime_ns, size, digest, *_) in self._index.items()
+        }
+
+    def read_block(self, relative_path: str) -> Optional[str]:
+        """读取清单中记录的文件块内容"""
+
+        entry = self._index.get(relative_path)
+        if entry is None or self._old_file is None:
+            return None
+        with self._lock:
+            self._old_file.seek(entry[3])
+            return self._old_file.read(entry[4]).decode("utf-8")
+
+    def lookup(self, relative_path: str, st: os.stat_result) -> Optional[FileBlock]:
+        """查找文件状态未变化的缓存文件块，未命中时返回 None"""
+
+        entry = self._index.get(relative_path)
+        if (
+            entry is None
+            or self._old_file is None
+            or self._loaded_options != self.options_key
+            or entry[0] != st.st_mtime_ns
+            or entry[1] != st.st_size
+            or st.st_mtime_ns >= self._generated_at_ns - MTIME_SAFETY_WINDOW_NS
+        ):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        mtime_ns, size, digest, offset, length, _ = entry
+        with self._lock:
+            self.hits += 1
+            self._old_file.seek(offset)
+            text = self._old_file.read(length).decode("utf-8")
+        return FileBlock(relative_path, text, digest, mtime_ns, size, cached=True)
+
+    def record(self, block: FileBlock):
+        """记录本次生成的文件块 (需按输出顺序调用)"""
+
+        assert self._new_file is not None, "ManifestCache 需要在 with 语句中使用"
+        if not self._header_written:
+            self._write_header()
+        data = block.text.encode("utf-8")
+        meta = {
+            "path": block.relative_path,
+            "mtime_ns": block.mtime_ns,
+            "size": block.size,
+            "digest": block.digest,
+            "length": len(data),
+        }
+        line = json.dumps(meta).encode("utf-8") + b"\n"
+        record_offset = self._new_file.tell()
+        self._new_file.write(line)
+        self._new_file.write(data)
+        self._new_index[block.relative_path] = (
+            block.mtime_ns,
+            block.size,
+            block.digest,
+            record_offset + len(line),
+            len(data),
+            record_offset,
+        )
+
+    def copy(self, relative_path: str) -> Optional[FileBlock]:
+        """将缓存中的文件块原样复制到新清单 (不检查文件状态是否变化)，
+        返回该文件块，缓存中没有该文件时返回 None
+        """
+
+        assert self._new_file is not None, "ManifestCache 需要在 with 语句中使用"
+        entry = self._index.get(relative_path)
+        if entry is None or self._old_file is None:
+            return None
+        if not self._header_written:
+            self._write_header()
+        mtime_ns, size, digest, offset, length, record_offset = entry
+        with self._lock:
+            self._old_file.seek(record_offset)
+            record = self._old_file.read(offset + length - record_offset)
+        new_offset = self._new_file.tell()
+        self._new_file.write(record)
+        self._new_index[relative_path] = (
+            mtime_ns,
+            size,
+            digest,
+            new_offset + offset - record_offset,
+            length,
+            new_offset,
+        )
+        text = record[offset - record_offset :].decode("utf-8")
+        return FileBlock(relative_path, text, digest, mtime_ns, size, cached=True)
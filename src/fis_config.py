@@ -1,26 +1,65 @@
 import re
-from typing import List
-
-import yaml
+from typing import List, Optional, Pattern
 
 from src.setting import DEFAULT_FIS_CONFIG_FILE
 from src.utils import format_path
 
 
+def _compile_alternation(patterns: List[str]) -> Optional[Pattern]:
+    """将多条规则合并编译为一个正则表达式
+
+    规则只能从路径段的开头开始匹配 (与旧版对相对路径使用 re.match 的语义一致)，
+    避免 `/?build/` 命中 `rebuild/` 等仅后缀相同的目录。匹配对象为 `/` 加项目相对路径。
+    """
+    if not patterns:
+        return None
+    return re.compile("(?:^|/)(?:" + "|".join(f"(?:{reg})" for reg in patterns) + ")")
+
+
 class FisConfig:
     def __init__(self, config_file):
+        # 仅在使用自定义配置时导入 yaml，缩短命令行启动时间
+        import yaml
+
+        # 优先使用 libyaml 提供的 C 加速加载器
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
         with open(config_file, "r") as f:
-            self.config = yaml.load(f, Loader=yaml.FullLoader)
+            self.config = yaml.load(f, Loader=loader) or {}
+
+        # 以 `/` 结尾的规则只描述目录，其余规则只描述文件
+        ignore_regex = self.get_ignore_regex()
+        dir_rules = [reg for reg in ignore_regex if reg.endswith("/")]
+        file_rules = [reg for reg in ignore_regex if not reg.endswith("/")]
+        self._dir_matcher = _compile_alternation(dir_rules)
+        self._file_matcher = _compile_alternation(file_rules)
 
     def get_ignore_regex(self) -> List[str]:
         return self.config.get("ignore_regex", [])
 
+    def is_ignored_dir(self, relative_path: str) -> bool:
+        """匹配忽略目录 (relative_path 为已规范化、以 `/` 分隔的项目相对路径)
+
+        目录路径会补全结尾的 `/` 后再匹配，命中时整个目录树都应被跳过。
+        """
+        return bool(
+            self._dir_matcher and self._dir_matcher.search(f"/{relative_path}/")
+        )
+
+    def is_ignored_file(self, relative_path: str) -> bool:
+        """匹配忽略文件 (relative_path 为已规范化、以 `/` 分隔的项目相对路径)
+
+        仅检查文件规则，所在目录是否被忽略应在遍历时预先剪枝判断。
+        """
+        return bool(
+            self._file_matcher and self._file_matcher.search(f"/{relative_path}")
+        )
+
     def is_match_ignore_path(self, path) -> bool:
-        """匹配忽略目录"""
-        for reg in self.get_ignore_regex():
-            if re.match(reg, format_path(path)):
-                return True
-        return False
+        """匹配忽略路径 (会自动规范化路径分隔符，目录路径需以 `/` 结尾)"""
+        path = format_path(path)
+        if path.endswith("/"):
+            return self.is_ignored_dir(path.rstrip("/"))
+        return self.is_ignored_file(path)
 
     @classmethod
     def create_fis_config_template(cls, config_file) -> "FisConfig":
@@ -33,18 +72,29 @@ class FisConfig:
                 r"\.vscode/",
                 r"\.DS_Store",
                 r"__pycache__/",
-                r"\.pyc$",
-                r"\.pyo$",
-                r"\.lock$",
-                r"-lock.yaml$",
+                r"[^/]*\.pyc$",
+                r"[^/]*\.pyo$",
+                r"[^/]*\.lock$",
+                r"[^/]*-lock\.yaml$",
                 r"/?node_modules/",
                 r"/?build/",
                 r"/?dist/",
                 r"/?output/",
                 r"/?temp/",
-            ]
+            ],
+            # 按顺序匹配，文件超过首条匹配规则的 max_bytes 时截断 (truncate，
+            # 保留开头 head_lines 行与结尾 tail_lines 行) 或仅输出大小与行数 (omit)
+            "size_limits": [
+                {"pattern": r"\.min\.(js|css)$", "max_bytes": 0, "mode": "omit"},
+                {"pattern": r"\.(json|sql|csv)$", "max_bytes": 64 * 1024},
+                {"max_bytes": 256 * 1024},
+            ],
+            # [BINARY] 文件块是否附带文件大小与 SHA-256
+            "binary_metadata": False,
         }
 
+        import yaml
+
         with open(config_file, "w") as f:
             yaml.dump(config, f)
 
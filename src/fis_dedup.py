@@ -0,0 +1,45 @@
+import re
+from typing import Dict, Optional
+
+from src.fis_cache import FileBlock
+from src.setting import FILE_START_PREFIX
+from src.tokens import TokenReport
+
+_SAME_AS_RE = re.compile(r"\[SAME_AS (.+)\]")
+
+
+def same_as_target(opt_tag: Optional[str]) -> Optional[str]:
+    """解析 `[SAME_AS 路径]` 标记，返回被引用的文件路径，不是引用标记时返回 None"""
+
+    match = _SAME_AS_RE.fullmatch(opt_tag) if opt_tag else None
+    return match.group(1).strip() if match else None
+
+
+class Deduplicator:
+    """按内容哈希去重
+
+    内容与此前输出的文本文件完全相同的文件改为输出引用文件块
+    (`$$$ b/x.py [SAME_AS a/x.py]`)，引用比原文件块更长时 (如空文件) 保持原样。
+    需按输出顺序调用，保证被引用的文件总在引用之前出现。
+    """
+
+    def __init__(self, report: Optional[TokenReport] = None):
+        self.report = report
+        self._first: Dict[str, str] = {}  # 内容哈希 -> 首次出现的文件路径
+
+    def dedupe(self, block: FileBlock) -> FileBlock:
+        if block.digest is None or not block.text:
+            return block  # 二进制、截断或省略的文件块没有内容哈希
+        first = self._first.setdefault(block.digest, block.relative_path)
+        if first == block.relative_path:
+            return block
+
+        text = f"{FILE_START_PREFIX}{block.relative_path} [SAME_AS {first}]\n"
+        if len(text) >= len(block.text):
+            return block
+        if self.report:
+            self.report.add_dedup(
+                len(block.text.encode("utf-8")) - len(text.encode("utf-8")),
+                self.report.count(block.text) - self.report.count(text),
+            )
+        return block._replace(text=text)
@@ -0,0 +1,88 @@
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.fis_cache import ManifestCache
+from src.setting import FILE_START_PREFIX, FIS_MANIFEST_SUFFIX
+from src.size_policy import OMITTED_TAG, TRUNCATED_TAG
+
+# 带有这些标记的文件块不是完整的文件内容，内容变化时不改为 [REPLACE]
+_PARTIAL_TAGS = ("[BINARY]", TRUNCATED_TAG, OMITTED_TAG)
+
+# 快照：文件相对路径 -> (内容指纹, 文件块 token 数)
+FisSnapshot = Dict[str, Tuple[str, int]]
+
+
+class FisDelta(NamedTuple):
+    """两次快照之间的增量 FIS"""
+
+    text: str
+    changed: List[str]
+    created: List[str]
+    deleted: List[str]
+
+    @property
+    def empty(self) -> bool:
+        return not (self.changed or self.created or self.deleted)
+
+
+def _replace_header(block: str, tag: str) -> str:
+    """为文件块的路径行添加操作标记"""
+
+    header, sep, content = block.partition("\n")
+    return f"{header} {tag}{sep}{content}"
+
+
+def load_fis_snapshot(
+    fis_file: str, count_tokens: Callable[[str], int]
+) -> Optional[FisSnapshot]:
+    """根据 FIS 文件旁的生成清单建立快照，没有清单时返回 None"""
+
+    if not os.path.exists(f"{fis_file}{FIS_MANIFEST_SUFFIX}"):
+        return None
+    manifest = ManifestCache(fis_file)
+    try:
+        return {
+            path: (fingerprint, count_tokens(manifest.read_block(path) or ""))
+            for path, fingerprint in manifest.fingerprints().items()
+        }
+    finally:
+        manifest.close()
+
+
+def build_delta_fis(
+    fis_file: str, previous: FisSnapshot, count_tokens: Callable[[str], int]
+) -> Optional[Tuple[FisDelta, FisSnapshot]]:
+    """对比上次发送时的快照与当前生成清单，返回 (增量 FIS, 新快照)
+
+    内容变化的文件输出为 `[REPLACE]` 文件块，新增文件输出为普通文件块，
+    已删除的文件输出为 `[DELETE]` 文件块。没有生成清单时返回 None。
+    """
+
+    if not os.path.exists(f"{fis_file}{FIS_MANIFEST_SUFFIX}"):
+        return None
+    manifest = ManifestCache(fis_file)
+    try:
+        blocks: List[str] = []
+        changed: List[str] = []
+        created: List[str] = []
+        snapshot: FisSnapshot = {}
+        for path, fingerprint in manifest.fingerprints().items():
+            old = previous.get(path)
+            if old and old[0] == fingerprint:
+                snapshot[path] = old
+                continue
+            block = manifest.read_block(path) or ""
+            snapshot[path] = (fingerprint, count_tokens(block))
+            if old:
+                changed.append(path)
+                if not block.partition("\n")[0].endswith(_PARTIAL_TAGS):
+                    block = _replace_header(block, "[REPLACE]")
+            else:
+                created.append(path)
+            blocks.append(block if block.endswith("\n") else f"{block}\n")
+    finally:
+        manifest.close()
+
+    deleted = [path for path in previous if path not in snapshot]
+    blocks.extend(f"{FILE_START_PREFIX}{path} [DELETE]\n" for path in deleted)
+    return FisDelta("".join(blocks), changed, created, deleted), snapshot
@@ -0,0 +1,332 @@
+import mmap
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from src.setting import FILE_START_PREFIX, INSTRUCTION_TEXT, INSTRUCTION_TEXT_EN
+
+_PREFIX = FILE_START_PREFIX.encode("utf-8")
+_COMMENT_START = b"{/*"
+_COMMENT_END = b"*/}"
+_FIS_FENCE = b"```fis"
+_FENCE = b"```"
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+
+# 说明提示词 (生成时写入，Windows 下换行为 \r\n)
+_INSTRUCTIONS = [
+    variant.encode("utf-8")
+    for text in (INSTRUCTION_TEXT, INSTRUCTION_TEXT_EN)
+    for variant in (text, text.replace("\n", "\r\n"))
+]
+
+
+class FisChange(NamedTuple):
+    """FIS 中单个文件块描述的变更"""
+
+    file_path: str
+    opt_tag: Optional[str]
+    content: Optional[str]  # 文件路径行后没有换行 (描述末尾) 时为 None
+
+
+def parse_fis_header(header: str) -> Tuple[str, Optional[str]]:
+    """解析文件路径行 (不含 `$$$ ` 前缀)，返回文件路径与操作标记"""
+
+    file_path = header.strip()
+    opt_tag = re.search(r"(\[.*\])", file_path)
+    if not opt_tag:
+        return file_path, None
+    tag = opt_tag.group(1)
+    return file_path.replace(f"{tag}", "").strip(), tag
+
+
+def _normalize_newlines(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class FisEntry(NamedTuple):
+    """FIS 中的单个文件块，只记录内容在文件中的字节范围，按需读取"""
+
+    file_path: str
+    opt_tag: Optional[str]
+    spans: Tuple[Tuple[int, int], ...]  # 文件内容的字节范围 (已跳过其中的注释)
+    has_content: bool  # 文件路径行后是否有换行 (描述末尾的文件块可能没有)
+    buffer: Union[mmap.mmap, bytes]
+
+    @property
+    def size(self) -> int:
+        return sum(end - start for start, end in self.spans)
+
+    def view(self) -> memoryview:
+        """文件内容的原始字节；内容中没有注释时为文件映射的零拷贝视图
+
+        视图需在 FisDocument 关闭前释放 (可使用 with 语句)。
+        """
+
+        if len(self.spans) == 1:
+            start, end = self.spans[0]
+            return memoryview(self.buffer)[start:end]
+        return memoryview(b"".join(self.buffer[start:end] for start, end in self.spans))
+
+    def text(self) -> Optional[str]:
+        """文件内容文本 (换行符统一为 `\\n`)，没有内容时返回 None"""
+
+        if not self.has_content:
+            return None
+        with self.view() as view:
+            return _normalize_newlines(str(view, "utf-8"))
+
+    def to_change(self) -> FisChange:
+        return FisChange(self.file_path, self.opt_tag, self.text())
+
+
+class FisDocument:
+    """基于内存映射的 FIS 文件读取器
+
+    打开时对文件做一次扫描，建立注释区间与每个 `$$$` 文件块的偏移索引，
+    之后按需解码单个文件块，无需将整个 FIS 读入内存或生成去除注释后的副本。
+    说明提示词、注释与 fis 代码块的处理规则与 `read_fis_description_from_content`
+    及 `iter_fis_changes` 一致 (被注释截断的 `$$$` 与代码块标记除外)。
+
+    用法:
+        with FisDocument("project.fis") as document:
+            for entry in document:
+                ...
+            content = document.get("src/main.py").text()
+    """
+
+    def __init__(self, fis_file: str):
+        self.fis_file = fis_file
+        self._file = open(fis_file, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件无法映射
+            self._buffer = b""
+
+        self._comment_starts = array("q")
+        self._comment_ends = array("q")
+        self._entry_starts = array("q")  # `$$$ ` 之后的偏移
+        self._entry_ends = array("q")
+        self._paths: Optional[Dict[str, int]] = None
+        self._scan()
+
+    def __enter__(self) -> "FisDocument":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._entry_starts)
+
+    def __iter__(self) -> Iterator[FisEntry]:
+        for index in range(len(self._entry_starts)):
+            yield self._entry(index)
+
+    def list(self) -> List[Tuple[str, Optional[str]]]:
+        """按出现顺序返回所有文件块的 (文件路径, 操作标记)"""
+        return [self._header(index)[:2] for index in range(len(self._entry_starts))]
+
+    def get(self, file_path: str) -> Optional[FisEntry]:
+        """查找文件块 (同一路径出现多次时返回最后一个)，不存在时返回 None"""
+
+        if self._paths is None:
+            self._paths = {
+                self._header(index)[0]: index
+                for index in range(len(self._entry_starts))
+            }
+        index = self._paths.get(file_path)
+        return None if index is None else self._entry(index)
+
+    def iter_changes(self) -> Iterator[FisChange]:
+        """逐个产出文件变更 (与 iter_fis_changes 的结果一致)"""
+        for entry in self:
+            yield entry.to_change()
+
+    def iter_segments(self) -> Iterator[Tuple[int, int, Optional[FisEntry]]]:
+        """按顺序产出首尾相接、覆盖整个文件的字节段 (起始偏移, 结束偏移, 文件块)
+
+        文件块对应的段从 `$$$ ` 开始；文件块之外的文本 (说明提示词、代码块标记等)
+        单独成段，其文件块为 None。
+        """
+
+        pos = 0
+        for index in range(len(self._entry_starts)):
+            start = self._entry_starts[index] - len(_PREFIX)
+            if start > pos:
+                yield pos, start, None
+            pos = self._entry_ends[index]
+            yield start, pos, self._entry(index)
+        if pos < len(self._buffer):
+            yield pos, len(self._buffer), None
+
+    def read(self, start: int, end: int) -> bytes:
+        """读取原始字节"""
+        return self._buffer[start:end]
+
+    # ---- 扫描与索引 ----
+
+    def _in_comment(self, start: int, end: int) -> bool:
+        """字节范围 [start, end) 是否与注释区间重叠"""
+
+        index = bisect_right(self._comment_starts, end - 1) - 1
+        return index >= 0 and self._comment_ends[index] > start
+
+    def _find(self, sub: bytes, start: int, end: int) -> int:
+        """在注释之外查找 sub 第一次出现的位置"""
+
+        while True:
+            pos = self._buffer.find(sub, start, end)
+            if pos < 0 or not self._in_comment(pos, pos + len(sub)):
+                return pos
+            start = pos + 1
+
+    def _rfind(self, sub: bytes, start: int, end: int) -> int:
+        while True:
+            pos = self._buffer.rfind(sub, start, end)
+            if pos < 0 or not self._in_comment(pos, pos + len(sub)):
+                return pos
+            end = pos + len(sub) - 1
+
+    def _skip_comments_before(self, pos: int) -> int:
+        """跳过紧邻 pos 之前的注释，返回去除注释后 pos 前一个字节的结束位置"""
+
+        index = bisect_left(self._comment_ends, pos)
+        while 0 <= index < len(self._comment_ends) and self._comment_ends[index] == pos:
+            pos = self._comment_starts[index]
+            index -= 1
+        return pos
+
+    def _skip_comments_after(self, pos: int) -> int:
+        """跳过从 pos 开始的注释，返回去除注释后 pos 处字节的实际位置"""
+
+        index = bisect_left(self._comment_starts, pos)
+        while index < len(self._comment_starts) and self._comment_starts[index] == pos:
+            pos = self._comment_ends[index]
+            index += 1
+        return pos
+
+    def _rstrip(self, start: int, end: int) -> int:
+        """去除结尾的空白字符与注释，返回新的结束位置"""
+
+        while end > start:
+            if self._buffer[end - 1] in _WHITESPACE:
+                end -= 1
+                continue
+            index = bisect_right(self._comment_starts, end - 1) - 1
+            if index >= 0 and self._comment_ends[index] == end:
+                end = self._comment_starts[index]
+                continue
+            break
+        return end
+
+    def _scan(self):
+        buffer = self._buffer
+        start, end = 0, len(buffer)
+
+        # 文件以说明提示词开头时跳过提示词
+        for instruction in _INSTRUCTIONS:
+            if buffer[: len(instruction)] == instruction:
+                start = len(instruction)
+                while start < end and buffer[start] in _WHITESPACE:
+                    start += 1
+                while end > start and buffer[end - 1] in _WHITESPACE:
+                    end -= 1
+                break
+
+        # 注释区间 (不可嵌套，未闭合的注释原样保留)
+        pos = start
+        while True:
+            comment_start = buffer.find(_COMMENT_START, pos, end)
+            if comment_start < 0:
+                break
+            comment_end = buffer.find(_COMMENT_END, comment_start + 3, end)
+            if comment_end < 0:
+                break
+            self._comment_starts.append(comment_start)
+            self._comment_ends.append(comment_end + 3)
+            pos = comment_end + 3
+
+        # 存在 ```fis 代码块时只取其中的内容 (截取到最后一个换行加 ```)
+        fence = self._find_fis_fence(start, end)
+        fence_end = self._rfind_fence_end(start, end)
+        if fence >= 0 and fence_end >= 0:
+            start = fence + len(_FIS_FENCE)
+            end = self._rstrip(start, max(fence_end, start))
+
+        pos = self._find(_PREFIX, start, end)
+        while pos >= 0:
+            next_pos = self._find(_PREFIX, pos + len(_PREFIX), end)
+            self._entry_starts.append(pos + len(_PREFIX))
+            self._entry_ends.append(next_pos if next_pos >= 0 else end)
+            pos = next_pos
+
+    def _find_fis_fence(self, start: int, end: int) -> int:
+        """查找第一个 "```fis" 加换行的代码块起始标记"""
+
+        pos = self._find(_FIS_FENCE, start, end)
+        while pos >= 0:
+            after = self._skip_comments_after(pos + len(_FIS_FENCE))
+            if self._buffer[after : after + 1] == b"\n" or (
+                self._buffer[after : after + 2] == b"\r\n"
+            ):
+                return pos
+            pos = self._find(_FIS_FENCE, pos + 1, end)
+        return -1
+
+    def _rfind_fence_end(self, start: int, end: int) -> int:
+        """查找最后一个换行加 "```" 的代码块结束标记，返回换行符的位置"""
+
+        pos = self._rfind(_FENCE, start, end)
+        while pos >= 0:
+            newline = self._skip_comments_before(pos) - 1
+            if newline >= start and self._buffer[newline : newline + 1] == b"\n":
+                return newline
+            pos = self._rfind(_FENCE, start, pos + len(_FENCE) - 1)
+        return -1
+
+    def _spans(self, start: int, end: int) -> Tuple[Tuple[int, int], ...]:
+        """[start, end) 中去除注释后的字节范围"""
+
+        spans = []
+        index = max(bisect_right(self._comment_starts, start) - 1, 0)
+        while start < end and index < len(self._comment_starts):
+            comment_start = self._comment_starts[index]
+            comment_end = self._comment_ends[index]
+            if comment_start >= end:
+                break
+            if comment_end > start:
+                if comment_start > start:
+                    spans.append((start, comment_start))
+                start = comment_end
+            index += 1
+        if start < end:
+            spans.append((start, end))
+        return tuple(spans)
+
+    def _header(self, index: int) -> Tuple[str, Optional[str], int, bool]:
+        """解析文件块的路径行，返回 (文件路径, 操作标记, 内容起始偏移, 是否有内容)"""
+
+        start, end = self._entry_starts[index], self._entry_ends[index]
+        newline = self._find(b"\n", start, end)
+        header_end = newline if newline >= 0 else end
+        header = b"".join(
+            self._buffer[span_start:span_end]
+            for span_start, span_end in self._spans(start, header_end)
+        )
+        file_path, opt_tag = parse_fis_header(str(header, "utf-8"))
+        return file_path, opt_tag, header_end + 1, newline >= 0
+
+    def _entry(self, index: int) -> FisEntry:
+        file_path, opt_tag, content_start, has_content = self._header(index)
+        spans = (
+            self._spans(content_start, self._entry_ends[index]) if has_content else ()
+        )
+        return FisEntry(file_path, opt_tag, spans, has_content, self._buffer)
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import struct
+import zlib
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.fis_document import FisChange, FisDocument, FisEntry
+
+# .fisz 文件结构：
+#   FISZ_MAGIC | 编解码器名称长度 (1 字节) | 编解码器名称
+#   若干压缩段：说明提示词等文件块之前的文本、每个文件块、文件块之后的文本
+#   压缩后的 JSON 索引：每段的偏移、压缩后长度、原始长度、SHA-256，文件块另记录
+#       文件路径、操作标记以及去除注释后文件内容在段内的字节范围
+#   尾部：索引偏移与长度 (各 8 字节小端) | FISZ_MAGIC
+# 所有段按顺序解压拼接即为原始 FIS 文本 (无损)，读取单个文件块时只需解压对应的段。
+FISZ_MAGIC = b"FISZ"
+FISZ_VERSION = 1
+_FOOTER = struct.Struct("<QQ4s")
+
+CODEC_AUTO = "auto"
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+CODECS = (CODEC_AUTO, CODEC_ZSTD, CODEC_ZLIB)
+
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 9
+
+
+class FisPackError(Exception):
+    """.fisz 文件损坏或无法读取"""
+
+
+def _zstd_codec() -> Optional[Tuple[Callable, Callable]]:
+    """zstd 编解码函数：优先使用标准库 (Python 3.14+)，其次 zstandard 包，均不可用时返回 None"""
+
+    try:
+        from compression import zstd  # type: ignore
+
+        return (
+            lambda data: zstd.compress(data, level=_ZSTD_LEVEL),
+            zstd.decompress,
+        )
+    except ImportError:
+        pass
+    try:
+        import zstandard  # type: ignore
+    except ImportError:
+        return None
+    return (
+        zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress,
+        zstandard.ZstdDecompressor().decompress,
+    )
+
+
+def _get_codec(name: str) -> Tuple[str, Callable, Callable]:
+    if name in (CODEC_AUTO, CODEC_ZSTD):
+        codec = _zstd_codec()
+        if codec:
+            return (CODEC_ZSTD, *codec)
+        if name == CODEC_ZSTD:
+            raise FisPackError("使用 zstd 需要 Python 3.14+ 或安装 zstandard 包")
+    if name in (CODEC_AUTO, CODEC_ZLIB):
+        return (
+            CODEC_ZLIB,
+            lambda data: zlib.compress(data, _ZLIB_LEVEL),
+            zlib.decompress,
+        )
+    raise FisPackError(f"未知的压缩方式: {name}")
+
+
+def is_fis_pack(file_path: str) -> bool:
+    """根据文件头判断是否为 .fisz 文件"""
+
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(FISZ_MAGIC)) == FISZ_MAGIC
+    except OSError:
+        return False
+
+
+def pack_fis_file(fis_file: str, pack_file: str, codec: str = CODEC_AUTO) -> dict:
+    """将纯文本 FIS 文件打包为 .fisz，返回统计信息"""
+
+    codec_name, compress, _ = _get_codec(codec)
+    segments = []
+    raw_size = 0
+    with FisDocument(fis_file) as document, open(pack_file, "wb") as out:
+        out.write(FISZ_MAGIC + bytes([len(codec_name)]) + codec_name.encode("ascii"))
+        for start, end, entry in document.iter_segments():
+            raw = document.read(start, end)
+            data = compress(raw)
+            info = {}
+            if entry is not None:
+                # 记录路径行解析结果与内容范围，读取时无需再次扫描注释
+                info.update(
+                    path=entry.file_path,
+                    tag=entry.opt_tag,
+                    content=entry.has_content,
+                    spans=[[s - start, e - start] for s, e in entry.spans],
+                )
+            info.update(
+                offset=out.tell(),
+                length=len(data),
+                size=len(raw),
+                sha256=hashlib.sha256(raw).hexdigest(),
+            )
+            out.write(data)
+            segments.append(info)
+            raw_size += len(raw)
+
+        index = compress(
+            json.dumps(
+                {"version": FISZ_VERSION, "codec": codec_name, "segments": segments},
+                ensure_ascii=False,
+            ).encode("utf-8")
+        )
+        index_offset = out.tell()
+        out.write(index)
+        out.write(_FOOTER.pack(index_offset, len(index), FISZ_MAGIC))
+        packed_size = out.tell()
+    return {
+        "codec": codec_name,
+        "files": sum(1 for info in segments if "path" in info),
+        "raw_bytes": raw_size,
+        "packed_bytes": packed_size,
+    }
+
+
+class FisPack:
+    """.fisz 文件读取器，接口与 FisDocument 一致
+
+    打开时只读取尾部索引，读取文件块时按偏移解压对应的段并校验内容哈希。
+    """
+
+    def __init__(self, pack_file: str):
+        self.pack_file = pack_file
+        self._file: BinaryIO = open(pack_file, "rb")
+        try:
+            self._load_index()
+        except Exception:
+            self._file.close()
+            raise
+        self._paths: Optional[Dict[str, int]] = None
+
+    def _load_index(self):
+        f = self._file
+        header = f.read(len(FISZ_MAGIC) + 1)
+        if len(header) <= len(FISZ_MAGIC) or header[: len(FISZ_MAGIC)] != FISZ_MAGIC:
+            raise FisPackError(f"不是 .fisz 文件: {self.pack_file}")
+        codec_name = f.read(header[-1]).decode("ascii")
+
+        f.seek(0, 2)
+        if f.tell() < _FOOTER.size:
+            raise FisPackError(f".fisz 文件不完整: {self.pack_file}")
+        f.seek(-_FOOTER.size, 2)
+        index_offset, index_length, magic = _FOOTER.unpack(f.read(_FOOTER.size))
+        if magic != FISZ_MAGIC:
+            raise FisPackError(f".fisz 文件不完整: {self.pack_file}")
+
+        self.codec, _, self._decompress = _get_codec(codec_name)
+        f.seek(index_offset)
+        index = json.loads(self._decompress(f.read(index_length)))
+        if index.get("version") != FISZ_VERSION:
+            raise FisPackError(f"不支持的 .fisz 版本: {index.get('version')}")
+        self.segments: List[dict] = index["segments"]
+        self._entries = [
+            i for i, segment in enumerate(self.segments) if "path" in segment
+        ]
+
+    def __enter__(self) -> "FisPack":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[FisEntry]:
+        for segment_index in self._entries:
+            yield self._entry(segment_index)
+
+    def list(self) -> List[Tuple[str, Optional[str]]]:
+        """按出现顺序返回所有文件块的 (文件路径, 操作标记)"""
+        return [
+            (self.segments[i]["path"], self.segments[i]["tag"]) for i in self._entries
+        ]
+
+    def get(self, file_path: str) -> Optional[FisEntry]:
+        """查找文件块 (同一路径出现多次时返回最后一个)，不存在时返回 None"""
+
+        if self._paths is None:
+            self._paths = {self.segments[i]["path"]: i for i in self._entries}
+        segment_index = self._paths.get(file_path)
+        return None if segment_index is None else self._entry(segment_index)
+
+    def iter_changes(self) -> Iterator[FisChange]:
+        for entry in self:
+            yield entry.to_change()
+
+    def read_segment(self, segment_index: int) -> bytes:
+        """解压单个段并校验内容哈希"""
+
+        segment = self.segments[segment_index]
+        self._file.seek(segment["offset"])
+        try:
+            data = self._decompress(self._file.read(segment["length"]))
+        except Exception as e:
+            raise FisPackError(f".fisz 数据损坏 (段 {segment_index}): {e}") from e
+        if (
+            len(data) != segment["size"]
+            or hashlib.sha256(data).hexdigest() != segment["sha256"]
+        ):
+            raise FisPackError(f".fisz 内容哈希不匹配 (段 {segment_index})")
+        return data
+
+    def _entry(self, segment_index: int) -> FisEntry:
+        segment = self.segments[segment_index]
+        return FisEntry(
+            segment["path"],
+            segment["tag"],
+            tuple((start, end) for start, end in segment["spans"]),
+            segment["content"],
+            self.read_segment(segment_index),
+        )
+
+    def unpack_to(self, out: BinaryIO):
+        """按顺序解压全部段，写出原始 FIS 文本"""
+        for segment_index in range(len(self.segments)):
+            out.write(self.read_segment(segment_index))
+
+
+def open_fis_document(fis_file: str) -> Union[FisDocument, FisPack]:
+    """打开 FIS 文件，根据文件头自动选择纯文本或 .fisz 读取器"""
+    return FisPack(fis_file) if is_fis_pack(fis_file) else FisDocument(fis_file)
@@ -0,0 +1,164 @@
+import re
+from typing import List, Optional, Tuple
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+# 允许忽略的最大上下文行数 (与 patch 的 fuzz factor 相同)
+MAX_FUZZ = 2
+
+
+class Hunk:
+    """unified diff 中的一个变更块"""
+
+    def __init__(self, header: str, old_start: Optional[int]):
+        self.header = header
+        self.old_start = old_start  # 从 1 开始的原文件行号，缺失时按上下文搜索
+        self.lines: List[Tuple[str, str]] = []  # (操作符, 行内容)
+
+    @property
+    def old_lines(self) -> List[str]:
+        return [text for op, text in self.lines if op in (" ", "-")]
+
+    @property
+    def new_lines(self) -> List[str]:
+        return [text for op, text in self.lines if op in (" ", "+")]
+
+
+class PatchError(Exception):
+    """补丁应用失败，failures 中包含每个失败变更块的说明"""
+
+    def __init__(self, failures: List[str]):
+        super().__init__("\n".join(failures))
+        self.failures = failures
+
+
+def parse_hunks(patch_text: str) -> List[Hunk]:
+    """解析 unified diff 文本中的变更块 (忽略 `---`/`+++` 文件头)"""
+
+    hunks: List[Hunk] = []
+    current: Optional[Hunk] = None
+    for line in patch_text.split("\n"):
+        if line.startswith("@@"):
+            match = HUNK_HEADER_RE.match(line)
+            current = Hunk(line, int(match.group(1)) if match else None)
+            hunks.append(current)
+        elif current is None:
+            continue  # 第一个变更块之前的文件头等内容
+        elif line.startswith("\\"):
+            continue  # `\ No newline at end of file`
+        elif line[:1] in (" ", "-", "+"):
+            current.lines.append((line[0], line[1:]))
+        elif line == "":
+            current.lines.append((" ", ""))  # 空上下文行常被省略行首空格
+        else:
+            current.lines.append((" ", line))  # 宽容处理缺少行首空格的上下文行
+
+    # 去除结尾因文本换行产生的多余空上下文行
+    for hunk in hunks:
+        while hunk.lines and hunk.lines[-1] == (" ", ""):
+            hunk.lines.pop()
+    return hunks
+
+
+def _lines_equal(a: List[str], b: List[str], loose: bool) -> bool:
+    if loose:
+        return [line.strip() for line in a] == [line.strip() for line in b]
+    return a == b
+
+
+def _find_hunk(
+    lines: List[str], old: List[str], expected: int, loose: bool
+) -> Optional[int]:
+    """从预期位置开始向两侧搜索匹配位置"""
+
+    size = len(old)
+    max_start = len(lines) - size
+    if max_start < 0:
+        return None
+    expected = min(max(expected, 0), max_start)
+    for distance in range(max_start + 1):
+        for pos in (expected - distance, expected + distance):
+            if 0 <= pos <= max_start and _lines_equal(
+                lines[pos : pos + size], old, loose
+            ):
+                return pos
+        if expected - distance < 0 and expected + distance > max_start:
+            break
+    return None
+
+
+def _locate(
+    lines: List[str], hunk: Hunk, expected: int
+) -> Optional[Tuple[int, int, int]]:
+    """定位变更块，返回 (位置, 忽略的前置上下文行数, 忽略的后置上下文行数)"""
+
+    ops = [op for op, _ in hunk.lines]
+    leading = len(ops) - len("".join(ops).lstrip(" "))
+    trailing = len(ops) - len("".join(ops).rstrip(" "))
+    old = hunk.old_lines
+
+    for fuzz in range(MAX_FUZZ + 1):
+        skip_head = min(fuzz, leading)
+        skip_tail = min(fuzz, trailing)
+        if fuzz and not (skip_head or skip_tail):
+            break
+        trimmed = old[skip_head : len(old) - skip_tail]
+        if not trimmed and old:
+            break
+        for loose in (False, True):
+            pos = _find_hunk(lines, trimmed, expected + skip_head, loose)
+            if pos is not None:
+                return pos, skip_head, skip_tail
+    return None
+
+
+def apply_patch(original: str, patch_text: str) -> str:
+    """将 unified diff 变更块应用到原文件内容上
+
+    变更块依次在预期行号附近搜索匹配位置 (行号缺失时全文搜索)，
+    找不到时依次尝试忽略行首尾空白、忽略最多两行上下文。
+    任一变更块失败时抛出 PatchError，并说明每个失败的变更块。
+    """
+
+    hunks = parse_hunks(patch_text)
+    if not hunks:
+        raise PatchError(["未找到任何 @@ 变更块"])
+
+    lines = original.split("\n")
+    failures = []
+    offset = 0  # 已应用变更块造成的行号偏移
+    search_from = 0
+    for index, hunk in enumerate(hunks, 1):
+        if hunk.old_start is not None:
+            expected = max(hunk.old_start - 1, 0) + offset
+        else:
+            expected = search_from
+        located = _locate(lines, hunk, expected)
+        if located is None:
+            preview = next((line for line in hunk.old_lines if line.strip()), "")
+            failures.append(
+                f"变更块 #{index} ({hunk.header}) 应用失败: 未找到匹配的上下文"
+                + (f" (首行: {preview.strip()!r})" if preview else "")
+            )
+            continue
+
+        pos, skip_head, skip_tail = located
+        ops = hunk.lines[skip_head : len(hunk.lines) - skip_tail]
+        old_size = sum(1 for op, _ in ops if op != "+")
+        # 上下文行保留原文件内容 (宽松匹配时原文件的缩进可能与补丁不同)
+        original_region = iter(lines[pos : pos + old_size])
+        new = []
+        for op, text in ops:
+            if op == "+":
+                new.append(text)
+            elif op == " ":
+                new.append(next(original_region))
+            else:
+                next(original_region)
+        lines[pos : pos + old_size] = new
+        offset += len(new) - old_size
+        search_from = pos + len(new)
+
+    if failures:
+        raise PatchError(failures)
+    return "\n".join(lines)
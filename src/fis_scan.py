@@ -0,0 +1,281 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Iterable, Iterator, List, Optional
+
+from src.fis_cache import FileBlock, ManifestCache, content_digest
+from src.fis_config import FisConfig
+from src.gitignore import GIT_DIR, GITIGNORE_FILE, GitIgnoreMatcher
+from src.log import logger
+from src.profiling import PROFILER
+from src.setting import (
+    DEFAULT_FIS_CONFIG_FILE,
+    FILE_START_PREFIX,
+    FIS_TXN_DIR,
+    INSTRUCTION_TEXT,
+    INSTRUCTION_TEXT_EN,
+    SIZE_MODE_OMIT,
+)
+from src.size_policy import (
+    OMITTED_TAG,
+    TRUNCATED_TAG,
+    SizeLimit,
+    SizePolicy,
+    count_lines,
+    elided_marker,
+    file_sha256,
+    read_truncated,
+)
+from src.utils import decode_text_content, is_known_binary_file
+
+
+def walk_project_files(
+    project_path: str,
+    fis_config: Optional[FisConfig],
+    ignore_fis: bool,
+    use_gitignore: bool,
+    exclude_files: Iterable[str] = (),
+    dirs: Optional[List[str]] = None,
+    start_dir: str = "",
+    max_depth: Optional[int] = None,
+) -> List[str]:
+    """遍历项目目录，按稳定的路径顺序返回需要描述的文件相对路径列表。
+
+    忽略规则统一作用于以 `/` 分隔的项目相对路径，命中的目录在进入前即被剪枝。
+    传入 dirs 时依次追加遍历到的目录相对路径 (项目根目录为空字符串，其余以 `/` 结尾)。
+    start_dir 为以 `/` 结尾的目录相对路径时只遍历该目录 (上级目录的 .gitignore 规则仍然生效)；
+    传入 max_depth 时不进入更深的目录，而是在其位置返回以 `/` 结尾的目录相对路径。
+    """
+
+    files: List[str] = []
+    excluded = {os.path.abspath(path) for path in exclude_files}
+    gitignore = GitIgnoreMatcher(project_path) if use_gitignore else None
+    PROFILER.instrument(fis_config, "ignore.fis_config", "is_ignored_dir")
+    PROFILER.instrument(fis_config, "ignore.fis_config", "is_ignored_file")
+    PROFILER.instrument(gitignore, "ignore.gitignore", "is_ignored")
+    PROFILER.instrument(gitignore, "gitignore.load", "push")
+    visited_dirs = 0
+
+    def recursive_traversal(current_path: str, relative_dir: str, depth: int):
+        nonlocal visited_dirs
+        visited_dirs += 1
+        if dirs is not None:
+            dirs.append(relative_dir)
+        try:
+            entries = sorted(os.scandir(current_path), key=lambda e: e.name)
+        except PermissionError:
+            logger.warning(f"权限不足，无法访问: {current_path}")
+            return
+
+        pushed = bool(
+            gitignore
+            and any(entry.name == GITIGNORE_FILE for entry in entries)
+            and gitignore.push(current_path, relative_dir)
+        )
+
+        for entry in entries:
+            relative_path = f"{relative_dir}{entry.name}"
+
+            if entry.is_dir():
+                if relative_path == FIS_TXN_DIR:
+                    continue  # 旧版本的事务回滚日志目录
+                if fis_config and fis_config.is_ignored_dir(relative_path):
+                    continue
+                if gitignore and (
+                    entry.name == GIT_DIR or gitignore.is_ignored(relative_path, True)
+                ):  # 被 .gitignore 忽略的目录或 .git 目录
+                    continue
+                if max_depth is not None and depth >= max_depth:
+                    files.append(f"{relative_path}/")
+                    continue
+                recursive_traversal(entry.path, f"{relative_path}/", depth + 1)
+                continue
+
+            if fis_config and fis_config.is_ignored_file(relative_path):
+                continue
+
+            if ignore_fis and entry.name.endswith(".fis"):  # 忽略 fis 文件
+                continue
+
+            if excluded and os.path.abspath(entry.path) in excluded:
+                continue  # 忽略本次生成的输出文件及其缓存清单
+
+            if gitignore and gitignore.is_ignored(relative_path, False):
+                continue  # 被 .gitignore 忽略
+
+            files.append(relative_path)
+
+        if pushed:
+            gitignore.pop()
+
+    parts = start_dir.split("/")[:-1]
+    if gitignore:
+        for depth in range(len(parts)):
+            parent_dir = "".join(f"{part}/" for part in parts[:depth])
+            gitignore.push(os.path.join(project_path, parent_dir), parent_dir)
+    recursive_traversal(
+        os.path.join(project_path, start_dir) if start_dir else project_path,
+        start_dir,
+        len(parts),
+    )
+    PROFILER.count("walk.dirs", visited_dirs)
+    PROFILER.count("walk.files", len(files))
+    return files
+
+
+def _read_oversized_block(
+    file_path: str, relative_path: str, st: os.stat_result, limit: SizeLimit
+) -> Optional[FileBlock]:
+    """按大小上限规则渲染超出上限的文件，不是文本文件时返回 None。
+
+    截断的文件块只包含开头与结尾若干行，中间以省略标记行代替；
+    省略的文件块只包含文件大小与行数。两者都不记录内容哈希。
+    """
+
+    if limit.mode == SIZE_MODE_OMIT:
+        with PROFILER.timer("read.io"):
+            lines = count_lines(file_path)
+        PROFILER.count("files.omitted")
+        text = (
+            f"{FILE_START_PREFIX}{relative_path} {OMITTED_TAG}\n"
+            f"size={st.st_size} lines={lines}\n"
+        )
+    else:
+        with PROFILER.timer("read.io"):
+            truncated = read_truncated(file_path, st.st_size, limit)
+        if truncated is None:
+            return None
+        head, tail, elided_lines, elided_bytes = truncated
+        if head and not head.endswith("\n"):
+            head += "\n"
+        PROFILER.count("files.truncated")
+        text = (
+            f"{FILE_START_PREFIX}{relative_path} {TRUNCATED_TAG}\n{head}"
+            f"{elided_marker(elided_lines, elided_bytes)}\n{tail}"
+        )
+    return FileBlock(relative_path, text, None, st.st_mtime_ns, st.st_size)
+
+
+def read_file_block(
+    project_path: str,
+    relative_path: str,
+    cache: Optional[ManifestCache] = None,
+    policy: Optional[SizePolicy] = None,
+) -> FileBlock:
+    """读取并分类单个文件，返回其 FIS 文件块；文件状态未变化时复用缓存。"""
+
+    file_path = os.path.join(project_path, relative_path)
+    try:
+        with PROFILER.timer("read.stat"):
+            st = os.stat(file_path)
+        if cache:
+            with PROFILER.timer("cache.lookup"):
+                cached_block = cache.lookup(relative_path, st)
+            if cached_block:
+                PROFILER.count("files.cached")
+                return cached_block
+
+        # 已知二进制扩展名的文件不会被打开；超出大小上限的文件只读取需要的部分；
+        # 其余文件读取一次后检测并解码
+        content = None
+        known_binary = is_known_binary_file(relative_path)
+        limit = policy.limit_for(relative_path, st.st_size) if policy else None
+        if limit and not known_binary:
+            block = _read_oversized_block(file_path, relative_path, st, limit)
+            if block:
+                return block
+        elif not known_binary:
+            with PROFILER.timer("read.io"):
+                with open(file_path, "rb") as f:
+                    data = f.read()
+            PROFILER.count("bytes.read", len(data))
+            with PROFILER.timer("classify"):
+                content = decode_text_content(data)
+        if content is not None:
+            PROFILER.count("files.text")
+            return FileBlock(
+                relative_path,
+                f"{FILE_START_PREFIX}{relative_path}\n{content}",
+                content_digest(content),
+                st.st_mtime_ns,
+                st.st_size,
+            )
+
+        PROFILER.count("files.binary")
+        text = f"{FILE_START_PREFIX}{relative_path} [BINARY]\n"
+        if policy and policy.binary_metadata:
+            with PROFILER.timer("read.io"):
+                text += f"size={st.st_size} sha256={file_sha256(file_path)}\n"
+    except PermissionError:
+        logger.warning(f"权限不足，无法访问: {file_path}")
+        return FileBlock(relative_path, "")
+    return FileBlock(relative_path, text, None, st.st_mtime_ns, st.st_size)
+
+
+def iter_file_blocks(
+    project_path: str,
+    relative_paths: List[str],
+    jobs: int,
+    cache: Optional[ManifestCache] = None,
+    policy: Optional[SizePolicy] = None,
+) -> Iterator[FileBlock]:
+    """按输入顺序产出文件块；jobs > 1 时使用线程池并发读取。"""
+
+    if jobs <= 1:
+        for relative_path in relative_paths:
+            block = read_file_block(project_path, relative_path, cache, policy)
+            if not block.cached:
+                logger.debug(f"读取文件: {relative_path}")
+            yield block
+        return
+
+    # 限制在途任务数量，避免大项目中已读取但未输出的内容堆积
+    max_pending = jobs * 4
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for relative_path in relative_paths:
+            pending.append(
+                executor.submit(
+                    read_file_block, project_path, relative_path, cache, policy
+                )
+            )
+            if len(pending) >= max_pending:
+                block = pending.popleft().result()
+                if not block.cached:
+                    logger.debug(f"读取文件: {block.relative_path}")
+                yield block
+        while pending:
+            block = pending.popleft().result()
+            if not block.cached:
+                logger.debug(f"读取文件: {block.relative_path}")
+            yield block
+
+
+def load_fis_config(
+    project_path: str, use_custom_fis_config: bool
+) -> Optional[FisConfig]:
+    """如果项目目录下有 FIS 配置文件，则读取其内容来作为生成匹配依据"""
+
+    if not use_custom_fis_config:
+        return None
+
+    fis_config_file = f"{project_path}/{DEFAULT_FIS_CONFIG_FILE}"
+    if os.path.exists(fis_config_file):
+        return FisConfig(fis_config_file)
+    import inquirer
+
+    if inquirer.confirm(
+        f"未找到自定义 FIS 配置文件: {fis_config_file} 是否生成默认配置？",
+        default=True,
+    ):
+        return FisConfig.create_fis_config_template(fis_config_file)
+    logger.warning("不使用 FIS 配置文件继续")
+    return None
+
+
+def instruction_text(use_explanation: str) -> str:
+    if use_explanation == "zh":
+        return INSTRUCTION_TEXT + "\n```fis\n"
+    if use_explanation == "en":
+        return INSTRUCTION_TEXT_EN + "\n```fis\n"
+    return ""
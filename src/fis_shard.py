@@ -0,0 +1,210 @@
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from src.fis_config import FisConfig
+from src.fis_scan import (
+    instruction_text,
+    iter_file_blocks,
+    load_fis_config,
+    walk_project_files,
+)
+from src.log import logger, set_log_level
+from src.profiling import PROFILER
+from src.setting import (
+    DEFAULT_FIS_CONFIG_FILE,
+    SHARD_MAX_DEPTH,
+    SHARD_MAX_FILES,
+    SHARDS_PER_PROCESS,
+    WRITE_BUFFER_SIZE,
+)
+from src.size_policy import SizePolicy
+from src.tokens import Tokenizer, TokenReport, get_tokenizer
+
+# 分片为按遍历顺序排列的若干路径：文件相对路径，或以 `/` 结尾、需要在工作进程中遍历的目录
+Shard = Tuple[str, ...]
+
+
+class _ShardOptions(NamedTuple):
+    """传递给工作进程的生成参数"""
+
+    project_path: str
+    fis_config_file: Optional[str]  # 工作进程中重新加载 FIS 配置
+    ignore_fis: bool
+    use_gitignore: bool
+    exclude_files: Tuple[str, ...]
+    policy: SizePolicy
+    tokenizer: Optional[str]  # 为 None 时不统计 token 数
+    shard_dir: str
+    log_level: int
+    log_to_stderr: bool
+
+
+_options: Optional[_ShardOptions] = None
+_fis_config: Optional[FisConfig] = None
+_tokenizer: Optional[Tokenizer] = None
+
+
+def plan_shards(
+    project_path: str,
+    fis_config: Optional[FisConfig],
+    ignore_fis: bool,
+    use_gitignore: bool,
+    exclude_files: Iterable[str],
+    processes: int,
+) -> List[Shard]:
+    """将项目划分为按输出顺序排列的分片
+
+    从顶层目录开始逐层细分，直到目录数达到进程数的 SHARDS_PER_PROCESS 倍，
+    使各进程可以从队列中领取大小不一的分片并保持负载均衡。
+    """
+
+    for max_depth in range(SHARD_MAX_DEPTH):
+        entries = walk_project_files(
+            project_path,
+            fis_config,
+            ignore_fis,
+            use_gitignore,
+            exclude_files,
+            max_depth=max_depth,
+        )
+        dirs = sum(1 for entry in entries if entry.endswith("/"))
+        if not dirs or dirs >= processes * SHARDS_PER_PROCESS:
+            break
+
+    shards: List[Shard] = []
+    files: List[str] = []
+    for entry in entries:
+        if entry.endswith("/"):
+            if files:
+                shards.append(tuple(files))
+                files = []
+            shards.append((entry,))
+            continue
+        files.append(entry)
+        if len(files) >= SHARD_MAX_FILES:
+            shards.append(tuple(files))
+            files = []
+    if files:
+        shards.append(tuple(files))
+    return shards
+
+
+def _init_worker(options: _ShardOptions):
+    global _options, _fis_config, _tokenizer
+    _options = options
+    _fis_config = options.fis_config_file and FisConfig(options.fis_config_file)
+    _tokenizer = options.tokenizer and get_tokenizer(options.tokenizer)
+    set_log_level(options.log_level)
+    if options.log_to_stderr:
+        sys.stdout = sys.stderr  # 描述输出到标准输出时，进度信息输出到标准错误
+
+
+def _render_shard(index: int, shard: Shard) -> Tuple[str, List[Tuple[str, int]]]:
+    """在工作进程中读取分片内的文件并写入分片文件，返回分片文件路径与每个文件块的 token 数"""
+
+    options = _options
+    shard_file = os.path.join(options.shard_dir, f"{index}.fis")
+    tokens = []
+    with open(shard_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+        for entry in shard:
+            relative_paths = (
+                walk_project_files(
+                    options.project_path,
+                    _fis_config,
+                    options.ignore_fis,
+                    options.use_gitignore,
+                    options.exclude_files,
+                    start_dir=entry,
+                )
+                if entry.endswith("/")
+                else [entry]
+            )
+            for block in iter_file_blocks(
+                options.project_path, relative_paths, 1, policy=options.policy
+            ):
+                if block.text:
+                    f.write(block.text)
+                    if _tokenizer:
+                        tokens.append(
+                            (block.relative_path, _tokenizer.count(block.text))
+                        )
+    return shard_file, tokens
+
+
+def write_sharded_description(
+    out: TextIO,
+    project_path: str,
+    use_explanation: str,
+    use_gitignore: bool,
+    ignore_fis: bool,
+    use_custom_fis_config: bool,
+    processes: int,
+    report: Optional[TokenReport],
+    tokenizer: str,
+    exclude_files: Iterable[str] = (),
+    max_file_size: Optional[int] = None,
+    binary_metadata: bool = False,
+):
+    """使用多个进程生成描述并写入 out，输出内容与 iter_description 逐字节一致
+
+    每个分片由一个工作进程遍历、读取并写入临时分片文件，主进程只接收文件块的 token 数，
+    按分片顺序将分片文件复制到输出中。
+    """
+
+    instruction = instruction_text(use_explanation)
+    out.write(instruction)
+    if report:
+        report.overhead = report.count(instruction) + report.count(
+            "```" if use_explanation else ""
+        )
+
+    with PROFILER.phase("config"):
+        fis_config = load_fis_config(project_path, use_custom_fis_config)
+        policy = SizePolicy.from_config(
+            fis_config and fis_config.config, max_file_size, binary_metadata
+        )
+    exclude_files = tuple(exclude_files)
+    with PROFILER.phase("walk"):
+        shards = plan_shards(
+            project_path,
+            fis_config,
+            ignore_fis,
+            use_gitignore,
+            exclude_files,
+            processes,
+        )
+    PROFILER.count("shards", len(shards))
+
+    out.flush()
+    with tempfile.TemporaryDirectory(prefix="fis-shards-") as shard_dir:
+        options = _ShardOptions(
+            project_path,
+            fis_config and f"{project_path}/{DEFAULT_FIS_CONFIG_FILE}",
+            ignore_fis,
+            use_gitignore,
+            exclude_files,
+            policy,
+            tokenizer if report else None,
+            shard_dir,
+            logger.level,
+            sys.stdout is sys.stderr,
+        )
+        with PROFILER.phase("shards"), ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(options,)
+        ) as executor:
+            for shard_file, tokens in executor.map(
+                _render_shard, range(len(shards)), shards
+            ):
+                with open(shard_file, "rb") as f:
+                    shutil.copyfileobj(f, out.buffer, WRITE_BUFFER_SIZE)
+                os.remove(shard_file)
+                if report:
+                    for relative_path, count in tokens:
+                        report.add(relative_path, count)
+
+    if use_explanation:
+        out.write("```")
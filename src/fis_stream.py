@@ -0,0 +1,172 @@
+from typing import List, Optional
+
+from src.fis_document import FisChange, parse_fis_header
+from src.setting import FILE_START_PREFIX
+
+COMMENT_START = "{/*"
+COMMENT_END = "*/}"
+FIS_FENCE = "```fis"
+FENCE = "```"
+
+
+class FisStreamParser:
+    """增量 FIS 解析器
+
+    逐块消费 LLM 的流式回复，在收到下一个文件路径行或 fis 代码块结束标记时
+    产出已完整的文件变更，注释去除与代码块提取规则与
+    `read_fis_description_from_content` 保持一致：
+
+    - `{/* ... */}` 注释 (可跨行、跨数据块) 会被去除，未闭合的注释原样保留；
+    - 存在 ```fis 代码块时只解析其中的内容，否则将整个回复视为 FIS 内容；
+    - 文件内容中以 ```lang 开始的内嵌代码块会被配对，不会误判为 fis 代码块结束。
+
+    以下情况与批量解析 (截取第一个 ```fis 到最后一个 ``` 之间的内容) 的结果不同：
+
+    - 回复包含多个 fis 代码块时逐个解析，代码块之间的文字被忽略，
+      批量解析则会将其并入前一个代码块的最后一个文件；
+    - 文件内容中不带语言标记的 ``` 视为 fis 代码块结束 (流式解析无法预知后文)，
+      fis 代码块之后的说明文字中出现 ``` 时同样不影响已解析的文件。
+    """
+
+    _OUTSIDE = 0
+    _INSIDE = 1
+    _CLOSED = 2
+
+    def __init__(self):
+        self._pending = ""  # 尚未完成注释识别的原始文本
+        self._comment = ""  # 当前未闭合注释中的文本
+        self._in_comment = False
+        self._line_buf = ""  # 去除注释后尚未构成完整行的文本
+
+        self._state = self._OUTSIDE
+        self._fenced = False
+        self._inner_fence = False
+        self._header: Optional[str] = None
+        self._header_has_newline = False
+        self._lines: List[str] = []
+        self._completed: List[FisChange] = []
+
+    @property
+    def fence_closed(self) -> bool:
+        """fis 代码块是否已经结束"""
+        return self._state == self._CLOSED
+
+    def feed(self, chunk: str) -> List[FisChange]:
+        """消费一段回复文本，返回本次新完成的文件变更"""
+
+        self._pending += chunk
+        self._consume_comments(final=False)
+        return self._take_completed()
+
+    def close(self) -> List[FisChange]:
+        """回复结束时调用，返回剩余的文件变更"""
+
+        self._consume_comments(final=True)
+        if self._in_comment:
+            # 与正则实现一致：未闭合的注释不做去除
+            self._in_comment = False
+            self._feed_text(COMMENT_START + self._comment)
+        if self._line_buf:
+            self._handle_line(self._line_buf, has_newline=False)
+            self._line_buf = ""
+        self._finish_block(by_header=False)
+        return self._take_completed()
+
+    def _take_completed(self) -> List[FisChange]:
+        completed, self._completed = self._completed, []
+        return completed
+
+    def _consume_comments(self, final: bool):
+        while self._pending:
+            if self._in_comment:
+                idx = self._pending.find(COMMENT_END)
+                if idx < 0:
+                    keep = 0 if final else len(COMMENT_END) - 1
+                    split = max(len(self._pending) - keep, 0)
+                    self._comment += self._pending[:split]
+                    self._pending = self._pending[split:]
+                    return
+                self._comment = ""
+                self._in_comment = False
+                self._pending = self._pending[idx + len(COMMENT_END) :]
+                continue
+
+            idx = self._pending.find(COMMENT_START)
+            if idx < 0:
+                # 保留可能是注释起始标记前缀的结尾字符，等待后续数据块
+                keep = 0
+                if not final:
+                    for size in range(len(COMMENT_START) - 1, 0, -1):
+                        if self._pending.endswith(COMMENT_START[:size]):
+                            keep = size
+                            break
+                split = len(self._pending) - keep
+                self._feed_text(self._pending[:split])
+                self._pending = self._pending[split:]
+                return
+
+            self._feed_text(self._pending[:idx])
+            self._in_comment = True
+            self._pending = self._pending[idx + len(COMMENT_START) :]
+
+    def _feed_text(self, text: str):
+        if not text:
+            return
+        self._line_buf += text
+        *lines, self._line_buf = self._line_buf.split("\n")
+        for line in lines:
+            self._handle_line(line, has_newline=True)
+
+    def _handle_line(self, line: str, has_newline: bool):
+        if self._state != self._INSIDE:
+            if line.endswith(FIS_FENCE) and has_newline:
+                self._state = self._INSIDE
+                self._fenced = True
+            elif (
+                self._state == self._OUTSIDE
+                and not self._fenced
+                and line.startswith(FILE_START_PREFIX)
+            ):
+                self._state = self._INSIDE  # 没有 fis 代码块时整个回复即为 FIS 内容
+                self._start_block(line, has_newline)
+            return
+
+        if line.startswith(FILE_START_PREFIX):
+            self._finish_block(by_header=True)
+            self._start_block(line, has_newline)
+        elif self._fenced and line.startswith(FENCE):
+            if self._inner_fence and line.strip() == FENCE:
+                self._inner_fence = False
+                self._append_line(line, has_newline)
+            elif line.strip() == FENCE:
+                self._finish_block(by_header=False)
+                self._state = self._CLOSED
+            else:
+                self._inner_fence = True
+                self._append_line(line, has_newline)
+        else:
+            self._append_line(line, has_newline)
+
+    def _start_block(self, line: str, has_newline: bool):
+        self._header = line[len(FILE_START_PREFIX) :]
+        self._header_has_newline = has_newline
+        self._lines = []
+        self._inner_fence = False
+
+    def _append_line(self, line: str, has_newline: bool):
+        if self._header is not None:
+            self._lines.append(f"{line}\n" if has_newline else line)
+
+    def _finish_block(self, by_header: bool):
+        if self._header is None:
+            return
+        file_path, opt_tag = parse_fis_header(self._header)
+        content: Optional[str] = "".join(self._lines)
+        if not by_header and self._fenced:
+            # fis 代码块中的最后一个文件块，与提取代码块后整体 strip 的结果一致
+            content = content.rstrip() or None
+        if not self._header_has_newline:
+            content = None
+        self._completed.append(FisChange(file_path, opt_tag, content))
+        self._header = None
+        self._lines = []
@@ -1,10 +1,29 @@
 import argparse
+import os
 
-from src.interactive_main import main_interactive_mode
+from src.fis_pack import CODEC_AUTO, CODECS, FisPackError
+from src.fis_txn import rollback_last_transaction
+from src.log import LOG_LEVELS, set_log_level
 from src.prj_forge import (
     apply_changes_from_fis_file,
     generate_description,
+    pack_fis,
+    plan_description,
+    show_fis_file,
+    unpack_fis,
 )
+from src.setting import (
+    DEFAULT_READ_JOBS,
+    DEFAULT_TOKENIZER,
+    FIS_PACK_SUFFIX,
+    MODEL_LIST_TTL,
+    RESPONSE_CACHE_REPLAY_SPEED,
+    STDOUT_FIS_FILE,
+    WATCH_DEBOUNCE,
+    WATCH_POLL_INTERVAL,
+)
+from src.profiling import profile_call
+from src.tokens import PRIORITY_SMALLEST, TOKEN_PRIORITIES, TOKENIZERS, TokenBudget
 from src.utils import shell_init
 
 
@@ -13,17 +32,85 @@ def main():
     shell_init()
 
     parser = argparse.ArgumentParser(description="FIS (File Interaction Script) 工具")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="交互模式中不使用 LLM 回复缓存 (每次提问都请求 API)",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        help="回放缓存回复的速度倍率 (1 为原始速度，0 为立即输出，默认: 0)",
+        default=RESPONSE_CACHE_REPLAY_SPEED,
+    )
+    parser.add_argument(
+        "--refresh-models",
+        action="store_true",
+        help="交互模式中忽略缓存，重新获取服务商的模型列表",
+    )
+    parser.add_argument(
+        "--models-ttl",
+        type=float,
+        help=f"模型列表缓存的有效期 (秒，默认: {MODEL_LIST_TTL})",
+        default=MODEL_LIST_TTL,
+    )
+
+    # 子命令共用的日志与性能分析参数
+    common_parser = argparse.ArgumentParser(add_help=False)
+    common_parser.add_argument(
+        "--log-level",
+        choices=list(LOG_LEVELS),
+        help="日志级别 (debug: 列出每个读取的文件; info: 列出每个变更的文件; 默认: info)",
+        default="info",
+    )
+    common_parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="log_level",
+        action="store_const",
+        const="debug",
+        help="等同于 --log-level debug",
+    )
+    common_parser.add_argument(
+        "-q",
+        "--quiet",
+        dest="log_level",
+        action="store_const",
+        const="warning",
+        help="等同于 --log-level warning",
+    )
+    common_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="统计各阶段耗时与计数，结束时输出摘要到标准错误",
+    )
+    common_parser.add_argument(
+        "--profile-json",
+        metavar="JSON_FILE",
+        help="统计各阶段耗时与计数并写入指定的 JSON 文件",
+        default=None,
+    )
+    common_parser.add_argument(
+        "--cprofile",
+        metavar="PSTATS_FILE",
+        help="使用 cProfile 分析并保存统计数据 (可用 python -m pstats 查看)",
+        default=None,
+    )
 
     # 定义子命令
     subparsers = parser.add_subparsers(dest="command")
 
     # 生成 FIS 描述文件命令
     generate_parser = subparsers.add_parser(
-        "generate", help="从项目目录生成 FIS 描述文件"
+        "generate", help="从项目目录生成 FIS 描述文件", parents=[common_parser]
     )
     generate_parser.add_argument("project_path", help="项目根目录路径")
     generate_parser.add_argument(
-        "-o", "--output", help="输出描述文件路径", default=None
+        "-o",
+        "--output",
+        help=f"输出描述文件路径 (使用 '{STDOUT_FIS_FILE}' 输出到标准输出，"
+        f"以 {FIS_PACK_SUFFIX} 结尾时输出压缩打包格式)",
+        default=None,
     )
     generate_parser.add_argument(
         "-e",
@@ -50,36 +137,315 @@ def main():
         help="使用自定义 FIS 配置文件",
         default=None,
     )
+    generate_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help=f"并发读取文件的线程数 (默认: {DEFAULT_READ_JOBS})",
+        default=DEFAULT_READ_JOBS,
+    )
+    generate_parser.add_argument(
+        "-P",
+        "--processes",
+        type=int,
+        help="按目录分片并使用多个进程生成 (0: 使用全部 CPU 核数; 默认: 1，不使用多进程)",
+        default=1,
+    )
+    generate_parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="使用串行方式读取文件 (用于对比并发读取的结果与耗时)",
+    )
+    generate_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="在输出文件旁维护清单缓存，再次生成时仅重新读取有变化的文件",
+    )
+    generate_parser.add_argument(
+        "--tokenizer",
+        choices=["auto", *TOKENIZERS],
+        help="token 统计使用的分词器 (默认 auto: 优先 tiktoken，不可用时快速估算)",
+        default=DEFAULT_TOKENIZER,
+    )
+    generate_parser.add_argument(
+        "--token-report",
+        action="store_true",
+        help="列出每个文件与目录的 token 数",
+    )
+    generate_parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="描述的 token 预算，超出时按优先级规则舍弃文件并列出",
+        default=None,
+    )
+    generate_parser.add_argument(
+        "--priority",
+        choices=TOKEN_PRIORITIES,
+        help="超出预算时的文件优先级 (smallest: 小文件优先; recent: 最近修改优先)",
+        default=PRIORITY_SMALLEST,
+    )
+    generate_parser.add_argument(
+        "--priority-path",
+        action="append",
+        help="优先纳入的路径 (目录前缀或通配符，可多次指定，按顺序优先)",
+        default=[],
+    )
+    generate_parser.add_argument(
+        "--max-file-size",
+        type=int,
+        metavar="BYTES",
+        help="文件大小上限，超出的文件只保留开头与结尾若干行 (FIS 配置中的 size_limits 规则优先)",
+        default=None,
+    )
+    generate_parser.add_argument(
+        "--binary-metadata",
+        action="store_true",
+        help="为非文本文件附带文件大小与 SHA-256",
+    )
+    generate_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="内容重复的文件只输出一次，其余输出为 [SAME_AS 路径] 引用",
+    )
+    generate_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="仅根据文件大小预估 token 数，不读取文件内容也不写出描述",
+    )
 
     # 从 FIS 描述文件创建项目命令
-    create_parser = subparsers.add_parser("create", help="从 FIS 描述文件创建项目")
+    create_parser = subparsers.add_parser(
+        "create", help="从 FIS 描述文件创建项目", parents=[common_parser]
+    )
     create_parser.add_argument("description_file", help="FIS 描述文件路径")
     create_parser.add_argument("-o", "--output", help="输出项目路径", default=None)
 
     # 应用 FIS 描述文件中的变更命令
-    apply_parser = subparsers.add_parser("apply", help="从 FIS 描述文件应用项目变更")
+    apply_parser = subparsers.add_parser(
+        "apply", help="从 FIS 描述文件应用项目变更", parents=[common_parser]
+    )
     apply_parser.add_argument("project_path", help="项目根目录路径")
-    apply_parser.add_argument("changes_file", help="FIS 变更文件路径")
+    apply_parser.add_argument(
+        "changes_file", nargs="?", help="FIS 变更文件路径", default=None
+    )
+    apply_parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="撤销最近一次应用到项目中的变更",
+    )
+
+    # 输出 FIS 描述文件中单个文件的内容
+    show_parser = subparsers.add_parser(
+        "show", help="输出 FIS 描述文件中单个文件的内容", parents=[common_parser]
+    )
+    show_parser.add_argument("fis_file", help="FIS 描述文件路径")
+    show_parser.add_argument(
+        "file_path", nargs="?", help="文件相对路径 (不指定时列出所有文件)", default=None
+    )
+
+    # 持续监听项目文件变化并更新 FIS 描述文件
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="持续监听项目文件变化，增量更新 FIS 描述文件",
+        parents=[common_parser],
+    )
+    watch_parser.add_argument("project_path", help="项目根目录路径")
+    watch_parser.add_argument("-o", "--output", help="输出描述文件路径", required=True)
+    watch_parser.add_argument(
+        "-e",
+        "--explanation",
+        choices=["zh", "en"],
+        help="添加 FIS 结构说明提示词 (zh: 中文; en: 英文)",
+        default=None,
+    )
+    watch_parser.add_argument(
+        "-g",
+        "--gitignore",
+        action="store_true",
+        help="使用 .gitignore 文件过滤项目文件",
+    )
+    watch_parser.add_argument(
+        "-if",
+        "--ignore-fis",
+        action="store_true",
+        help="忽略 .fis 文件",
+    )
+    watch_parser.add_argument(
+        "-c",
+        "--custom-fis-config",
+        help="使用自定义 FIS 配置文件",
+        default=None,
+    )
+    watch_parser.add_argument(
+        "--max-file-size",
+        type=int,
+        metavar="BYTES",
+        help="文件大小上限，超出的文件只保留开头与结尾若干行 (FIS 配置中的 size_limits 规则优先)",
+        default=None,
+    )
+    watch_parser.add_argument(
+        "--binary-metadata",
+        action="store_true",
+        help="为非文本文件附带文件大小与 SHA-256",
+    )
+    watch_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="内容重复的文件只输出一次，其余输出为 [SAME_AS 路径] 引用",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        help=f"合并连续文件变化的等待时间 (秒，默认: {WATCH_DEBOUNCE})",
+        default=WATCH_DEBOUNCE,
+    )
+    watch_parser.add_argument(
+        "--poll",
+        type=float,
+        nargs="?",
+        const=WATCH_POLL_INTERVAL,
+        metavar="SECONDS",
+        help=f"不使用 inotify，改为轮询检测文件变化 (默认间隔: {WATCH_POLL_INTERVAL} 秒)",
+        default=None,
+    )
+
+    # 打包与解包 .fisz 压缩描述文件
+    pack_parser = subparsers.add_parser(
+        "pack", help="将 FIS 描述文件打包为 .fisz 压缩格式", parents=[common_parser]
+    )
+    pack_parser.add_argument("fis_file", help="FIS 描述文件路径")
+    pack_parser.add_argument(
+        "-o", "--output", help="输出路径 (默认为同名 .fisz 文件)", default=None
+    )
+    pack_parser.add_argument(
+        "--codec",
+        choices=CODECS,
+        default=CODEC_AUTO,
+        help="压缩方式 (auto: 可用时使用 zstd，否则使用 zlib)",
+    )
+    unpack_parser = subparsers.add_parser(
+        "unpack", help="将 .fisz 还原为 FIS 描述文件", parents=[common_parser]
+    )
+    unpack_parser.add_argument("pack_file", help=".fisz 文件路径")
+    unpack_parser.add_argument(
+        "-o",
+        "--output",
+        help=f"输出路径 (默认为同名 .fis 文件，使用 '{STDOUT_FIS_FILE}' 输出到标准输出)",
+        default=None,
+    )
 
     args = parser.parse_args()
 
-    # 根据子命令执行对应功能
-    if args.command == "generate":
-        generate_description(
-            args.project_path,
-            args.output,
-            args.explanation,
-            args.gitignore,
-            args.ignore_fis,
-            args.custom_fis_config,
-        )
-    elif args.command == "create":
-        apply_changes_from_fis_file(args.output, args.description_file)
-    elif args.command == "apply":
-        apply_changes_from_fis_file(args.project_path, args.changes_file)
-    else:
+    if args.command is None:
         # 如果没有指定子命令，则进入交互式模式
+        # (交互模块依赖 inquirer 等较重的库，仅在此时导入以加快非交互子命令的启动)
+        from src.chat_models.model_list import ModelListCache
+        from src.interactive_main import main_interactive_mode
+        from src.itv_flow import Status
+
+        Status.use_response_cache = not args.no_cache
+        Status.replay_speed = args.replay_speed
+        ModelListCache.force_refresh = args.refresh_models
+        ModelListCache.ttl = args.models_ttl
         main_interactive_mode()
+        return
+
+    set_log_level(LOG_LEVELS[args.log_level])
+
+    def run_command():
+        """根据子命令执行对应功能"""
+        if args.command == "generate":
+            budget = (
+                TokenBudget(args.max_tokens, args.priority, args.priority_path)
+                if args.max_tokens is not None
+                else None
+            )
+            if args.dry_run:
+                plan_description(
+                    args.project_path,
+                    args.explanation,
+                    args.gitignore,
+                    args.ignore_fis,
+                    args.custom_fis_config,
+                    tokenizer=args.tokenizer,
+                    budget=budget,
+                    exclude_files=[args.output] if args.output else (),
+                    max_file_size=args.max_file_size,
+                ).log_report(detailed=args.token_report)
+                return
+            processes = args.processes or os.cpu_count() or 1
+            if processes > 1 and (args.cache or args.dedup or budget):
+                generate_parser.error(
+                    "--processes 不支持与 --cache、--dedup、--max-tokens 同时使用"
+                )
+            generate_description(
+                args.project_path,
+                args.output,
+                args.explanation,
+                args.gitignore,
+                args.ignore_fis,
+                args.custom_fis_config,
+                jobs=1 if args.serial else args.jobs,
+                use_cache=args.cache,
+                tokenizer=args.tokenizer,
+                budget=budget,
+                token_report=args.token_report,
+                max_file_size=args.max_file_size,
+                binary_metadata=args.binary_metadata,
+                dedup=args.dedup,
+                processes=processes,
+            )
+        elif args.command == "create":
+            apply_changes_from_fis_file(args.output, args.description_file)
+        elif args.command == "apply":
+            if args.rollback:
+                if not rollback_last_transaction(args.project_path):
+                    print("没有可撤销的变更。")
+            elif args.changes_file:
+                apply_changes_from_fis_file(args.project_path, args.changes_file)
+            else:
+                apply_parser.error("需要指定 FIS 变更文件路径或使用 --rollback")
+        elif args.command == "show":
+            if not show_fis_file(args.fis_file, args.file_path):
+                show_parser.error(f"FIS 描述文件中没有该文件: {args.file_path}")
+        elif args.command == "watch":
+            from src.fis_watch import FisWatcher
+
+            if args.output.endswith(FIS_PACK_SUFFIX):
+                watch_parser.error(
+                    f"watch 仅支持纯文本描述文件，可使用 pack 命令另行打包为 {FIS_PACK_SUFFIX}"
+                )
+            FisWatcher(
+                args.project_path,
+                args.output,
+                args.explanation,
+                args.gitignore,
+                args.ignore_fis,
+                args.custom_fis_config,
+                max_file_size=args.max_file_size,
+                binary_metadata=args.binary_metadata,
+                dedup=args.dedup,
+                debounce=args.debounce,
+                poll_interval=args.poll,
+            ).run_forever()
+        elif args.command == "pack":
+            try:
+                pack_fis(args.fis_file, args.output, args.codec)
+            except FisPackError as e:
+                pack_parser.error(str(e))
+        elif args.command == "unpack":
+            try:
+                unpack_fis(args.pack_file, args.output)
+            except FisPackError as e:
+                unpack_parser.error(str(e))
+
+    profile_call(
+        run_command,
+        args.profile,
+        args.profile_json,
+        args.cprofile,
+        command=args.command,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,361 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from src.log import logger
+from src.setting import FIS_TXN_CACHE_DIR
+from src.utils import get_cache_dir, read_text_file, remove_if_exists
+
+JOURNAL_FILE = "journal.json"
+BACKUP_DIR = "backup"
+STAGING_FILE = "staging.txt"  # 暂存的临时文件列表，用于清理中断后残留的临时文件
+
+
+def get_txn_dir(project_path: str) -> str:
+    """项目的事务目录 (回滚日志与备份文件)，位于用户缓存目录下，不会出现在项目中"""
+    key = hashlib.sha256(os.path.abspath(project_path).encode("utf-8")).hexdigest()
+    return get_cache_dir(FIS_TXN_CACHE_DIR, key[:16])
+
+
+def _fsync_dir(directory: str):
+    """同步目录项 (Windows 不支持对目录 fsync，直接跳过)"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path: str):
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _sync_files(paths: List[str]):
+    """将文件内容及其所在目录的目录项同步到磁盘"""
+    for path in paths:
+        _fsync_file(path)
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        _fsync_dir(directory)
+
+
+def _move(src: str, dst: str):
+    """原子移动文件，跨文件系统时退回复制
+
+    复制时先写入目标目录下的临时文件并同步到磁盘，再原子替换目标，最后删除源文件，
+    中途中断时目标路径上不会出现不完整的文件。
+    """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        part = f"{dst}.fis-part"
+        shutil.copy2(src, part, follow_symlinks=False)
+        if not os.path.islink(part):
+            _fsync_file(part)
+        os.replace(part, dst)
+        os.remove(src)
+
+
+class _StagedOp:
+    __slots__ = ("kind", "file_path", "target", "tmp", "label")
+
+    def __init__(
+        self, kind: str, file_path: str, target: str, tmp: Optional[str], label: str
+    ):
+        self.kind = kind  # "write" 或 "delete"
+        self.file_path = file_path
+        self.target = target
+        self.tmp = tmp
+        self.label = label
+
+
+class FisTransaction:
+    """事务式应用 FIS 变更
+
+    变更先写入目标目录下的临时文件 (与目标位于同一文件系统)，提交时统一 fsync，
+    并将被覆盖或删除的原文件移动到事务目录 (用户缓存目录下，见 get_txn_dir) 的
+    backup 中、记录回滚日志，最后通过 `os.replace` 原子替换目标文件。
+    提交中途失败会自动回滚已执行的操作，提交成功后可通过 `rollback_last_transaction`
+    恢复到事务开始前的状态。进程在提交中途退出时，下一次事务开始前会先回滚该事务，
+    并清理残留的临时文件。
+
+    commit 可以多次调用 (例如边生成边应用)，同一事务的所有提交共用一份回滚日志。
+    """
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self.txn_dir = get_txn_dir(project_path)
+        self.backup_dir = os.path.join(self.txn_dir, BACKUP_DIR)
+        self.journal_file = os.path.join(self.txn_dir, JOURNAL_FILE)
+        self.staging_file = os.path.join(self.txn_dir, STAGING_FILE)
+        _recover(project_path, self.txn_dir)
+
+        self._staged: List[_StagedOp] = []
+        # 暂存变更的文件 -> 临时文件路径 (删除时为 None)，不在内存中保留文件内容
+        self._staged_files: Dict[str, Optional[str]] = {}
+        self._journal: Optional[Dict] = None
+        self._created_dirs: List[str] = []
+
+    def __enter__(self) -> "FisTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def _mkdirs(self, directory: str):
+        """创建目录并记录新建的目录，以便回滚时清理"""
+        missing = []
+        current = os.path.abspath(directory)
+        while not os.path.isdir(current):
+            missing.append(current)
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        for path in reversed(missing):
+            os.mkdir(path)
+            self._created_dirs.append(path)
+
+    def stage_write(self, file_path: str, content: str, label: str = "写入文件"):
+        """暂存文件写入 (新建或覆盖)"""
+
+        target = os.path.join(self.project_path, file_path)
+        directory = os.path.dirname(os.path.abspath(target))
+        self._mkdirs(directory)
+        tmp = os.path.join(
+            directory, f".{os.path.basename(target)}.fis-tmp-{uuid.uuid4().hex[:8]}"
+        )
+        # 创建临时文件前先记录，进程中途退出时下一次事务可据此清理
+        with open(self.staging_file, "a", encoding="utf-8") as f:
+            f.write(os.path.relpath(tmp, self.project_path) + "\n")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(content)
+        self._staged.append(_StagedOp("write", file_path, target, tmp, label))
+        self._staged_files[file_path] = tmp
+
+    def stage_delete(self, file_path: str, label: str = "删除文件"):
+        """暂存文件删除"""
+
+        target = os.path.join(self.project_path, file_path)
+        self._staged.append(_StagedOp("delete", file_path, target, None, label))
+        self._staged_files[file_path] = None
+
+    def read_text(self, file_path: str) -> Optional[str]:
+        """读取文件在本事务中的当前内容 (包含尚未提交的暂存变更)
+
+        文件不存在、已暂存删除或不是文本文件时返回 None。
+        """
+        if file_path in self._staged_files:
+            tmp = self._staged_files[file_path]
+            return None if tmp is None else read_text_file(tmp)
+        target = os.path.join(self.project_path, file_path)
+        if not os.path.isfile(target):
+            return None
+        return read_text_file(target)
+
+    def discard(self):
+        """放弃所有尚未提交的暂存变更"""
+
+        for op in self._staged:
+            if op.tmp and os.path.exists(op.tmp):
+                os.remove(op.tmp)
+        self._staged = []
+        self._staged_files = {}
+        remove_if_exists(self.staging_file)
+        if self._journal is None:
+            # 尚未提交过任何变更，暂存时新建的空目录一并清理
+            for directory in reversed(self._created_dirs):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+            self._created_dirs = []
+
+    def _begin_journal(self):
+        # 新事务覆盖上一次事务的回滚日志 (暂存文件列表属于本事务，保留)
+        remove_if_exists(self.journal_file)
+        if os.path.isdir(self.backup_dir):
+            shutil.rmtree(self.backup_dir)
+        os.makedirs(self.backup_dir)
+        self._journal = {
+            "project": os.path.abspath(self.project_path),
+            "state": "committing",
+            "ops": [],
+            "created_dirs": [],
+        }
+
+    def _write_journal(self):
+        assert self._journal is not None
+        self._journal["created_dirs"] = [
+            os.path.relpath(path, self.project_path) for path in self._created_dirs
+        ]
+        tmp = f"{self.journal_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._journal, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_file)
+        _fsync_dir(self.txn_dir)
+
+    def commit(self):
+        """提交所有暂存变更"""
+
+        staged, self._staged = self._staged, []
+        self._staged_files = {}
+        if not staged:
+            return
+        try:
+            self._commit(staged)
+        finally:
+            remove_if_exists(self.staging_file)
+
+    def _commit(self, staged: List[_StagedOp]):
+        # 批量同步临时文件内容，确保替换后的文件内容已落盘
+        _sync_files([op.tmp for op in staged if op.tmp])
+
+        if self._journal is None:
+            self._begin_journal()
+        assert self._journal is not None
+
+        pairs = []
+        base = len(self._journal["ops"])
+        # 按暂存顺序推算每个操作执行时目标文件是否存在 (同一路径可能先删除再新建)
+        exists: Dict[str, bool] = {}
+        for op in staged:
+            existed = exists.get(op.target)
+            if existed is None:
+                existed = os.path.lexists(op.target)
+            if op.kind == "delete" and not existed:
+                logger.warning(f"文件不存在，跳过删除: {op.file_path}")
+                continue
+            exists[op.target] = op.kind == "write"
+            record = {
+                "kind": op.kind,
+                "path": op.file_path,
+                "backup": str(base + len(pairs)) if existed else None,
+                "tmp": os.path.relpath(op.tmp, self.project_path) if op.tmp else None,
+            }
+            pairs.append((op, record))
+        if not pairs:
+            return
+
+        self._journal["ops"].extend(record for _, record in pairs)
+        self._journal["state"] = "committing"
+        self._write_journal()
+
+        done: List[Dict] = []
+        touched_dirs: Set[str] = set()
+        try:
+            for op, record in pairs:
+                # 先记录再执行，执行到一半失败时同样会被撤销 (撤销操作可重复执行)
+                done.append(record)
+                if record["backup"] is not None and not os.path.lexists(op.target):
+                    record["backup"] = None  # 目标文件在暂存后被外部删除
+                if record["backup"] is not None:
+                    if op.tmp:
+                        shutil.copymode(op.target, op.tmp)
+                    _move(op.target, os.path.join(self.backup_dir, record["backup"]))
+                if op.tmp:
+                    os.replace(op.tmp, op.target)
+                touched_dirs.add(os.path.dirname(os.path.abspath(op.target)))
+                logger.info(f"{op.label} {op.file_path}")
+        except BaseException:
+            self._undo(done)
+            for op, _ in pairs:
+                if op.tmp and os.path.exists(op.tmp):
+                    os.remove(op.tmp)
+            for directory in reversed(self._created_dirs):
+                try:
+                    os.rmdir(directory)  # 仅清理空目录
+                except OSError:
+                    pass
+            # 本次提交已全部撤销，之前提交的变更仍然有效
+            del self._journal["ops"][base:]
+            self._journal["state"] = "committed"
+            self._write_journal()
+            raise
+
+        for directory in touched_dirs:
+            _fsync_dir(directory)
+        _fsync_dir(self.backup_dir)
+        self._journal["state"] = "committed"
+        self._write_journal()
+
+    def _undo(self, records: List[Dict]):
+        for record in reversed(records):
+            _restore_record(self.project_path, self.backup_dir, record)
+
+
+def _restore_record(project_path: str, backup_dir: str, record: Dict):
+    """撤销单条日志记录对应的操作 (可重复执行)"""
+
+    target = os.path.join(project_path, record["path"])
+    if record.get("tmp"):
+        tmp = os.path.join(project_path, record["tmp"])
+        if os.path.exists(tmp):
+            # 临时文件尚未替换目标文件，目标路径上的文件不是本操作写入的，不能删除
+            os.remove(tmp)
+            if record["backup"] is None:
+                return
+
+    if record["backup"] is not None:
+        backup = os.path.join(backup_dir, record["backup"])
+        if os.path.lexists(backup):
+            _move(backup, target)
+    elif record["kind"] == "write" and os.path.lexists(target):
+        os.remove(target)  # 事务中新建的文件
+
+
+def _recover(project_path: str, txn_dir: str):
+    """回滚提交中途中断的事务，并清理暂存后未提交的临时文件"""
+
+    journal_file = os.path.join(txn_dir, JOURNAL_FILE)
+    if os.path.exists(journal_file):
+        journal = json.loads(Path(journal_file).read_text(encoding="utf-8"))
+        if journal.get("state") != "committed":
+            logger.warning("检测到上一次应用变更时中途中断，正在回滚该次变更...")
+            rollback_last_transaction(project_path)
+
+    staging_file = os.path.join(txn_dir, STAGING_FILE)
+    if os.path.exists(staging_file):
+        for line in Path(staging_file).read_text(encoding="utf-8").splitlines():
+            if line:
+                remove_if_exists(os.path.join(project_path, line))
+        os.remove(staging_file)
+
+
+def rollback_last_transaction(project_path: str) -> bool:
+    """回滚最近一次 (或中途中断的) 事务，返回是否存在可回滚的事务"""
+
+    txn_dir = get_txn_dir(project_path)
+    journal_file = os.path.join(txn_dir, JOURNAL_FILE)
+    if not os.path.exists(journal_file):
+        return False
+
+    journal = json.loads(Path(journal_file).read_text(encoding="utf-8"))
+    backup_dir = os.path.join(txn_dir, BACKUP_DIR)
+    for record in reversed(journal["ops"]):
+        _restore_record(project_path, backup_dir, record)
+        logger.info(f"恢复文件 {record['path']}")
+
+    for directory in reversed(journal.get("created_dirs", [])):
+        try:
+            os.rmdir(os.path.join(project_path, directory))
+        except OSError:
+            pass  # 目录非空 (包含事务外的文件) 时保留
+
+    os.remove(journal_file)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    return True
@@ -0,0 +1,544 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.fis_cache import FileBlock, ManifestCache
+from src.fis_config import FisConfig
+from src.fis_dedup import Deduplicator
+from src.fis_scan import (
+    instruction_text,
+    iter_file_blocks,
+    load_fis_config,
+    read_file_block,
+    walk_project_files,
+)
+from src.gitignore import GIT_EXCLUDE_FILE, GITIGNORE_FILE
+from src.log import logger
+from src.profiling import PROFILER
+from src.setting import (
+    DEFAULT_FIS_CONFIG_FILE,
+    DEFAULT_READ_JOBS,
+    FIS_MANIFEST_SUFFIX,
+    WATCH_DEBOUNCE,
+    WATCH_MAX_DELAY,
+    WATCH_POLL_INTERVAL,
+    WRITE_BUFFER_SIZE,
+)
+from src.size_policy import SizePolicy
+from src.utils import remove_if_exists
+
+# 监听事件类型
+EVENT_MODIFIED = "modified"
+EVENT_CREATED = "created"
+EVENT_DELETED = "deleted"
+EVENT_RESCAN = "rescan"  # 目录增删、改名或事件队列溢出，需要重新遍历项目
+EVENT_POLL = "poll"  # 轮询：重新遍历项目并比较每个文件的修改时间与大小
+
+# (文件相对路径, 事件类型)
+WatchEvent = Tuple[str, str]
+
+# 修改后会影响忽略规则的文件
+_IGNORE_SOURCES = (GITIGNORE_FILE, DEFAULT_FIS_CONFIG_FILE)
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyBackend:
+    """基于 inotify 的目录监听 (通过 ctypes 调用 libc，仅支持 Linux)
+
+    每个被描述的目录单独添加监听，新目录在重新遍历项目时补充监听。
+    """
+
+    name = "inotify"
+    _MASK = (
+        _IN_MODIFY
+        | _IN_CLOSE_WRITE
+        | _IN_MOVED_FROM
+        | _IN_MOVED_TO
+        | _IN_CREATE
+        | _IN_DELETE
+        | _IN_ONLYDIR
+    )
+
+    def __init__(self, project_path: str):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 仅支持 Linux")
+        self.project_path = project_path
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._dirs: Dict[int, str] = {}  # 监听描述符 -> 目录相对路径
+
+    def watch(self, relative_dirs: Iterable[str]):
+        """监听目录 (重复添加时更新目录路径，目录改名后仍能得到正确的路径)
+
+        达到系统监听数量上限时抛出 OSError。
+        """
+
+        for relative_dir in relative_dirs:
+            path = os.path.join(self.project_path, relative_dir)
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self._MASK)
+            if wd >= 0:
+                self._dirs[wd] = relative_dir
+                continue
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise OSError(error, "inotify 监听数量达到上限")
+            if error not in (errno.ENOENT, errno.ENOTDIR):  # 目录已被删除
+                logger.warning(f"无法监听目录 {path}: {os.strerror(error)}")
+
+    def wait(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        return bool(readable)
+
+    def read(self, force: bool = False) -> List[WatchEvent]:
+        """读取队列中已有的全部事件 (不阻塞)"""
+
+        events: List[WatchEvent] = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, pos)
+                pos += _INOTIFY_EVENT.size
+                name = os.fsdecode(data[pos : pos + length].rstrip(b"\0"))
+                pos += length
+                event = self._translate(wd, mask, name)
+                if event:
+                    events.append(event)
+
+    def _translate(self, wd: int, mask: int, name: str) -> Optional[WatchEvent]:
+        if mask & _IN_Q_OVERFLOW:
+            return "", EVENT_RESCAN
+        if mask & _IN_IGNORED:
+            self._dirs.pop(wd, None)  # 目录已被删除或移出项目
+            return None
+        relative_dir = self._dirs.get(wd)
+        if relative_dir is None or not name:
+            return None  # 目录自身的事件由上级目录报告
+        relative_path = f"{relative_dir}{name}"
+        if mask & _IN_ISDIR:
+            return relative_path, EVENT_RESCAN
+        if mask & (_IN_CREATE | _IN_MOVED_TO):
+            return relative_path, EVENT_CREATED
+        if mask & (_IN_DELETE | _IN_MOVED_FROM):
+            return relative_path, EVENT_DELETED
+        return relative_path, EVENT_MODIFIED
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """轮询检测：每隔 interval 秒重新遍历项目并比较文件的修改时间与大小"""
+
+    name = "polling"
+
+    def __init__(self, interval: float = WATCH_POLL_INTERVAL):
+        self.interval = interval
+        self._next_poll = time.monotonic() + interval
+
+    def watch(self, relative_dirs: Iterable[str]):
+        pass
+
+    def wait(self, timeout: float) -> bool:
+        remaining = self._next_poll - time.monotonic()
+        time.sleep(max(0.0, min(timeout, remaining)))
+        return remaining <= timeout
+
+    def read(self, force: bool = False) -> List[WatchEvent]:
+        now = time.monotonic()
+        if not force and now < self._next_poll:
+            return []
+        self._next_poll = now + self.interval
+        return [("", EVENT_POLL)]
+
+    def close(self):
+        pass
+
+
+class FisWatcher:
+    """持续监听项目文件变化并增量更新 FIS 描述文件
+
+    文件过滤规则 (FIS 配置、.gitignore、大小上限等) 与 `generate_description` 一致，
+    输出内容也与相同选项下重新生成的描述完全相同。文件块保存在输出文件旁的清单缓存中：
+    每次更新只重新读取发生变化的文件，其余文件块直接从清单复制，无需重新遍历或读取整个项目；
+    连续的文件变化在 debounce 秒内合并为一次更新 (持续变化时最长 WATCH_MAX_DELAY 秒更新一次)。
+    清单同时记录每个文件的内容哈希，交互模式中的增量提问可以直接使用。
+
+    用法:
+        watcher = FisWatcher("my_project", "my_project.fis", "", True, False, False)
+        watcher.start()  # 生成描述后在后台线程中监听
+        ...
+        watcher.sync()  # 立即处理尚未写入的变化
+        watcher.close()
+    """
+
+    def __init__(
+        self,
+        project_path: str,
+        fis_file: str,
+        use_explanation: str,
+        use_gitignore: bool,
+        ignore_fis: bool,
+        use_custom_fis_config: bool,
+        jobs: int = DEFAULT_READ_JOBS,
+        max_file_size: Optional[int] = None,
+        binary_metadata: bool = False,
+        dedup: bool = False,
+        debounce: float = WATCH_DEBOUNCE,
+        poll_interval: Optional[float] = None,
+    ):
+        """poll_interval 不为 None 时使用轮询检测 (不使用 inotify)"""
+
+        self.project_path = project_path
+        self.fis_file = fis_file
+        self.use_explanation = use_explanation
+        self.use_gitignore = use_gitignore
+        self.ignore_fis = ignore_fis
+        self.use_custom_fis_config = use_custom_fis_config
+        self.jobs = jobs
+        self.max_file_size = max_file_size
+        self.binary_metadata = binary_metadata
+        self.dedup = dedup
+        self.debounce = debounce
+        self.poll_interval = poll_interval or WATCH_POLL_INTERVAL
+        self.updates = 0
+
+        manifest_file = f"{fis_file}{FIS_MANIFEST_SUFFIX}"
+        self._tmp_file = f"{fis_file}.tmp"
+        self._exclude_files = (
+            fis_file,
+            self._tmp_file,
+            manifest_file,
+            f"{manifest_file}.tmp",
+        )
+        self._excluded = {os.path.abspath(path) for path in self._exclude_files}
+
+        self.backend = None
+        if poll_interval is None:
+            try:
+                self.backend = InotifyBackend(project_path)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"无法使用 inotify ({e})，改为轮询检测文件变化")
+        if self.backend is None:
+            self.backend = PollingBackend(self.poll_interval)
+
+        self.fis_config: Optional[FisConfig] = None
+        self.policy = SizePolicy.from_config(None, max_file_size, binary_metadata)
+        self._paths: List[str] = []  # 当前描述中的文件 (遍历顺序)
+        self._known: Set[str] = set()
+        self._written: Set[str] = set()  # 上次写出的描述中的文件
+        self._ignored: Set[str] = set()  # 已确认被忽略规则排除的文件
+        self._created: Set[str] = set()  # 等待重新遍历确认的新文件
+        self._stats: Dict[str, Tuple[int, int]] = {}  # 轮询时比较的修改时间与大小
+        self._dirty: Set[str] = set()
+        self._cache: Optional[ManifestCache] = None
+        self._rescan_needed = False
+        self._config_changed = False
+        self._first_change = 0.0
+        self._last_change = 0.0
+
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 生命周期 ----
+
+    def start(self):
+        """生成初始描述，并在后台线程中持续监听"""
+
+        self._setup()
+        self._thread = threading.Thread(
+            target=self._loop, name="fis-watch", daemon=True
+        )
+        self._thread.start()
+
+    def run_forever(self):
+        """生成初始描述，并在当前线程中持续监听，直到按下 Ctrl+C"""
+
+        self._setup()
+        print(
+            f"正在监听项目文件变化 ({self.backend.name})，"
+            f"描述文件: {self.fis_file}，按 Ctrl+C 停止。"
+        )
+        try:
+            self._loop()
+        except KeyboardInterrupt:
+            print("\n已停止监听。")
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._lock:
+            self.backend.close()
+            if self._cache:
+                self._cache.close()
+
+    def sync(self):
+        """立即处理已发生但尚未写入的文件变化 (不等待防抖)"""
+
+        with self._lock:
+            self._process(self.backend.read(force=True))
+            if self._pending():
+                self._flush()
+
+    # ---- 事件处理 ----
+
+    def _setup(self):
+        sta_time = time.time()
+        with self._lock:
+            self.fis_config = load_fis_config(
+                self.project_path, self.use_custom_fis_config
+            )
+            self.policy = SizePolicy.from_config(
+                self.fis_config and self.fis_config.config,
+                self.max_file_size,
+                self.binary_metadata,
+            )
+            self._cache = ManifestCache(self.fis_file, self.policy.key)
+            self._rescan(stat_all=isinstance(self.backend, PollingBackend))
+            self._write(validate=True)
+        print(
+            f"项目描述已保存至: {self.fis_file} "
+            f"({len(self._paths)} 个文件, 耗时: {time.time() - sta_time:.2f}s)"
+        )
+
+    def _loop(self):
+        while not self._stop.is_set():
+            timeout = self.poll_interval
+            if self._pending():
+                timeout = min(timeout, self._due_at() - time.monotonic())
+            self.backend.wait(max(0.0, timeout))
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self._process(self.backend.read())
+                if self._pending() and time.monotonic() >= self._due_at():
+                    self._flush()
+
+    def _pending(self) -> bool:
+        return bool(self._dirty or self._rescan_needed)
+
+    def _due_at(self) -> float:
+        return min(
+            self._last_change + self.debounce, self._first_change + WATCH_MAX_DELAY
+        )
+
+    def _changed(self):
+        now = time.monotonic()
+        if not self._pending():
+            self._first_change = now
+        self._last_change = now
+
+    def _process(self, events: List[WatchEvent]):
+        for relative_path, kind in events:
+            if kind == EVENT_POLL:
+                with PROFILER.timer("watch.poll"):
+                    self._rescan(stat_all=True)
+                continue
+            if kind == EVENT_RESCAN:
+                self._changed()
+                self._rescan_needed = True
+                continue
+
+            if (
+                os.path.abspath(os.path.join(self.project_path, relative_path))
+                in self._excluded
+            ):
+                continue  # 本工具写出的描述文件与清单
+            if relative_path.rsplit("/", 1)[
+                -1
+            ] in _IGNORE_SOURCES or relative_path == GIT_EXCLUDE_FILE.replace(
+                os.sep, "/"
+            ):
+                self._changed()
+                self._config_changed = self._rescan_needed = True
+
+            if relative_path in self._known:
+                self._changed()
+                self._dirty.add(relative_path)
+            elif kind == EVENT_CREATED and relative_path not in self._ignored:
+                # 新文件是否需要描述取决于忽略规则，在下次更新时重新遍历确认
+                self._changed()
+                self._created.add(relative_path)
+                self._rescan_needed = True
+
+    def _reload_config(self):
+        """忽略规则文件变化后重新加载 FIS 配置，影响文件块渲染的选项变化时重新读取全部文件"""
+
+        config_file = os.path.join(self.project_path, DEFAULT_FIS_CONFIG_FILE)
+        self.fis_config = (
+            FisConfig(config_file)
+            if self.use_custom_fis_config and os.path.exists(config_file)
+            else None
+        )
+        policy = SizePolicy.from_config(
+            self.fis_config and self.fis_config.config,
+            self.max_file_size,
+            self.binary_metadata,
+        )
+        if policy.key != self.policy.key:
+            self._dirty.update(self._paths)
+            self._cache.set_options_key(policy.key)
+        self.policy = policy
+        self._ignored.clear()
+
+    def _rescan(self, stat_all: bool = False):
+        """重新遍历项目，更新文件列表与目录监听；stat_all 为 True 时比较每个文件的修改时间与大小"""
+
+        dirs: List[str] = []
+        paths = walk_project_files(
+            self.project_path,
+            self.fis_config,
+            self.ignore_fis,
+            self.use_gitignore,
+            self._exclude_files,
+            dirs,
+        )
+        try:
+            self.backend.watch(dirs)
+        except OSError as e:
+            logger.warning(f"{e}，改为轮询检测文件变化")
+            self.backend.close()
+            self.backend = PollingBackend(self.poll_interval)
+            stat_all = True
+
+        known = set(paths)
+        changed = (known ^ self._known) - self._dirty
+        if stat_all:
+            stats = {}
+            for relative_path in paths:
+                try:
+                    st = os.stat(os.path.join(self.project_path, relative_path))
+                except OSError:
+                    continue
+                stats[relative_path] = (st.st_mtime_ns, st.st_size)
+                if self._stats.get(relative_path, stats[relative_path]) != (
+                    stats[relative_path]
+                ):
+                    changed.add(relative_path)
+            self._stats = stats
+        if changed:
+            self._changed()
+            self._dirty.update(changed)
+
+        for relative_path in self._created - known:
+            if os.path.isfile(os.path.join(self.project_path, relative_path)):
+                self._ignored.add(relative_path)
+        self._created.clear()
+        self._paths, self._known = paths, known
+        self._rescan_needed = False
+
+    # ---- 写出描述 ----
+
+    def _flush(self):
+        sta_time = time.time()
+        with PROFILER.phase("watch.update"):
+            if self._config_changed:
+                self._config_changed = False
+                self._reload_config()
+            if self._rescan_needed:
+                self._rescan()
+            previous = self._written
+            updated = self._write(validate=False)
+        self.updates += 1
+
+        for relative_path in previous - self._written:
+            logger.info(f"移除文件块: {relative_path}")
+        if updated or previous != self._written:
+            print(
+                f"描述文件已更新: {self.fis_file} "
+                f"({updated} 个文件块已更新, 耗时: {time.time() - sta_time:.2f}s)"
+            )
+
+    def _render(self, cache: ManifestCache, validate: bool) -> Iterator[FileBlock]:
+        """按遍历顺序产出文件块：validate 为 True 时按文件状态校验缓存 (初次生成)，
+        否则只重新读取发生变化的文件，其余文件块直接从上次写出的清单复制
+        """
+
+        if validate:
+            yield from iter_file_blocks(
+                self.project_path, self._paths, self.jobs, cache, self.policy
+            )
+            return
+
+        for relative_path in self._paths:
+            if relative_path not in self._dirty:
+                block = cache.copy(relative_path)
+                if block is not None:
+                    yield block
+                    continue
+            try:
+                block = read_file_block(
+                    self.project_path, relative_path, None, self.policy
+                )
+            except FileNotFoundError:
+                continue  # 文件已被删除
+            if relative_path in self._written:
+                logger.info(f"更新文件块: {relative_path}")
+            else:
+                logger.info(f"新增文件块: {relative_path}")
+            yield block
+
+    def _write(self, validate: bool) -> int:
+        """写出描述文件与清单，返回重新读取的文件数"""
+
+        deduplicator = Deduplicator() if self.dedup else None
+        written: List[str] = []
+        updated = 0
+        try:
+            with self._cache as cache, open(
+                self._tmp_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE
+            ) as f:
+                f.write(instruction_text(self.use_explanation))
+                for block in self._render(cache, validate):
+                    written.append(block.relative_path)
+                    if not block.cached:
+                        updated += 1
+                    if block.text and (validate or not block.cached):
+                        cache.record(block)  # 复制的文件块已写入新清单
+                    if deduplicator:
+                        block = deduplicator.dedupe(block)
+                    f.write(block.text)
+                if self.use_explanation:
+                    f.write("```")
+        except BaseException:
+            remove_if_exists(self._tmp_file)
+            raise
+        os.replace(self._tmp_file, self.fis_file)
+
+        self._written = set(written)
+        if len(written) != len(self._paths):
+            self._paths = written
+            self._known = set(written)
+        self._dirty.clear()
+        return updated
@@ -0,0 +1,221 @@
+import os
+import re
+from typing import List, Optional, Pattern
+
+GITIGNORE_FILE = ".gitignore"
+GIT_DIR = ".git"
+GIT_EXCLUDE_FILE = os.path.join(GIT_DIR, "info", "exclude")
+
+
+class GitIgnoreRule:
+    """单条 .gitignore 规则"""
+
+    __slots__ = ("pattern", "regex", "negate", "dir_only")
+
+    def __init__(self, pattern: str, regex: str, negate: bool, dir_only: bool):
+        self.pattern = pattern
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+    def __repr__(self):
+        return f"GitIgnoreRule({self.pattern!r})"
+
+
+def _translate_glob(glob: str) -> str:
+    """将 gitignore 通配符转换为正则表达式 (不含锚定部分)"""
+
+    res = ""
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            if glob[i : i + 2] == "**":
+                at_start = i == 0 or glob[i - 1] == "/"
+                at_end = i + 2 == n or glob[i + 2] == "/"
+                if at_start and at_end:
+                    if i + 2 == n:
+                        res += ".*"  # `abc/**` 匹配目录下的所有内容
+                        i += 2
+                    else:
+                        res += "(?:.*/)?"  # `**/` 匹配零或多级目录
+                        i += 3
+                    continue
+            res += "[^/]*"
+            i += 1
+            while i < n and glob[i] == "*":
+                i += 1
+            continue
+        if c == "?":
+            res += "[^/]"
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            res += re.escape(glob[i])
+        elif c == "[":
+            j = i + 1
+            if j < n and glob[j] in "!^":
+                j += 1
+            if j < n and glob[j] == "]":
+                j += 1
+            while j < n and glob[j] != "]":
+                j += 1
+            if j >= n:
+                res += re.escape(c)  # 未闭合的 `[` 按字面量处理
+            else:
+                body = glob[i + 1 : j].replace("\\", "\\\\")
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                res += f"[{body}]"
+                i = j
+        else:
+            res += re.escape(c)
+        i += 1
+    return res
+
+
+def parse_gitignore_line(line: str) -> Optional[GitIgnoreRule]:
+    """解析 .gitignore 中的一行，空行与注释返回 None"""
+
+    pattern = line.rstrip("\r\n")
+    # 去除未转义的结尾空格
+    while pattern.endswith(" ") and not pattern.endswith("\\ "):
+        pattern = pattern[:-1]
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith("\\#") or pattern.startswith("\\!"):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    glob = pattern.rstrip("/")
+    if not glob:
+        return None
+
+    # 开头或中间包含 `/` 的规则相对 .gitignore 所在目录锚定，否则匹配任意层级
+    anchored = "/" in glob
+    glob = glob.lstrip("/")
+    regex = _translate_glob(glob)
+    if not anchored and not regex.startswith("(?:.*/)?"):
+        regex = "(?:.*/)?" + regex
+
+    return GitIgnoreRule(line.strip(), regex, negate, dir_only)
+
+
+def _combine(rules: List[GitIgnoreRule]) -> Optional[Pattern]:
+    if not rules:
+        return None
+    return re.compile("|".join(f"(?:{rule.regex})" for rule in rules))
+
+
+class GitIgnoreSpec:
+    """单个 .gitignore 文件中的规则集
+
+    规则相对于 .gitignore 所在目录匹配，prefix 为该目录到项目根目录需补全的
+    前缀 (祖先目录中的 .gitignore)，strip 为需从项目相对路径中去除的前缀长度
+    (子目录中的 .gitignore)。
+    """
+
+    def __init__(self, rules: List[GitIgnoreRule], prefix: str = "", strip: int = 0):
+        self.rules = rules
+        self.prefix = prefix
+        self.strip = strip
+        self._compiled = [re.compile(rule.regex) for rule in rules]
+        # 合并后的规则用于快速排除未命中任何规则的路径
+        self._any_file = _combine([rule for rule in rules if not rule.dir_only])
+        self._any_dir = _combine(rules)
+
+    @classmethod
+    def from_file(cls, path: str, prefix: str = "", strip: int = 0):
+        rules = []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                rule = parse_gitignore_line(line)
+                if rule:
+                    rules.append(rule)
+        return cls(rules, prefix, strip)
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """返回 True (忽略)、False (被 `!` 规则重新包含) 或 None (无规则命中)"""
+
+        path = self.prefix + relative_path[self.strip :]
+        quick = self._any_dir if is_dir else self._any_file
+        if quick is None or not quick.fullmatch(path):
+            return None
+        for rule, regex in zip(reversed(self.rules), reversed(self._compiled)):
+            if rule.dir_only and not is_dir:
+                continue
+            if regex.fullmatch(path):
+                return not rule.negate
+        return None
+
+
+class GitIgnoreMatcher:
+    """分层 .gitignore 匹配器
+
+    每个 .gitignore 只解析一次：遍历进入目录时压入该目录的规则集，离开时弹出，
+    更深层目录的规则优先于上层目录。初始化时会加载从仓库根目录到项目根目录
+    之间的 .gitignore 以及仓库的 .git/info/exclude。
+    """
+
+    def __init__(self, project_path: str):
+        self._stack: List[GitIgnoreSpec] = []
+        self._load_ancestors(os.path.abspath(project_path))
+
+    def _load_ancestors(self, project_root: str):
+        ancestors = []
+        current = project_root
+        while True:
+            ancestors.append(current)
+            if os.path.isdir(os.path.join(current, GIT_DIR)):
+                break  # 到达仓库根目录
+            parent = os.path.dirname(current)
+            if parent == current:
+                return  # 项目不在 git 仓库中时不加载祖先目录的规则
+            current = parent
+
+        def _relative_prefix(directory: str) -> str:
+            prefix = os.path.relpath(project_root, directory).replace(os.sep, "/")
+            return "" if prefix == "." else f"{prefix}/"
+
+        # 优先级从低到高：.git/info/exclude、仓库根目录至项目上级目录的 .gitignore
+        repo_root = ancestors[-1]
+        ignore_files = [(repo_root, os.path.join(repo_root, GIT_EXCLUDE_FILE))]
+        ignore_files += [
+            (directory, os.path.join(directory, GITIGNORE_FILE))
+            for directory in reversed(ancestors[1:])
+        ]
+        for directory, ignore_file in ignore_files:
+            if os.path.isfile(ignore_file):
+                self._stack.append(
+                    GitIgnoreSpec.from_file(
+                        ignore_file, prefix=_relative_prefix(directory)
+                    )
+                )
+
+    def push(self, directory: str, relative_dir: str) -> bool:
+        """进入目录时调用，目录中存在 .gitignore 时压入其规则并返回 True
+
+        relative_dir 为以 `/` 结尾的项目相对目录路径 (项目根目录为空字符串)。
+        """
+        ignore_file = os.path.join(directory, GITIGNORE_FILE)
+        if not os.path.isfile(ignore_file):
+            return False
+        self._stack.append(
+            GitIgnoreSpec.from_file(ignore_file, strip=len(relative_dir))
+        )
+        return True
+
+    def pop(self):
+        """离开压入过规则的目录时调用"""
+        self._stack.pop()
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        """判断项目相对路径是否被忽略 (不检查上级目录，上级目录应已在遍历时剪枝)"""
+        for spec in reversed(self._stack):
+            result = spec.match(relative_path, is_dir)
+            if result is not None:
+                return result
+        return False
@@ -1,78 +1,188 @@
-from typing import Type
+import importlib
+from pathlib import Path
+from typing import Dict, Type
+
 import inquirer
 
 from src.chat_models.base import Chatbot
-from src.itv_flow import generate_fis_desc_by_status, generate_fis_desc_flow
-from src.prj_forge import apply_changes_from_fis_content
-from src.utils import read_multiline_input
+from src.chat_models.cache import CachedChatbot
+from src.chat_models.fanout import (
+    FANOUT_COLLECT,
+    FANOUT_RACE,
+    collect,
+    print_fanout_summary,
+    race,
+)
+from src.chat_models.session import QUESTION_PROMPT_TEMPLATE, ChatSession
+from src.fis_stream import FisStreamParser
+from src.fis_txn import FisTransaction, rollback_last_transaction
+from src.itv_flow import (
+    Status,
+    generate_fis_desc_by_status,
+    generate_fis_desc_flow,
+    refresh_fis_desc,
+)
+from src.multiline_input import read_multiline_input
+from src.prj_forge import FisChange, apply_changes_from_fis_content, apply_fis_change
+
+AI_PLACEHOLDER = ">>> [AI]: 正在建立连接..."
 
-QUESTION_PROMPT_TEMPLATE = """
-{prj_fis}
+# 对话模型来源 -> "模块:类名"，选择后才导入对应服务商的 SDK (google-generativeai / openai)
+CHAT_MODELS = {
+    "Gemini": "src.chat_models.gemini:GeminiChatbot",
+    "ChatGPT": "src.chat_models.chatgpt:ChatGPTChatbot",
+}
 
-请基于以上 FIS 结构来回答我的问题：
-{question}
-"""
 
-AI_PLACEHOLDER = ">>> [AI]: 正在建立连接..."
+def _load_chatbot_class(model_name: str) -> Type[Chatbot]:
+    module_name, class_name = CHAT_MODELS[model_name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 def prj_interactive_mode():
     """项目交互模式"""
     project_path: str = ""
     output_file: str = ""
-    prj_fis: str = ""
 
     def _gen_fis():
-        nonlocal prj_fis
+        nonlocal project_path, output_file
 
         while True:
-            prj_fis = generate_fis_desc_flow() or ""
-            if not prj_fis:
+            output_file = generate_fis_desc_flow() or ""
+            if not output_file:
                 print("生成 FIS 结构未成功，请重试。")
                 continue
             break
+        project_path = Status.project_path
 
-    _gen_fis()
-
-    from src.chat_models.gemini import GeminiChatbot
-    from src.chat_models.chatgpt import ChatGPTChatbot
+    def _load_prj_fis() -> str:
+        """在需要构造提问时才读取 FIS 描述文件内容"""
+        return Path(output_file).read_text(encoding="utf-8")
 
-    chat_models = {
-        "Gemini": GeminiChatbot,
-        "ChatGPT": ChatGPTChatbot,
-    }
+    _gen_fis()
 
     model_choice = inquirer.list_input(
         "请选择对话模型来源",
-        choices=list(chat_models.keys()),
+        choices=list(CHAT_MODELS.keys()),
     )
 
-    chatbot_class: Type[Chatbot] = chat_models[model_choice]
-    chatbot = chatbot_class()
+    def _create_chatbot(model_name: str) -> Chatbot:
+        chatbot = _load_chatbot_class(model_name)()
+        if Status.use_response_cache:
+            chatbot = CachedChatbot(chatbot, replay_speed=Status.replay_speed)
+        return chatbot
+
+    def _chatbot_name(chatbot: Chatbot) -> str:
+        identity = chatbot.cache_identity()
+        return f"{identity['provider']}:{identity.get('model', '')}"
+
+    chatbot = _create_chatbot(model_choice)
 
     print(
         "=================================\n"
-        "项目初始化成功，进入对话交互模式。(输入 /? 查看可用命令，按下 Ctrl+Enter 提交输入)\n"
+        "项目初始化成功，进入对话交互模式。(输入 /? 查看可用命令，Enter 换行，Alt+Enter / Ctrl+J / Ctrl+D 提交输入)\n"
     )
     last_res_content = ""
     last_question = ""
+    last_turn_committed = False
+    session = ChatSession()
     generate_flag = False
+    auto_apply = False
+    fanout_bots: Dict[str, Chatbot] = {}
+    fanout_mode = FANOUT_RACE
+
+    def _setup_fanout():
+        """选择参与扇出的模型 (包括当前模型) 与扇出模式"""
+        nonlocal fanout_bots, fanout_mode
+
+        bots = {_chatbot_name(chatbot): chatbot}
+        while True:
+            choice = inquirer.list_input(
+                f"已选择 {len(bots)} 个模型: {', '.join(bots)}，继续添加对话模型",
+                choices=[*CHAT_MODELS.keys(), "完成"],
+            )
+            if choice == "完成":
+                break
+            bot = _create_chatbot(choice)
+            name = _chatbot_name(bot)
+            while name in bots:
+                name += "'"
+            bots[name] = bot
+        if len(bots) < 2:
+            print("至少需要两个模型才能开启多模型扇出模式。")
+            return
+
+        fanout_mode = inquirer.list_input(
+            "请选择扇出模式",
+            choices=[
+                ("竞速: 最先给出完整 FIS 变更的回复胜出，其余请求立即取消", FANOUT_RACE),
+                ("对比: 等待全部模型回复完成后逐个展示", FANOUT_COLLECT),
+            ],
+        )
+        fanout_bots = bots
+        print(f"已开启多模型扇出模式 ({len(bots)} 个模型)，再次输入 /fanout 关闭。")
+
+    def _ask_fanout(prompt: str, refresh: bool) -> str:
+        """向所有扇出模型提问，返回作为最新回复的内容"""
+
+        print(f"\n>>> [AI]: 正在同时向 {len(fanout_bots)} 个模型提问...")
+        if fanout_mode == FANOUT_RACE:
+            winner, results = race(fanout_bots, prompt, refresh)
+            print_fanout_summary(results)
+            if not winner:
+                print("没有模型给出完整的 FIS 变更。")
+                return ""
+            print(f"\n>>> [AI:{winner.name}]: {winner.content}")
+            return winner.content
+
+        results = collect(fanout_bots, prompt, refresh)
+        for result in results:
+            print(f"\n>>> [AI:{result.name}]: {result.content}")
+        print()
+        print_fanout_summary(results)
+        replied = [result for result in results if result.content]
+        if not replied:
+            return ""
+        selected = inquirer.list_input(
+            "请选择作为最新回复的模型 (用于 /apply)",
+            choices=[(result.name, result) for result in replied],
+        )
+        return selected.content
+
+    def _close_chatbots():
+        chatbot.close()
+        for bot in fanout_bots.values():
+            if bot is not chatbot:
+                bot.close()
+
+    def _auto_apply_change(txn: FisTransaction, change: FisChange):
+        print("\n>>> [AutoApply]: ", end="")
+        try:
+            apply_fis_change(txn, change)
+            txn.commit()
+        except Exception as e:
+            txn.discard()
+            print(f"应用变更 '{change.file_path}' 失败，错误: {e}")
 
     while True:
+        chatbot.warmup()  # 用户输入问题期间在后台预热连接
         try:
-            question = read_multiline_input("\n>>> [Command]: ")
-        except KeyboardInterrupt:
+            question = read_multiline_input("\n>>> [Command]: ", on_line=chatbot.warmup)
+        except (KeyboardInterrupt, EOFError):
             print("\n\n!! 退出交互模式。")
+            _close_chatbots()
             return
 
         if not question:
             continue
 
         generate_flag = False
+        refresh = False
 
         if question.startswith("/"):  # 控制命令
             if question == "/quit":
                 print("\n\n!! 退出交互模式。")
+                _close_chatbots()
                 return
             elif question == "/apply":
                 print("正在应用最新 FIS 变更...")
@@ -84,12 +194,43 @@ def prj_interactive_mode():
                 if inquirer.confirm(message="是否更新 FIS 描述文件？", default=True):
                     generate_fis_desc_by_status()
                     print(f"FIS 描述文件 '{output_file}' 更新成功。")
+            elif question == "/autoapply":
+                if auto_apply:
+                    auto_apply = False
+                    print("已关闭自动应用模式。")
+                elif inquirer.confirm(
+                    message="自动应用模式会在回复生成过程中直接覆盖项目文件，请确保可以通过 git 等工具恢复项目文件，确定开启？",
+                    default=False,
+                ):
+                    auto_apply = True
+                    print("已开启自动应用模式，回复中的文件变更将在生成完整后立即应用。")
+            elif question == "/rollback":
+                if rollback_last_transaction(project_path):
+                    print("已撤销最近一次应用的变更。")
+                else:
+                    print("没有可撤销的变更。")
+            elif question == "/fanout":
+                if fanout_bots:
+                    for bot in fanout_bots.values():
+                        if bot is not chatbot:
+                            bot.close()
+                    fanout_bots = {}
+                    print("已关闭多模型扇出模式。")
+                else:
+                    _setup_fanout()
             elif question == "/restart":
                 _gen_fis()
+                session.reset()
+            elif question == "/reset":
+                session.reset()
+                print("已清空对话历史，下一轮将重新发送完整 FIS。")
             elif question == "/r":
                 if last_question:
                     question = last_question
                     generate_flag = True
+                    refresh = True
+                    if last_turn_committed:
+                        session.pop()  # 重新生成最近一轮对话
                 else:
                     print("没有可重试的对话。")
             elif question == "/?":
@@ -97,8 +238,12 @@ def prj_interactive_mode():
                     "可用命令：\n"
                     "/quit: 退出对话模式\n"
                     "/apply: 应用最新 FIS 变更\n"
+                    "/autoapply: 开启/关闭自动应用模式 (边生成边应用已完整的文件变更)\n"
+                    "/rollback: 撤销最近一次应用的变更\n"
+                    "/fanout: 开启/关闭多模型扇出模式 (同时向多个模型提问，竞速或对比)\n"
                     "/restart: 重新生成 FIS 结构\n"
-                    "/r: 重试上一次对话\n"
+                    "/reset: 清空对话历史 (下一轮重新发送完整 FIS)\n"
+                    "/r: 重试上一次对话 (不使用回复缓存)\n"
                     "Tips: 生成回复过程可随时使用 Ctrl+C 中断输出\n"
                 )
             else:
@@ -112,11 +257,35 @@ def prj_interactive_mode():
         # 进入语言模型生成
         last_res_content = ""
         last_question = question
+        last_turn_committed = False
+        refresh_fis_desc()  # 增量 FIS 基于生成清单，提问前先同步项目的实际状态
+        if fanout_bots:
+            # 扇出提问不保留对话历史，每次发送完整 FIS
+            prompt = QUESTION_PROMPT_TEMPLATE.format(
+                prj_fis=_load_prj_fis(), question=question
+            )
+            try:
+                last_res_content = _ask_fanout(prompt, refresh)
+                if auto_apply and last_res_content:
+                    apply_changes_from_fis_content(project_path, last_res_content)
+            except KeyboardInterrupt:
+                print("\n\n!! 生成已中断")
+            except Exception as e:
+                print(f"\n\n!! 生成失败，错误: {e}")
+            continue
+
+        turn = session.prepare(output_file, question)
+        session.print_turn_stats(turn)
+        messages = session.request_messages(turn)
         print(f"\n{AI_PLACEHOLDER}", end="")
         is_first_chunk = True
+        stream_parser = FisStreamParser() if auto_apply else None
+        stream_txn = FisTransaction(project_path) if auto_apply else None
         try:
-            for chunk in chatbot.ask_question(
-                QUESTION_PROMPT_TEMPLATE.format(prj_fis=prj_fis, question=question)
+            for chunk in (
+                chatbot.ask_messages(messages, refresh=refresh)
+                if isinstance(chatbot, CachedChatbot)
+                else chatbot.ask_messages(messages)
             ):
                 if is_first_chunk:
                     is_first_chunk = False
@@ -124,7 +293,17 @@ def prj_interactive_mode():
                     print("\r>>> [AI]: ", end="")
                 print(chunk, end="")
                 last_res_content += chunk
+                if stream_parser and stream_txn:
+                    for change in stream_parser.feed(chunk):
+                        _auto_apply_change(stream_txn, change)
+            if stream_parser and stream_txn:
+                for change in stream_parser.close():
+                    _auto_apply_change(stream_txn, change)
             print()
+            session.commit(turn, last_res_content)
+            last_turn_committed = True
+            if isinstance(chatbot, CachedChatbot) and chatbot.last_from_cache:
+                print("(以上回复来自缓存，使用 /r 重新生成)")
         except KeyboardInterrupt:
             print("\n\n!! 生成已中断")
         except Exception as e:
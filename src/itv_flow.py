@@ -1,13 +1,18 @@
+import contextlib
+import io
 import os
 from pathlib import Path
+from typing import Optional
 
 import inquirer
 
+from src.fis_watch import FisWatcher
 from src.options.choices import GeneratorChoices
 from src.prj_forge import (
     apply_changes_from_fis_file,
     generate_description,
 )
+from src.setting import RESPONSE_CACHE_REPLAY_SPEED
 from src.utils import format_path
 
 
@@ -20,6 +25,11 @@ class Status:
     use_gitignore: bool = False
     ignore_fis: bool = False
     use_custom_fis_config: bool = False
+    use_cache: bool = True
+    use_watch: bool = False
+    watcher: Optional[FisWatcher] = None  # 开启监听时持续更新描述文件的监听器
+    use_response_cache: bool = True
+    replay_speed: float = RESPONSE_CACHE_REPLAY_SPEED
 
 
 def generate_fis_desc_flow():
@@ -62,6 +72,8 @@ def generate_fis_desc_flow():
     Status.use_gitignore = GeneratorChoices.use_gitignore in options
     Status.ignore_fis = GeneratorChoices.ignore_fis_files in options
     Status.use_custom_fis_config = GeneratorChoices.use_custom_fis_config in options
+    Status.use_watch = GeneratorChoices.watch_project in options
+    stop_watching()
 
     print(f"正在生成 FIS 描述文件 '{Status.fis_file}'...")
 
@@ -69,6 +81,21 @@ def generate_fis_desc_flow():
 
 
 def generate_fis_desc_by_status():
+    if Status.use_watch:
+        # 开启监听时由监听器维护描述文件，只需写入尚未处理的文件变化
+        if Status.watcher is None:
+            Status.watcher = FisWatcher(
+                Status.project_path,
+                Status.fis_file,
+                Status.use_explanation,
+                Status.use_gitignore,
+                Status.ignore_fis,
+                Status.use_custom_fis_config,
+            )
+            Status.watcher.start()
+        else:
+            Status.watcher.sync()
+        return Status.fis_file
     return generate_description(
         project_path=Status.project_path,
         fis_file=Status.fis_file,
@@ -76,9 +103,28 @@ def generate_fis_desc_by_status():
         use_gitignore=Status.use_gitignore,
         ignore_fis=Status.ignore_fis,
         use_custom_fis_config=Status.use_custom_fis_config,
+        use_cache=Status.use_cache,
     )
 
 
+def refresh_fis_desc():
+    """提问前刷新描述文件与生成清单，使其反映项目的实际状态 (包括自动应用与手动修改的文件)
+
+    开启监听时写入尚未处理的文件变化，否则重新生成 (启用缓存时只重新读取有变化的文件)。
+    """
+    if Status.watcher:
+        Status.watcher.sync()
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_fis_desc_by_status()
+
+
+def stop_watching():
+    if Status.watcher:
+        Status.watcher.close()
+        Status.watcher = None
+
+
 def apply_fis_changes_flow():
     Status.project_path = inquirer.text(
         message="请输入项目根目录路径 (留空使用当前目录)", default=Status.project_path
@@ -0,0 +1,45 @@
+import logging
+import sys
+
+# 逐文件的过程信息 (读取文件、应用变更等) 通过日志级别控制是否输出：
+# DEBUG 输出每个读取的文件，INFO (默认) 输出每个变更的文件，WARNING 仅输出警告
+logger = logging.getLogger("fis_tool")
+
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """输出到当前的 sys.stdout (跟随 contextlib.redirect_stdout 重定向)"""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property  # type: ignore
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _):
+        pass
+
+    def handleError(self, record):
+        if isinstance(sys.exc_info()[1], BrokenPipeError):
+            raise  # 与 print 一致，输出管道关闭时 (如 `| head`) 结束程序
+        super().handleError(record)
+
+
+if not logger.handlers:
+    _handler = _StdoutHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def set_log_level(level: int):
+    logger.setLevel(level)
@@ -0,0 +1,286 @@
+import codecs
+import os
+import sys
+import unicodedata
+from typing import Callable, List, Optional
+
+# 启用 / 关闭括号粘贴模式 (粘贴内容由 ESC[200~ 与 ESC[201~ 包裹) 与 xterm modifyOtherKeys
+# (使 Ctrl+Enter 发送可区分的 ESC[27;5;13~ 序列)
+_TERMINAL_ENABLE = "\x1b[?2004h\x1b[>4;1m"
+_TERMINAL_DISABLE = "\x1b[>4m\x1b[?2004l"
+
+_PASTE_START = "\x1b[200~"
+_PASTE_END = "\x1b[201~"
+
+# 转义序列 (CSI 参数) -> 按键动作
+_NEWLINE = "newline"
+_SUBMIT = "submit"
+_CSI_KEYS = {
+    "27;5;13~": _SUBMIT,  # Ctrl+Enter (modifyOtherKeys)
+    "13;5u": _SUBMIT,  # Ctrl+Enter (CSI u)
+    "27;3;13~": _SUBMIT,  # Alt+Enter
+    "13;3u": _SUBMIT,
+    "27;2;13~": _NEWLINE,  # Shift+Enter
+    "13;2u": _NEWLINE,
+}
+
+# 单独的 ESC 后等待后续字节的时间 (秒)，超时则视为单独的 ESC 键
+_ESCAPE_TIMEOUT = 0.05
+_READ_SIZE = 65536
+
+
+def _char_width(char: str) -> int:
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+class MultilineEditor:
+    """多行输入的按键处理 (与终端读取方式无关)
+
+    feed 接收终端输入的文本，返回需要回显的内容。按键含义：
+    Enter / Shift+Enter 换行；Ctrl+Enter、Alt+Enter、Ctrl+J、Ctrl+D 结束输入；
+    Backspace 删除字符 (行首时合并到上一行)；Ctrl+U 清空当前行；Ctrl+C 中断输入。
+    括号粘贴的内容整体插入，其中的换行不会结束输入。
+    """
+
+    def __init__(self, prompt: str = ""):
+        self.lines: List[str] = [""]
+        self.submitted = False
+        # 提示符最后一行，合并到首行时需要重新输出
+        self._prompt_tail = prompt.rsplit("\n", 1)[-1]
+        self._pending = ""  # 尚未接收完整的转义序列
+        self._pasting = False
+        self._paste: List[str] = []
+        self.new_lines = 0  # 最近一次 feed 中新增的行数
+
+    @property
+    def pending_escape(self) -> bool:
+        return bool(self._pending) and not self._pasting
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def _insert(self, text: str) -> str:
+        """插入普通文本 (可包含换行)，返回回显内容"""
+
+        parts = text.split("\n")
+        self.lines[-1] += parts[0]
+        self.lines.extend(parts[1:])
+        self.new_lines += len(parts) - 1
+        return text
+
+    def _backspace(self) -> str:
+        if self.lines[-1]:
+            char = self.lines[-1][-1]
+            self.lines[-1] = self.lines[-1][:-1]
+            width = _char_width(char)
+            return "\b" * width + " " * width + "\b" * width
+        if len(self.lines) == 1:
+            return ""
+        self.lines.pop()
+        prefix = self._prompt_tail if len(self.lines) == 1 else ""
+        return f"\x1b[A\r\x1b[K{prefix}{self.lines[-1]}"
+
+    def _clear_line(self) -> str:
+        prefix = self._prompt_tail if len(self.lines) == 1 else ""
+        self.lines[-1] = ""
+        return f"\r\x1b[K{prefix}"
+
+    def _feed_paste(self, text: str) -> str:
+        """累积括号粘贴内容，粘贴结束时整体插入"""
+
+        end = text.find(_PASTE_END)
+        if end < 0:
+            # 结束标记可能被拆分在两次读取之间
+            split = len(text)
+            for i in range(1, len(_PASTE_END)):
+                if text.endswith(_PASTE_END[:i]):
+                    split = len(text) - i
+            self._paste.append(text[:split])
+            self._pending = text[split:]
+            return ""
+
+        self._paste.append(text[:end])
+        self._pasting = False
+        self._pending = ""
+        pasted = "".join(self._paste).replace("\r\n", "\n").replace("\r", "\n")
+        self._paste = []
+        pasted = "".join(c for c in pasted if c in "\n\t" or c >= " ")
+        return self._insert(pasted) + self.feed(text[end + len(_PASTE_END) :])
+
+    def feed(self, text: str) -> str:
+        """处理一段终端输入，返回需要回显的内容；Ctrl+C 时抛出 KeyboardInterrupt"""
+
+        text = self._pending + text
+        self._pending = ""
+        if self._pasting:
+            return self._feed_paste(text)
+
+        echo: List[str] = []
+        plain: List[str] = []  # 连续的普通字符合并插入
+        i = 0
+        while i < len(text) and not self.submitted:
+            char = text[i]
+            if (char >= " " and char != "\x7f") or char == "\t":
+                plain.append(char)
+                i += 1
+                continue
+            if plain:
+                echo.append(self._insert("".join(plain)))
+                plain = []
+
+            if char == "\x1b":
+                if text.startswith(_PASTE_START, i):
+                    self._pasting = True
+                    return "".join(echo) + self._feed_paste(
+                        text[i + len(_PASTE_START) :]
+                    )
+                consumed, action = self._parse_escape(text, i)
+                if consumed == 0:
+                    self._pending = text[i:]  # 转义序列不完整，等待后续输入
+                    break
+                i += consumed
+                if action == _SUBMIT:
+                    self.submitted = True
+                elif action == _NEWLINE:
+                    echo.append(self._insert("\n"))
+                continue
+
+            i += 1
+            if char == "\r":
+                echo.append(self._insert("\n"))
+            elif char in ("\n", "\x04"):
+                self.submitted = True
+            elif char in ("\x7f", "\x08"):
+                echo.append(self._backspace())
+            elif char == "\x15":
+                echo.append(self._clear_line())
+            elif char == "\x03":
+                raise KeyboardInterrupt
+        if plain:
+            echo.append(self._insert("".join(plain)))
+        return "".join(echo)
+
+    def feed_timeout(self) -> str:
+        """等待转义序列后续字节超时：视为单独按下 ESC 键，忽略"""
+
+        pending, self._pending = self._pending, ""
+        return self.feed(pending[1:])
+
+    @staticmethod
+    def _parse_escape(text: str, i: int):
+        """解析 text[i] 开始的转义序列，返回 (消耗的字符数, 按键动作)；不完整时返回 0"""
+
+        if i + 1 >= len(text):
+            return 0, None
+        kind = text[i + 1]
+        if kind == "\r":
+            return 2, _SUBMIT  # Alt+Enter
+        if kind == "O":
+            return (3, None) if i + 2 < len(text) else (0, None)
+        if kind != "[":
+            return 2, None  # Alt+字符，忽略
+        j = i + 2
+        while j < len(text) and not "\x40" <= text[j] <= "\x7e":
+            j += 1
+        if j >= len(text):
+            return 0, None
+        return j + 1 - i, _CSI_KEYS.get(text[i + 2 : j + 1])
+
+
+def _write(text: str):
+    if text:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+def _read_posix(editor: MultilineEditor, on_line: Optional[Callable[[], None]]):
+    import select
+    import termios
+
+    fd = sys.stdin.fileno()
+    old_attrs = termios.tcgetattr(fd)
+    attrs = termios.tcgetattr(fd)
+    # 关闭行缓冲、回显与信号键 (Ctrl+C 由编辑器处理)，并保留 Enter (\r) 与 Ctrl+J (\n) 的区别
+    attrs[0] &= ~(termios.ICRNL | termios.INLCR | termios.IXON)
+    attrs[3] &= ~(termios.ICANON | termios.ECHO | termios.ISIG | termios.IEXTEN)
+    attrs[6][termios.VMIN] = 1
+    attrs[6][termios.VTIME] = 0
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    termios.tcsetattr(fd, termios.TCSADRAIN, attrs)
+    _write(_TERMINAL_ENABLE)
+    try:
+        while not editor.submitted:
+            # 阻塞等待按键，输入期间不占用 CPU
+            if (
+                editor.pending_escape
+                and not select.select([fd], [], [], _ESCAPE_TIMEOUT)[0]
+            ):
+                _write(editor.feed_timeout())
+                continue
+            data = os.read(fd, _READ_SIZE)
+            if not data:
+                break
+            editor.new_lines = 0
+            _write(editor.feed(decoder.decode(data)))
+            if editor.new_lines and on_line:
+                on_line()
+    finally:
+        _write(_TERMINAL_DISABLE)
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+
+
+def _read_windows(editor: MultilineEditor, on_line: Optional[Callable[[], None]]):
+    import msvcrt
+
+    while not editor.submitted:
+        # getwch 阻塞等待按键；随后一次取出缓冲区中已有的按键 (如粘贴内容) 批量处理
+        chars = [msvcrt.getwch()]
+        while msvcrt.kbhit():
+            chars.append(msvcrt.getwch())
+        text = []
+        skip = False
+        for char in chars:
+            if skip:
+                skip = False  # 方向键、功能键等特殊按键的第二个字符
+            elif char in ("\x00", "\xe0"):
+                skip = True
+            elif char == "\x1a":
+                text.append("\x04")  # Ctrl+Z 与 Ctrl+D 相同，结束输入
+            else:
+                text.append(char)
+        editor.new_lines = 0
+        _write(editor.feed("".join(text)))
+        if editor.new_lines and on_line:
+            on_line()
+
+
+def read_multiline_input(
+    prompt: str, on_line: Optional[Callable[[], None]] = None
+) -> str:
+    """读取多行输入; Alt+Enter、Ctrl+J 或 Ctrl+D 结束输入, Enter / Shift+Enter 键换行
+
+    支持区分 Ctrl+Enter 与 Enter 的终端 (modifyOtherKeys / CSI u) 中 Ctrl+Enter 也可结束输入。
+    on_line 在每次读取到新行后调用 (例如在用户输入期间预热网络连接)，
+    粘贴的多行内容整体处理，只调用一次。标准输入不是终端时读取全部输入，
+    没有输入时抛出 EOFError。
+    """
+
+    print(prompt, end="", flush=True)
+    if not sys.stdin.isatty():
+        text = sys.stdin.read()
+        if not text:
+            raise EOFError
+        print()
+        return text.strip()
+
+    editor = MultilineEditor(prompt)
+    if os.name == "nt":
+        _read_windows(editor, on_line)
+    else:
+        _read_posix(editor, on_line)
+    print()
+    return editor.text.strip()
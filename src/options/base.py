@@ -59,6 +59,7 @@ class DynamicChoicesBase:
     """选项组基类"""
 
     _prompt_message = "请选择"
+    _default = None  # 单选时默认选中的选项
 
     def choices(self):
         """生成子选项列表"""
@@ -82,6 +83,7 @@ class DynamicChoicesBase:
                     "action",
                     message=self._prompt_message,
                     choices=self.choices(),
+                    default=self._default,
                 )
             ],
             **kwargs
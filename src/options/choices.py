@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from src.options.base import ChoicesBase, DynamicChoicesBase
 
@@ -35,6 +35,7 @@ class GeneratorChoices(ChoicesBase):
     use_gitignore = "使用 .gitignore 文件过滤项目文件"
     ignore_fis_files = "忽略 .fis 文件"
     use_custom_fis_config = "使用自定义 FIS 配置文件"
+    watch_project = "持续监听项目文件变化，自动更新描述文件"
 
     @classmethod
     def expose_choices(cls):
@@ -44,6 +45,7 @@ class GeneratorChoices(ChoicesBase):
             cls.use_gitignore,
             cls.ignore_fis_files,
             cls.use_custom_fis_config,
+            cls.watch_project,
         ]
 
 
@@ -52,11 +54,14 @@ class DynamicalChoices(DynamicChoicesBase):
 
     _prompt_message = "请选择动态选项：( [↑, ↓] 切换选项; [空格] 选择; [回车] 确认 )"
 
-    def __init__(self, prompt_message: str, choices: List[str]):
+    def __init__(
+        self, prompt_message: str, choices: List[str], default: Optional[str] = None
+    ):
         self._prompt_message = (
             prompt_message if prompt_message else self._prompt_message
         )
         self._choices = choices
+        self._default = default if default in choices else None
 
     def choices(self):
         return self._choices
@@ -1,107 +1,322 @@
+import contextlib
 import os
 import re
+import sys
 import time
-from pathlib import Path
-from typing import Optional
-
-import gitignorefile
-import inquirer
+from typing import (
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+)
 
-from src.fis_config import FisConfig
+from src.fis_cache import FileBlock, ManifestCache
+from src.fis_dedup import Deduplicator, same_as_target
+from src.fis_document import FisChange, parse_fis_header
+from src.fis_pack import CODEC_AUTO, FisPack, open_fis_document, pack_fis_file
+from src.fis_patch import PatchError, apply_patch
+from src.fis_scan import (
+    instruction_text,
+    iter_file_blocks,
+    load_fis_config,
+    walk_project_files,
+)
+from src.fis_txn import FisTransaction
+from src.log import logger
+from src.profiling import PROFILER
 from src.setting import (
-    DEFAULT_FIS_CONFIG_FILE,
+    DEFAULT_READ_JOBS,
+    DEFAULT_TOKENIZER,
     FILE_START_PREFIX,
+    FIS_MANIFEST_SUFFIX,
+    FIS_PACK_SUFFIX,
     INSTRUCTION_TEXT,
     INSTRUCTION_TEXT_EN,
+    SIZE_MODE_OMIT,
+    STDOUT_FIS_FILE,
+    WRITE_BUFFER_SIZE,
+)
+from src.size_policy import (
+    OMITTED_TAG,
+    TRUNCATED_TAG,
+    SizePolicy,
+    has_elided_marker,
+)
+from src.tokens import (
+    TokenBudget,
+    TokenReport,
+    estimate_tokens_for_size,
+    get_tokenizer,
 )
-from src.utils import is_text_file
+from src.utils import is_known_binary_file, remove_if_exists
 
 
-def generate_description(
+def iter_description(
     project_path: str,
-    fis_file: str,
     use_explanation: str,
     use_gitignore: bool,
     ignore_fis: bool,
     use_custom_fis_config: bool,
-) -> str:
-    """从项目生成描述文本。"""
-
-    sta_time = time.time()
-    description = ""
+    jobs: int = DEFAULT_READ_JOBS,
+    cache: Optional[ManifestCache] = None,
+    exclude_files: Iterable[str] = (),
+    report: Optional[TokenReport] = None,
+    budget: Optional[TokenBudget] = None,
+    max_file_size: Optional[int] = None,
+    binary_metadata: bool = False,
+    dedup: bool = False,
+) -> Iterator[str]:
+    """从项目逐块生成描述文本。
+
+    依次产出说明提示词 (可选)、每个文件的文件块以及结尾的代码块标记，
+    调用方可直接将其写入文件或管道，无需在内存中拼接完整描述。
+    传入 cache 时复用未变化文件的缓存文件块，并记录本次生成的清单。
+    传入 report 时统计每个文件块的 token 数；传入 budget 时需要先读取全部文件块
+    再按预算筛选，未纳入的文件记录在 report.dropped 中。
+    超出大小上限 (FIS 配置中的 size_limits 或 max_file_size) 的文件会被截断或省略，
+    binary_metadata 为 True 时 [BINARY] 文件块附带文件大小与内容哈希。
+    dedup 为 True 时内容重复的文本文件输出为 `[SAME_AS 路径]` 引用 (清单缓存中仍为完整内容)。
+    """
+
+    if budget and not report:
+        report = TokenReport(get_tokenizer())
+
+    instruction = instruction_text(use_explanation)
+    if instruction:
+        yield instruction
+    if report:
+        report.overhead = report.count(instruction) + report.count(
+            "```" if use_explanation else ""
+        )
+        report.max_tokens = budget.max_tokens if budget else None
+
+    with PROFILER.phase("config"):
+        fis_config = load_fis_config(project_path, use_custom_fis_config)
+        policy = SizePolicy.from_config(
+            fis_config and fis_config.config, max_file_size, binary_metadata
+        )
+    if cache:
+        cache.set_options_key(policy.key)
+    with PROFILER.phase("walk"):
+        relative_paths = walk_project_files(
+            project_path, fis_config, ignore_fis, use_gitignore, exclude_files
+        )
+    PROFILER.instrument(report, "tokens", "count")
+    PROFILER.instrument(cache, "cache.record", "record")
+
+    deduplicator = Deduplicator(report) if dedup else None
+    counted = []
+    for block in iter_file_blocks(project_path, relative_paths, jobs, cache, policy):
+        if cache and block.text:
+            cache.record(block)
+        if budget:
+            counted.append((block, report.count(block.text)))
+            continue
+        if deduplicator:
+            block = deduplicator.dedupe(block)
+        if report and block.text:
+            report.add(block.relative_path, report.count(block.text))
+        yield block.text
+
+    if budget:
+        # 先按完整内容筛选，再对纳入的文件去重，保证被引用的文件一定在输出中
+        selected, report.dropped = budget.select(counted, report.overhead)
+        for block, tokens in selected:
+            if deduplicator:
+                deduped = deduplicator.dedupe(block)
+                if deduped is not block:
+                    block, tokens = deduped, report.count(deduped.text)
+            if block.text:
+                report.add(block.relative_path, tokens)
+            yield block.text
 
     if use_explanation:
-        if use_explanation == "zh":
-            description += INSTRUCTION_TEXT + "\n```fis\n"
-        elif use_explanation == "en":
-            description += INSTRUCTION_TEXT_EN + "\n```fis\n"
-
-    # 如果项目目录下有 FIS 配置文件，则读取其内容来作为生成匹配依据
-    fis_config: Optional[FisConfig] = None
-
-    if use_custom_fis_config:
-        fis_config_file = f"{project_path}/{DEFAULT_FIS_CONFIG_FILE}"
-        if os.path.exists(fis_config_file):
-            fis_config = FisConfig(fis_config_file)
-        else:
-            if inquirer.confirm(
-                f"未找到自定义 FIS 配置文件: {fis_config_file} 是否生成默认配置？",
-                default=True,
-            ):
-                fis_config = FisConfig.create_fis_config_template(
-                    f"{project_path}/{DEFAULT_FIS_CONFIG_FILE}"
-                )
-            else:
-                print("不使用 FIS 配置文件继续")
-
-    def recursive_traversal(current_path: str):
-        nonlocal description, fis_config, ignore_fis, use_gitignore
-
-        if fis_config and fis_config.is_match_ignore_path(current_path):
-            return
+        yield "```"
+
+
+def _write_chunks(out: TextIO, chunks: Iterable[str]):
+    """写出描述文本；启用性能分析时单独统计写入耗时"""
+
+    if not PROFILER.enabled:
+        out.writelines(chunks)
+        return
+    for chunk in chunks:
+        with PROFILER.timer("write"):
+            out.write(chunk)
+        PROFILER.count("chars.written", len(chunk))
+
 
+def plan_description(
+    project_path: str,
+    use_explanation: str,
+    use_gitignore: bool,
+    ignore_fis: bool,
+    use_custom_fis_config: bool,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    budget: Optional[TokenBudget] = None,
+    exclude_files: Iterable[str] = (),
+    max_file_size: Optional[int] = None,
+) -> TokenReport:
+    """仅通过文件状态 (不读取文件内容) 预估描述的 token 数与预算筛选结果"""
+
+    report = TokenReport(get_tokenizer(tokenizer))
+    report.estimated_from_size = True
+    report.max_tokens = budget.max_tokens if budget else None
+    report.overhead = report.count(instruction_text(use_explanation)) + report.count(
+        "```" if use_explanation else ""
+    )
+
+    fis_config = load_fis_config(project_path, use_custom_fis_config)
+    policy = SizePolicy.from_config(fis_config and fis_config.config, max_file_size)
+    counted = []
+    for relative_path in walk_project_files(
+        project_path, fis_config, ignore_fis, use_gitignore, exclude_files
+    ):
         try:
-            for entry in os.scandir(current_path):
-                if entry.is_dir():
-                    recursive_traversal(entry.path)
-                else:
-                    file_path = entry.path
-                    relative_path = os.path.relpath(file_path, project_path)
-                    file_name = os.path.basename(file_path)
-
-                    if fis_config and fis_config.is_match_ignore_path(relative_path):
-                        continue
-
-                    if ignore_fis and file_name.endswith(".fis"):  # 忽略 fis 文件
-                        continue
-
-                    if use_gitignore and (
-                        gitignorefile.ignored(file_path)
-                        or relative_path.startswith(".git")
-                    ):  # 被 .gitignore 忽略或在 .git 目录下
-                        continue
-
-                    print(f"读取文件: {relative_path}")
-
-                    if is_text_file(file_path):
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.readlines()
-                        description += f"{FILE_START_PREFIX}{relative_path}\n"
-                        description += "".join(content)
-                    else:
-                        description += f"{FILE_START_PREFIX}{relative_path} [BINARY]\n"
-        except PermissionError:
-            print(f"权限不足，无法访问: {current_path}")
-
-    recursive_traversal(project_path)
+            st = os.stat(os.path.join(project_path, relative_path))
+        except OSError:
+            continue
+        limit = policy.limit_for(relative_path, st.st_size)
+        if is_known_binary_file(relative_path):
+            header = f"{FILE_START_PREFIX}{relative_path} [BINARY]\n"
+            tokens = report.count(header)
+        elif limit and limit.mode == SIZE_MODE_OMIT:
+            header = f"{FILE_START_PREFIX}{relative_path} {OMITTED_TAG}\n"
+            tokens = report.count(header) + report.count(f"size={st.st_size} lines=")
+        elif limit:
+            # 截断后的开头与结尾合计不超过上限
+            header = f"{FILE_START_PREFIX}{relative_path} {TRUNCATED_TAG}\n"
+            tokens = report.count(header) + estimate_tokens_for_size(limit.max_bytes)
+        else:
+            header = f"{FILE_START_PREFIX}{relative_path}\n"
+            tokens = report.count(header) + estimate_tokens_for_size(st.st_size)
+        block = FileBlock(relative_path, "", None, st.st_mtime_ns, st.st_size)
+        counted.append((block, tokens))
+
+    if budget:
+        counted, report.dropped = budget.select(counted, report.overhead)
+    for block, tokens in counted:
+        report.add(block.relative_path, tokens)
+    return report
 
-    if use_explanation:
-        description += "```"
 
-    with open(fis_file, "w", encoding="utf-8") as f:
-        f.write(description)
+def generate_description(
+    project_path: str,
+    fis_file: str,
+    use_explanation: str,
+    use_gitignore: bool,
+    ignore_fis: bool,
+    use_custom_fis_config: bool,
+    jobs: int = DEFAULT_READ_JOBS,
+    use_cache: bool = False,
+    tokenizer: str = DEFAULT_TOKENIZER,
+    budget: Optional[TokenBudget] = None,
+    token_report: bool = False,
+    max_file_size: Optional[int] = None,
+    binary_metadata: bool = False,
+    dedup: bool = False,
+    processes: int = 1,
+) -> str:
+    """从项目生成描述文件，返回输出文件路径。
+
+    fis_file 为 "-" 时输出到标准输出 (此时进度信息输出到标准错误)。
+    jobs 为并发读取文件的线程数，设为 1 时退回串行读取；无论并发与否，
+    文件块都按遍历得到的稳定路径顺序输出。
+    use_cache 为 True 时在输出文件旁维护清单缓存，仅重新读取有变化的文件。
+    token_report 为 True 或传入 budget 时统计每个文件块的 token 数，生成结束后输出
+    token 统计 (token_report 为 True 时列出每个文件与目录)，传入 budget 时按预算筛选文件
+    并列出未纳入的文件；两者都未指定时不加载分词器，也不统计 token 数。
+    max_file_size 为文件大小上限 (字节)，超出的文件只保留开头与结尾若干行。
+    dedup 为 True 时内容重复的文件只输出一次，其余以 `[SAME_AS 路径]` 引用。
+    fis_file 以 `.fisz` 结尾时先写出纯文本描述，再打包为压缩格式。
+    processes > 1 时按目录分片，由多个进程并行遍历与读取 (输出内容不变)，
+    此时不支持 use_cache、budget 与 dedup。
+    """
+
+    if processes > 1 and (use_cache or budget or dedup):
+        raise ValueError("多进程生成不支持清单缓存、token 预算与去重")
+
+    sta_time = time.time()
+    report = TokenReport(get_tokenizer(tokenizer)) if token_report or budget else None
+
+    def write_description(
+        out: TextIO,
+        cache: Optional[ManifestCache] = None,
+        exclude_files: Iterable[str] = (),
+    ):
+        if processes > 1:
+            from src.fis_shard import write_sharded_description
+
+            write_sharded_description(
+                out,
+                project_path,
+                use_explanation,
+                use_gitignore,
+                ignore_fis,
+                use_custom_fis_config,
+                processes,
+                report,
+                tokenizer,
+                exclude_files=exclude_files,
+                max_file_size=max_file_size,
+                binary_metadata=binary_metadata,
+            )
+            return
+        _write_chunks(
+            out,
+            iter_description(
+                project_path,
+                use_explanation,
+                use_gitignore,
+                ignore_fis,
+                use_custom_fis_config,
+                jobs=jobs,
+                cache=cache,
+                exclude_files=exclude_files,
+                report=report,
+                budget=budget,
+                max_file_size=max_file_size,
+                binary_metadata=binary_metadata,
+                dedup=dedup,
+            ),
+        )
+
+    if fis_file == STDOUT_FIS_FILE:
+        out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            write_description(out)
+            out.flush()
+            print(f"项目描述已输出 (耗时: {time.time() - sta_time:.2f}s)")
+            if report:
+                report.log_report(detailed=token_report)
+        return fis_file
+
+    packed = fis_file.endswith(FIS_PACK_SUFFIX)
+    text_file = f"{fis_file}.tmp" if packed else fis_file
+    cache = ManifestCache(fis_file) if use_cache else None
+    with contextlib.ExitStack() as stack:
+        if cache:
+            stack.enter_context(cache)
+        if packed:
+            stack.callback(remove_if_exists, text_file)
+        f = stack.enter_context(
+            open(text_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+        )
+        write_description(
+            f,
+            cache,
+            exclude_files=(fis_file, text_file, f"{fis_file}{FIS_MANIFEST_SUFFIX}"),
+        )
+        if packed:
+            f.close()
+            with PROFILER.timer("write.pack"):
+                pack_fis_file(text_file, fis_file)
     print(f"项目描述已保存至: {fis_file} (耗时: {time.time() - sta_time:.2f}s)")
-    return description
+    if cache:
+        print(f"缓存命中: {cache.hits} 个文件, 重新读取: {cache.misses} 个文件")
+    if report:
+        report.log_report(detailed=token_report)
+    return fis_file
 
 
 def read_fis_description_from_content(description_content: str) -> str:
@@ -128,43 +343,165 @@ def read_fis_description_from_content(description_content: str) -> str:
     return description_content
 
 
-def apply_changes_from_fis_content(project_path: str, content: str):
-    """应用 fis 变更内容到项目中。"""
+def iter_fis_changes(content: str) -> Iterator[FisChange]:
+    """从 fis 内容中逐个解析文件变更。"""
 
-    content = read_fis_description_from_content(content)
+    with PROFILER.timer("parse.extract"):
+        content = read_fis_description_from_content(content)
+    with PROFILER.timer("parse.split"):
+        changes = content.split(FILE_START_PREFIX)[1:]
 
-    changes = content.split(FILE_START_PREFIX)[1:]
     for change in changes:
-        file_path, *content_lines = change.split("\n", 1)
-        file_path = file_path.strip()
-        opt_tag = re.search(r"(\[.*\])", file_path)
-
-        if opt_tag:
-            opt_tag = opt_tag.group(1)
-            file_path = file_path.replace(f"{opt_tag}", "").strip()
-        full_path = Path(os.path.join(project_path, file_path))
-        Path(full_path).parent.mkdir(parents=True, exist_ok=True)
-        new_content = content_lines[0] if len(content_lines) else ""
-
-        # 忽略非文本文件的变更
-        if opt_tag == "[BINARY]":
-            print(f"忽略非文本文件: {file_path}")
-            continue
+        PROFILER.count("parse.changes")
+        header, *content_lines = change.split("\n", 1)
+        file_path, opt_tag = parse_fis_header(header)
+        yield FisChange(file_path, opt_tag, content_lines[0] if content_lines else None)
+
+
+def apply_fis_change(txn: FisTransaction, change: FisChange):
+    """将单个文件变更暂存到事务中，由事务提交时统一应用。"""
+
+    file_path, opt_tag, new_content = change
+
+    # 忽略非文本文件的变更
+    if opt_tag == "[BINARY]":
+        logger.info(f"忽略非文本文件: {file_path}")
+        return
+
+    # 截断或省略内容的文件块不包含完整内容，不能写回
+    if opt_tag in (TRUNCATED_TAG, OMITTED_TAG):
+        logger.warning(f"忽略截断或省略内容的文件: {file_path}")
+        return
+
+    # 文件级别变更
+    if opt_tag == "[DELETE]":
+        txn.stage_delete(file_path, label="删除文件")
+        return
+
+    # 重复文件引用：复制被引用文件在本事务中的当前内容 (此前的文件块或项目中的文件)
+    source_path = same_as_target(opt_tag)
+    if source_path is not None:
+        source = txn.read_text(source_path)
+        if source is None:
+            logger.warning(
+                f"复制文件 {file_path} 失败: 引用的文件 {source_path} 不存在或不是文本文件，已跳过"
+            )
+            return
+        txn.stage_write(file_path, source, label="复制文件")
+        return
+
+    if new_content is None or not file_path:
+        return
+
+    if opt_tag == "[PATCH]":
+        original = txn.read_text(file_path)
+        if original is None:
+            logger.warning(
+                f"修补文件 {file_path} 失败: 文件不存在或不是文本文件，已跳过"
+            )
+            return
+        try:
+            patched = apply_patch(original, new_content)
+        except PatchError as e:
+            logger.warning(
+                f"修补文件 {file_path} 失败，已跳过:\n"
+                + "\n".join(f"  - {failure}" for failure in e.failures)
+            )
+            return
+        if has_elided_marker(patched):
+            logger.warning(f"修补文件 {file_path} 后包含省略标记行，已跳过")
+            return
+        txn.stage_write(file_path, patched, label="修补文件")
+        return
+
+    if has_elided_marker(new_content):
+        logger.warning(f"文件 {file_path} 包含省略标记行 (截断的文件内容)，已跳过")
+        return
+    label = "修改文件" if opt_tag == "[REPLACE]" else "创建文件"
+    txn.stage_write(file_path, new_content, label=label)
 
-        # 文件级别变更
-        if content_lines and opt_tag == "[REPLACE]":
-            full_path.write_text(new_content, encoding="utf-8")
-            print(f"修改文件 {file_path}")
-        elif content_lines and opt_tag == "[DELETE]":
-            full_path.unlink()
-            print(f"删除文件 {file_path}")
-        elif content_lines and file_path:
-            full_path.write_text(new_content, encoding="utf-8")
-            print(f"创建文件 {file_path}")
+
+def apply_fis_changes(project_path: str, changes: Iterable[FisChange]):
+    """以事务方式应用文件变更到项目中，失败时项目保持原状。"""
+
+    with PROFILER.phase("apply"):
+        with FisTransaction(project_path) as txn:
+            PROFILER.instrument(txn, "apply.commit", "commit")
+            for change in changes:
+                with PROFILER.timer("apply.stage"):
+                    apply_fis_change(txn, change)
+
+
+def apply_changes_from_fis_content(project_path: str, content: str):
+    """以事务方式应用 fis 变更内容到项目中，失败时项目保持原状。"""
+    apply_fis_changes(project_path, iter_fis_changes(content))
 
 
 def apply_changes_from_fis_file(project_path: str, changes_file: str):
-    """从文件中读取变更描述并应用到项目中。"""
+    """从文件中读取变更描述并应用到项目中。
+
+    通过内存映射 (或 .fisz 的索引) 逐个读取文件块，不会将整个描述文件读入内存。
+    """
+
+    with PROFILER.timer("parse.index"):
+        document = open_fis_document(changes_file)
+    with document:
+        PROFILER.count("parse.changes", len(document))
+        apply_fis_changes(project_path, document.iter_changes())
+
+
+def show_fis_file(fis_file: str, file_path: Optional[str] = None) -> bool:
+    """输出描述文件中单个文件的内容 (跟随 [SAME_AS] 引用)，未指定 file_path 时列出所有文件块。
+
+    只解析路径行并按偏移读取目标文件块，不解析其余文件内容；文件不存在时返回 False。
+    """
+
+    with open_fis_document(fis_file) as document:
+        if file_path is None:
+            for path, opt_tag in document.list():
+                print(f"{path} {opt_tag}" if opt_tag else path)
+            return True
+
+        entry = document.get(file_path)
+        visited = set()
+        while entry and same_as_target(entry.opt_tag) not in (None, *visited):
+            visited.add(entry.file_path)
+            entry = document.get(same_as_target(entry.opt_tag))
+        if entry is None:
+            return False
+        sys.stdout.flush()
+        with entry.view() as view:
+            sys.stdout.buffer.write(view)
+        sys.stdout.buffer.flush()
+    return True
 
-    changes_description = Path(changes_file).read_text(encoding="utf-8")
-    return apply_changes_from_fis_content(project_path, changes_description)
+
+def pack_fis(fis_file: str, pack_file: Optional[str] = None, codec: str = CODEC_AUTO):
+    """将纯文本描述文件打包为 .fisz，未指定 pack_file 时输出到同名 .fisz 文件"""
+
+    if pack_file is None:
+        pack_file = f"{os.path.splitext(fis_file)[0]}{FIS_PACK_SUFFIX}"
+    sta_time = time.time()
+    stats = pack_fis_file(fis_file, pack_file, codec)
+    ratio = stats["packed_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0
+    print(
+        f"已打包至: {pack_file} ({stats['files']} 个文件块, {stats['codec']}, "
+        f"{stats['raw_bytes']} -> {stats['packed_bytes']} 字节, {ratio:.1%}, "
+        f"耗时: {time.time() - sta_time:.2f}s)"
+    )
+
+
+def unpack_fis(pack_file: str, fis_file: Optional[str] = None):
+    """将 .fisz 还原为纯文本描述文件 (逐字节一致)，fis_file 为 "-" 时输出到标准输出"""
+
+    if fis_file is None:
+        fis_file = f"{os.path.splitext(pack_file)[0]}.fis"
+    with FisPack(pack_file) as pack:
+        if fis_file == STDOUT_FIS_FILE:
+            sys.stdout.flush()
+            pack.unpack_to(sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            return
+        with open(fis_file, "wb") as out:
+            pack.unpack_to(out)
+    print(f"已解包至: {fis_file}")
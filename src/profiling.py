@@ -0,0 +1,189 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from src.log import logger
+
+
+class _NullTimer:
+    """关闭性能分析时使用的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Phase(_Timer):
+    """计时的同时在追踪事件中记录阶段的开始时间与耗时"""
+
+    __slots__ = ()
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.add_time(self.name, end - self.start)
+        self.profiler.events.append(
+            {
+                "name": self.name,
+                "start": self.start - self.profiler.started_at,
+                "seconds": end - self.start,
+            }
+        )
+        return False
+
+
+class Profiler:
+    """FIS 流水线各阶段的计时器与计数器
+
+    默认关闭，关闭时 timer / phase 返回空计时器，count 不做任何事，
+    instrument 不替换方法，对正常运行几乎没有额外开销。
+    计时器累计的是各线程中的耗时之和 (并发读取时可能大于实际经过的时间)；
+    phase 用于串行的粗粒度阶段，同时记录到追踪事件中。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timers: Dict[str, List[float]] = {}  # 名称 -> [累计耗时, 调用次数]
+        self.counters: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.timers = {}
+        self.counters = {}
+        self.events = []
+        self.started_at = time.perf_counter()
+
+    def add_time(self, name: str, seconds: float, calls: int = 1):
+        with self._lock:
+            timer = self.timers.setdefault(name, [0.0, 0])
+            timer[0] += seconds
+            timer[1] += calls
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timer(self, name: str):
+        """累计 with 代码块的耗时"""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def phase(self, name: str):
+        """累计 with 代码块的耗时，并记录为一个追踪事件"""
+        return _Phase(self, name) if self.enabled else _NULL_TIMER
+
+    def instrument(self, obj: Any, name: str, *methods: str):
+        """为对象的方法计时 (以实例属性覆盖方法)，返回值为真的调用计入 `<name>.hits`"""
+
+        if not self.enabled or obj is None:
+            return
+        for method in methods:
+            func = getattr(obj, method)
+            if not getattr(func, "_profiled", False):  # 同一对象多次遍历时不重复计时
+                setattr(obj, method, self._wrap(func, name))
+
+    def _wrap(self, func: Callable, name: str) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.add_time(name, time.perf_counter() - start)
+            if result is True:
+                self.count(f"{name}.hits")
+            return result
+
+        timed._profiled = True  # type: ignore
+        return timed
+
+    def summary(self, **extra) -> Dict[str, Any]:
+        return {
+            **extra,
+            "wall_seconds": time.perf_counter() - self.started_at,
+            "timers": {
+                name: {"seconds": seconds, "calls": calls}
+                for name, (seconds, calls) in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "events": self.events,
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        logger.info(f"性能分析 (总耗时 {summary['wall_seconds']:.3f}s):")
+        for name, timer in summary["timers"].items():
+            logger.info(
+                f"  {name:<28}{timer['seconds']:>10.3f}s{timer['calls']:>10} 次"
+            )
+        for name, value in summary["counters"].items():
+            logger.info(f"  {name:<28}{value:>11}")
+
+    def write_json(self, path: str, **extra):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(**extra), f, indent=2, ensure_ascii=False)
+
+
+# 进程内共享的性能分析器，由命令行参数 --profile 启用
+PROFILER = Profiler()
+
+
+def profile_call(
+    func: Callable[[], Any],
+    profile: bool = False,
+    profile_json: Optional[str] = None,
+    cprofile: Optional[str] = None,
+    **extra,
+):
+    """执行 func；profile 为 True 时输出分析摘要，profile_json 为路径时写入 JSON，
+    cprofile 为路径时同时使用 cProfile 采样并保存统计数据 (可用 pstats / snakeviz 查看)
+
+    摘要与提示信息通过日志输出到标准错误 (不会混入输出到标准输出的 FIS 描述)，
+    使用 -q 时不输出。
+    """
+
+    if profile or profile_json:
+        PROFILER.enable()
+    profiler = None
+    if cprofile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return func()
+    finally:
+        with contextlib.redirect_stdout(sys.stderr):
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(cprofile)
+                logger.info(f"cProfile 统计数据已保存至: {cprofile}")
+            if profile:
+                PROFILER.log_summary()
+            if profile_json:
+                PROFILER.write_json(profile_json, **extra)
+                logger.info(f"性能分析结果已保存至: {profile_json}")
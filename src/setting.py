@@ -1,7 +1,95 @@
+import os
+
 FILE_START_PREFIX = "$$$" + " "
 
 DEFAULT_FIS_CONFIG_FILE = ".fis_config.yaml"
 
+# 生成 FIS 描述时并发读取文件的默认线程数 (I/O 密集，可高于 CPU 核数)
+DEFAULT_READ_JOBS = min(32, (os.cpu_count() or 1) + 4)
+
+# 以此作为输出路径时，FIS 描述写入标准输出
+STDOUT_FIS_FILE = "-"
+
+# FIS 生成清单缓存文件后缀 (保存在输出文件旁)
+FIS_MANIFEST_SUFFIX = ".manifest"
+
+# 以此为后缀的输出路径生成压缩打包的描述文件 (每个文件块单独压缩，带尾部索引)
+FIS_PACK_SUFFIX = ".fisz"
+
+# 事务式应用变更时保存回滚日志与备份文件的目录 (位于用户缓存目录下，按项目路径区分)
+FIS_TXN_CACHE_DIR = "transactions"
+
+# 旧版本在项目根目录下保存事务数据的目录，生成描述时跳过
+FIS_TXN_DIR = ".fis_txn"
+
+# 监听模式：合并连续文件变化的防抖时间 (秒)、文件持续变化时的最长更新间隔 (秒)
+# 与无法使用 inotify 时轮询检测的间隔 (秒)
+WATCH_DEBOUNCE = 0.3
+WATCH_MAX_DELAY = 3.0
+WATCH_POLL_INTERVAL = 1.0
+
+# 多进程生成时的分片规则：逐层细分目录，直到分片数达到进程数的 SHARDS_PER_PROCESS 倍
+# 或目录深度达到 SHARD_MAX_DEPTH；同一目录下连续的文件每 SHARD_MAX_FILES 个为一个分片
+SHARDS_PER_PROCESS = 8
+SHARD_MAX_DEPTH = 3
+SHARD_MAX_FILES = 256
+
+# 写出 FIS 描述文件时使用的缓冲区大小
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# token 统计默认使用的分词器 (auto: 优先 tiktoken，不可用时退回快速估算)
+DEFAULT_TOKENIZER = "auto"
+DEFAULT_TIKTOKEN_ENCODING = "cl100k_base"
+
+# 对话模型 HTTP 连接池：空闲连接保持时间 (秒) 与预热的最小间隔 (秒)
+CHAT_KEEPALIVE_EXPIRY = 120
+CHAT_WARMUP_INTERVAL = 15
+
+# 多轮对话每轮请求 (对话历史 + 本轮增量) 的 token 数上限，为单独发送完整 FIS 的倍数；
+# 达到上限时改为发送完整 FIS 并清空对话历史
+SESSION_MAX_REQUEST_RATIO = 2.0
+
+# LLM 回复缓存：缓存目录总大小上限 (超出时按最近使用时间淘汰) 与默认回放速度倍率
+# (回放速度为 0 时不等待，直接输出缓存的回复)
+RESPONSE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+RESPONSE_CACHE_REPLAY_SPEED = 0.0
+
+# 服务商模型列表缓存的有效期 (秒)，过期后先使用旧列表并在后台刷新
+MODEL_LIST_TTL = 24 * 60 * 60
+
+# 超过大小上限的文件的处理方式：truncate 仅保留开头与结尾若干行，omit 仅输出大小与行数
+SIZE_MODE_TRUNCATE = "truncate"
+SIZE_MODE_OMIT = "omit"
+DEFAULT_HEAD_LINES = 50
+DEFAULT_TAIL_LINES = 20
+# 截断文件中代替被省略部分的标记行，应用变更时拒绝写入包含该标记行的文件
+ELIDED_MARKER = "... [FIS: 已省略 {lines} 行, {size} 字节] ..."
+
+# 已知的二进制文件扩展名，生成描述时无需打开即可标记为 [BINARY]
+# fmt: off
+BINARY_FILE_EXTENSIONS = frozenset(
+    {
+        # 图片
+        ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".icns", ".webp",
+        ".tif", ".tiff", ".psd", ".heic",
+        # 音视频
+        ".mp3", ".wav", ".flac", ".ogg", ".aac", ".m4a",
+        ".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv",
+        # 压缩包与安装包
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".tar",
+        ".jar", ".war", ".whl", ".apk", ".dmg", ".iso", ".deb", ".rpm",
+        # 编译产物与库
+        ".exe", ".dll", ".so", ".dylib", ".a", ".lib", ".o", ".obj",
+        ".class", ".pyc", ".pyo", ".pyd", ".wasm", ".bin",
+        # 文档与字体
+        ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+        ".ttf", ".otf", ".woff", ".woff2", ".eot",
+        # 数据库
+        ".db", ".sqlite", ".sqlite3",
+    }
+)
+# fmt: on
+
 INSTRUCTION_TEXT = """
 ## FIS 结构定义与交互规范
 
@@ -12,6 +100,8 @@ INSTRUCTION_TEXT = """
 - **文件分隔符：** 使用 `$$$` 分隔符标记每个文件，后跟文件路径（相对项目根目录）。例如：`$$$ src/main.py` 表示名为 `main.py` 的文件位于 `src` 目录下。
 - **文件内容：** 文件内容从文件路径的下一行开始。
 - **非文本文件：** 非文本文件会在文件路径后添加 `[BINARY]` 标记，不包含文件内容。例如：`$$$ images/logo.png [BINARY]`。
+- **大文件：** 超过大小上限的文件会在文件路径后添加 `[TRUNCATED]` 标记，仅包含文件开头与结尾的若干行，中间部分以 `... [FIS: 已省略 N 行, M 字节] ...` 标记行代替；或添加 `[OMITTED]` 标记，仅包含文件大小与行数。这类文件的内容不完整，修改时请使用 `[PATCH]`，不要返回带有这些标记或省略标记行的文件。
+- **重复文件：** 内容与此前某个文件完全相同的文件会在文件路径后添加 `[SAME_AS 原文件路径]` 标记，不包含文件内容。例如：`$$$ lib/b/LICENSE [SAME_AS lib/a/LICENSE]`。你也可以使用该标记创建与已有文件内容相同的文件。
 - **注释：** 使用 `{/* ... */}` 标记 FIS 结构中的注释，用于与文件内容区分。所有非文件内容信息和说明应该放置在注释中，这样有助于我正确地解析你的代码变更，避免文件内容被干扰。(注释不支持嵌套)
 
 **一个有效的 FIS 结构示例：**
@@ -57,16 +147,27 @@ alert('Hello, ' + name + '!');
 $$$ src/old.js [DELETE]
 ```
 
+- 如果只需要修改文件中的少量内容，请在文件路径后添加 `[PATCH]` 标记，并以 unified diff 格式提供变更块，无需返回整个文件：每个变更块以 `@@ -原起始行,原行数 +新起始行,新行数 @@` 开头，未修改的上下文行以空格开头，删除的行以 `-` 开头，新增的行以 `+` 开头，并在修改处前后各保留 3 行上下文以便准确定位。例如：
+
+```fis
+$$$ src/main.js [PATCH]
+@@ -3,3 +3,3 @@
+ function greet(name) {
+-  console.log('Hello, ' + name + '!');
++  alert('Hello, ' + name + '!');
+ }
+```
+
 **3. 返回结果规范：**
 
 - 当你不需要做任何文件修改时，请保持原来的回复方式即可
 - 如果你需要对文件进行更改时，请使用 FIS 结构来描述新项目或者你对项目的变更，并且确保 FIS 结构内容完整地包含在有且只有一对 "```fis" 中，以便正确解析你的代码变更。
-- 请你仅返回修改过的文件内容，未修改的文件不需要返回。
+- 请你仅返回修改过的文件内容，未修改的文件不需要返回；对于只有少量修改的文件，请优先使用 `[PATCH]` 仅返回变更块。
 
 请务必仔细阅读并理解以上规范，并在交互过程中严格遵守。这将有助于快速高效地变更应用实现，完成项目开发目标。
 
 以下是我们本次对话中的基准项目 FIS 结构：
-""".strip()  # 742 tokens in OpenAI API
+""".strip()
 
 INSTRUCTION_TEXT_EN = """
 ## FIS Structure Definition and Interaction Specification (English Version)
@@ -78,6 +179,8 @@ To facilitate your understanding and manipulation of multi-file project structur
 - **File Separator:** Use the `$$$` separator to mark each file, followed by the file path (relative to the project root directory). For example, `$$$ src/main.py` indicates a file named `main.py` located in the `src` directory.
 - **File Content:** File content starts on the line after the file path.
 - **Non-text Files:** Non-text files will have the `[BINARY]` tag appended after the file path, without including the file content. For example, `$$$ images/logo.png [BINARY]`.
+- **Large Files:** Files over the size limit will have the `[TRUNCATED]` tag appended after the file path and contain only the first and last lines of the file, with the middle replaced by a `... [FIS: 已省略 N 行, M 字节] ...` marker line; or the `[OMITTED]` tag with only the file size and line count. Their content is incomplete, so use `[PATCH]` to modify them and never return a file with these tags or the marker line.
+- **Duplicate Files:** A file whose content is identical to an earlier file will have the `[SAME_AS original/path]` tag appended after the file path, without including the file content. For example, `$$$ lib/b/LICENSE [SAME_AS lib/a/LICENSE]`. You may also use this tag to create a file with the same content as an existing file.
 - **Comments:** Use `{/* ... */}` to mark comments in the FIS structure, separating them from file content. All non-file content information and explanations should be placed in comments, which helps me correctly parse your code changes and avoid interfering with file content. (Comments do not support nesting)
 
 **A valid FIS structure example:**
@@ -123,13 +226,24 @@ alert('Hello, ' + name + '!');
 $$$ src/old.js [DELETE]
 ```
 
+- If you only need to change a small part of a file, add the `[PATCH]` tag after the file path and provide the changes as unified diff hunks instead of the whole file: each hunk starts with `@@ -old_start,old_count +new_start,new_count @@`, unchanged context lines start with a space, removed lines start with `-` and added lines start with `+`. Keep 3 lines of context before and after each change so it can be located precisely. For example:
+
+```fis
+$$$ src/main.js [PATCH]
+@@ -3,3 +3,3 @@
+ function greet(name) {
+-  console.log('Hello, ' + name + '!');
++  alert('Hello, ' + name + '!');
+ }
+```
+
 **3. Return Result Specification:**
 
 - If you do not need to make any file changes, please keep the original reply format.
 - When you need to make changes to a file, please use the FIS structure to describe the new project or your changes to the project, and ensure that the FIS structure content is completely enclosed within a single pair of "```fis" to allow correct parsing of your code changes.
-- Please only return the modified file content. Unmodified files do not need to be returned.
+- Please only return the modified file content. Unmodified files do not need to be returned. For files with only small changes, prefer `[PATCH]` and return just the changed hunks.
 
 Please carefully read and understand the above specifications and strictly adhere to them during interaction. This will help you quickly and efficiently implement changes to applications and achieve project development goals. 
 
 Here is the FIS structure for the baseline project we discussed in our conversation:
-""".strip()  # 620 tokens in OpenAI API
+""".strip()
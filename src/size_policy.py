@@ -0,0 +1,292 @@
+import codecs
+import hashlib
+import json
+import re
+from typing import BinaryIO, List, NamedTuple, Optional, Pattern, Tuple
+
+from src.setting import (
+    DEFAULT_HEAD_LINES,
+    DEFAULT_TAIL_LINES,
+    ELIDED_MARKER,
+    SIZE_MODE_OMIT,
+    SIZE_MODE_TRUNCATE,
+)
+
+# 截断与省略内容的文件块标记，这类文件块不包含完整文件内容，应用变更时会被忽略
+TRUNCATED_TAG = "[TRUNCATED]"
+OMITTED_TAG = "[OMITTED]"
+
+_READ_CHUNK_SIZE = 1024 * 1024
+
+# 按 BOM 识别的文本编码与码元字节数 (UTF-32 的 BOM 以 UTF-16 的 BOM 开头，需优先判断)，
+# 与 utils.decode_text_content 的识别规则一致，保证文件是否超出大小上限不影响分类结果
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le", 4),
+    (codecs.BOM_UTF32_BE, "utf-32-be", 4),
+    (codecs.BOM_UTF16_LE, "utf-16-le", 2),
+    (codecs.BOM_UTF16_BE, "utf-16-be", 2),
+)
+
+_ELIDED_MARKER_RE = re.compile(
+    "^"
+    + r"\d+".join(re.escape(part) for part in re.split(r"\{\w+\}", ELIDED_MARKER))
+    + "$",
+    re.MULTILINE,
+)
+
+
+class SizeLimit(NamedTuple):
+    """单条文件大小上限规则"""
+
+    pattern: Optional[Pattern]  # 匹配项目相对路径，为 None 时匹配所有文件
+    max_bytes: int
+    mode: str = SIZE_MODE_TRUNCATE
+    head_lines: int = DEFAULT_HEAD_LINES
+    tail_lines: int = DEFAULT_TAIL_LINES
+
+
+class TruncatedContent(NamedTuple):
+    """截断后保留的文件开头与结尾"""
+
+    head: str
+    tail: str
+    elided_lines: int
+    elided_bytes: int
+
+
+class SizePolicy:
+    """大文件处理策略
+
+    按顺序匹配 size_limits 规则，文件大小超过首条匹配规则的上限时截断或省略其内容；
+    binary_metadata 为 True 时 [BINARY] 文件块附带文件大小与内容哈希。
+    """
+
+    def __init__(self, limits: List[SizeLimit], binary_metadata: bool = False):
+        self.limits = limits
+        self.binary_metadata = binary_metadata
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Optional[dict],
+        max_file_size: Optional[int] = None,
+        binary_metadata: bool = False,
+    ) -> "SizePolicy":
+        """从 FIS 配置 (size_limits / binary_metadata) 与命令行参数建立策略，
+        命令行指定的 max_file_size 作为匹配所有文件的最后一条规则
+        """
+
+        config = config or {}
+        limits = []
+        for entry in config.get("size_limits") or []:
+            mode = entry.get("mode", SIZE_MODE_TRUNCATE)
+            if mode not in (SIZE_MODE_TRUNCATE, SIZE_MODE_OMIT) or not isinstance(
+                entry.get("max_bytes"), int
+            ):
+                raise ValueError(f"无效的 size_limits 规则: {entry}")
+            pattern = entry.get("pattern")
+            limits.append(
+                SizeLimit(
+                    re.compile(pattern) if pattern else None,
+                    entry["max_bytes"],
+                    mode,
+                    entry.get("head_lines", DEFAULT_HEAD_LINES),
+                    entry.get("tail_lines", DEFAULT_TAIL_LINES),
+                )
+            )
+        if max_file_size is not None:
+            limits.append(SizeLimit(None, max_file_size))
+        return cls(
+            limits, binary_metadata or bool(config.get("binary_metadata", False))
+        )
+
+    @property
+    def key(self) -> str:
+        """策略标识，记录在生成清单中，策略变化时缓存的文件块失效 (无规则时为空)"""
+
+        if not self.limits and not self.binary_metadata:
+            return ""
+        return json.dumps(
+            {
+                "limits": [
+                    [limit.pattern and limit.pattern.pattern, *limit[1:]]
+                    for limit in self.limits
+                ],
+                "binary_metadata": self.binary_metadata,
+            }
+        )
+
+    def limit_for(self, relative_path: str, size: int) -> Optional[SizeLimit]:
+        """返回文件超出的大小上限规则，未超出时返回 None"""
+
+        for limit in self.limits:
+            if limit.pattern is None or limit.pattern.search(relative_path):
+                return limit if size > limit.max_bytes else None
+        return None
+
+
+def has_elided_marker(content: str) -> bool:
+    """内容中是否包含截断文件的省略标记行"""
+    return bool(_ELIDED_MARKER_RE.search(content))
+
+
+def elided_marker(lines: int, size: int) -> str:
+    return ELIDED_MARKER.format(lines=lines, size=size)
+
+
+def _normalize_newlines(text: str) -> str:
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _text_encoding(f: BinaryIO) -> Tuple[str, int, int]:
+    """根据文件开头的 BOM 返回 (编码, 码元字节数, BOM 字节数)，没有 BOM 时按 UTF-8 处理"""
+
+    f.seek(0)
+    head = f.read(4)
+    for bom, encoding, unit in _BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding, unit, len(bom)
+    return "utf-8", 1, 0
+
+
+def _find_newline(data: bytes, newline: bytes, start: int, unit: int) -> int:
+    """查找与码元边界对齐的换行符"""
+    pos = data.find(newline, start)
+    while pos >= 0 and pos % unit:
+        pos = data.find(newline, pos + 1)
+    return pos
+
+
+def _rfind_newline(data: bytes, newline: bytes, end: int, unit: int) -> int:
+    """在 data[:end] 中反向查找与码元边界对齐的换行符"""
+    pos = data.rfind(newline, 0, end)
+    while pos >= 0 and pos % unit:
+        pos = data.rfind(newline, 0, pos + len(newline) - 1)
+    return pos
+
+
+def _count_newlines(f, start: int, end: int, encoding: str = "utf-8") -> int:
+    """统计 [start, end) 中的换行符数 (多字节编码时 start 需与码元边界对齐)"""
+
+    f.seek(start)
+    count = 0
+    remaining = end - start
+    while remaining > 0:
+        data = f.read(min(_READ_CHUNK_SIZE, remaining))
+        if not data:
+            break
+        if encoding == "utf-8":
+            count += data.count(b"\n")
+        else:
+            # 块大小为码元的整数倍，换行符不会被拆分；被拆分的代理对不影响计数
+            count += data.decode(encoding, errors="replace").count("\n")
+        remaining -= len(data)
+    return count
+
+
+def count_lines(file_path: str) -> int:
+    """流式统计文件行数 (最后一行没有换行符时也计入)"""
+
+    with open(file_path, "rb") as f:
+        encoding, _, bom = _text_encoding(f)
+        size = f.seek(0, 2)
+        newline = "\n".encode(encoding)
+        count = _count_newlines(f, bom, size, encoding)
+        f.seek(max(size - len(newline), bom))
+        last = f.read()
+    return count + (1 if last and last != newline else 0)
+
+
+def file_sha256(file_path: str) -> str:
+    """流式计算文件内容的 SHA-256"""
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(_READ_CHUNK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def read_truncated(
+    file_path: str, size: int, limit: SizeLimit
+) -> Optional[TruncatedContent]:
+    """只读取文件开头与结尾各若干行 (各自不超过上限的一半字节)，
+    并统计中间被省略的行数；内容不是文本时返回 None
+
+    文本编码的识别规则与 utils.decode_text_content 一致：带 UTF-16/UTF-32 BOM 的文件
+    按对应编码处理，其余文件包含 NUL 字节或不是 UTF-8 时视为非文本。
+    """
+
+    with open(file_path, "rb") as f:
+        encoding, unit, bom = _text_encoding(f)
+        newline = "\n".encode(encoding)
+        budget = max(limit.max_bytes // 2 // unit * unit, unit)
+        f.seek(0)
+        head = f.read(bom + budget)
+        if not bom and b"\x00" in head[:8192]:
+            return None
+        if limit.head_lines <= 0:
+            head = head[:bom]
+        else:
+            # 保留前 head_lines 行，单行过长时在字节上限处截断
+            end = -1
+            pos = bom
+            for _ in range(limit.head_lines):
+                end = _find_newline(head, newline, pos, unit)
+                if end < 0:
+                    break
+                pos = end + len(newline)
+            if end >= 0:
+                head = head[:pos]
+        head_end = len(head)
+
+        tail_start = max(head_end, size - budget)
+        tail_start += (bom - tail_start) % unit  # 与码元边界对齐
+        f.seek(tail_start)
+        tail = f.read(max(size - tail_start, 0))
+        if limit.tail_lines <= 0:
+            tail = b""
+        else:
+            # 保留最后 tail_lines 行 (不计结尾的换行符)
+            start = len(tail)
+            if tail.endswith(newline) and (start - len(newline)) % unit == 0:
+                start -= len(newline)
+            for _ in range(limit.tail_lines):
+                start = _rfind_newline(tail, newline, start, unit)
+                if start < 0:
+                    break
+            if start >= 0:
+                tail = tail[start + len(newline) :]
+        tail_start = size - len(tail)
+
+        elided_lines = _count_newlines(f, head_end, tail_start, encoding)
+
+    # 截断位置可能落在多字节字符中间，丢弃不完整的字符
+    try:
+        head_text = codecs.getincrementaldecoder(encoding)().decode(head[bom:])
+        skip = 0
+        if unit == 1:
+            while skip < min(len(tail), 3) and tail[skip] & 0xC0 == 0x80:
+                skip += 1
+        elif unit == 2 and len(tail) >= 2:
+            code = int.from_bytes(
+                tail[:2], "little" if encoding[-2:] == "le" else "big"
+            )
+            if 0xDC00 <= code <= 0xDFFF:  # 代理对的后半部分
+                skip = 2
+        tail_text = tail[skip:].decode(encoding)
+    except UnicodeDecodeError:
+        return None
+    if not bom and "\x00" in tail_text:
+        return None
+    return TruncatedContent(
+        _normalize_newlines(head_text),
+        _normalize_newlines(tail_text),
+        elided_lines,
+        tail_start - head_end,
+    )
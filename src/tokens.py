@@ -0,0 +1,226 @@
+import fnmatch
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.fis_cache import FileBlock
+from src.log import logger
+from src.setting import DEFAULT_TIKTOKEN_ENCODING
+
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+# 文件块按 token 预算筛选时的优先级规则
+PRIORITY_SMALLEST = "smallest"
+PRIORITY_RECENT = "recent"
+TOKEN_PRIORITIES = (PRIORITY_SMALLEST, PRIORITY_RECENT)
+
+
+class Tokenizer:
+    """分词器基类，子类实现 count 以统计文本的 token 数"""
+
+    name = "base"
+
+    def count(self, text: str) -> int:
+        raise NotImplementedError
+
+
+class EstimateTokenizer(Tokenizer):
+    """快速估算：ASCII 文本约 4 个字符 1 个 token，非 ASCII 字符 (如中文) 约 1 个字符 1 个 token"""
+
+    name = "estimate"
+
+    def count(self, text: str) -> int:
+        if text.isascii():
+            return (len(text) + 3) // 4
+        non_ascii = _NON_ASCII_RE.subn("", text)[1]
+        return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+class TiktokenTokenizer(Tokenizer):
+    """基于 tiktoken 的精确计数 (需要安装 tiktoken，首次使用时可能需要下载编码表)"""
+
+    def __init__(self, encoding_name: str = DEFAULT_TIKTOKEN_ENCODING):
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding_name)
+        self.name = f"tiktoken {encoding_name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+TOKENIZERS: Dict[str, Callable[[], Tokenizer]] = {
+    "estimate": EstimateTokenizer,
+    "tiktoken": TiktokenTokenizer,
+}
+
+
+def register_tokenizer(name: str, factory: Callable[[], Tokenizer]):
+    """注册自定义分词器，之后可通过名称使用"""
+    TOKENIZERS[name] = factory
+
+
+def get_tokenizer(name: str = "auto") -> Tokenizer:
+    """按名称创建分词器；auto 优先使用 tiktoken，不可用时退回快速估算"""
+
+    if name != "auto":
+        return TOKENIZERS[name]()
+    try:
+        return TiktokenTokenizer()
+    except Exception:  # 未安装 tiktoken 或编码表下载失败
+        return EstimateTokenizer()
+
+
+def estimate_tokens_for_size(size: int) -> int:
+    """仅根据文件字节数估算 token 数 (用于不读取文件内容的预估)"""
+    return (size + 3) // 4
+
+
+class TokenReport:
+    """生成过程中的 token 统计，按文件、目录与总量汇总"""
+
+    def __init__(self, tokenizer: Tokenizer):
+        self.tokenizer = tokenizer
+        self.overhead = 0  # 说明提示词与代码块标记
+        self.files: Dict[str, int] = {}
+        self.dropped: List[Tuple[str, int]] = []
+        self.max_tokens: Optional[int] = None
+        self.estimated_from_size = False
+        self.dedup_files = 0  # 改为 [SAME_AS] 引用的重复文件数及减少的字节与 token 数
+        self.dedup_bytes = 0
+        self.dedup_tokens = 0
+
+    def count(self, text: str) -> int:
+        return self.tokenizer.count(text) if text else 0
+
+    def add(self, relative_path: str, tokens: int):
+        self.files[relative_path] = tokens
+
+    def add_dedup(self, saved_bytes: int, saved_tokens: int):
+        self.dedup_files += 1
+        self.dedup_bytes += saved_bytes
+        self.dedup_tokens += saved_tokens
+
+    @property
+    def total(self) -> int:
+        return self.overhead + sum(self.files.values())
+
+    def by_directory(self) -> Dict[str, int]:
+        """统计每个目录 (包含子目录) 的 token 总数，根目录下的文件计入 `./`"""
+
+        directories: Dict[str, int] = {}
+        for relative_path, tokens in self.files.items():
+            parts = relative_path.split("/")[:-1]
+            if not parts:
+                directories["./"] = directories.get("./", 0) + tokens
+            for depth in range(1, len(parts) + 1):
+                directory = "/".join(parts[:depth]) + "/"
+                directories[directory] = directories.get(directory, 0) + tokens
+        return directories
+
+    def log_report(self, detailed: bool = False, top: int = 10):
+        """通过日志输出 token 统计；detailed 为 False 时仅列出 token 数最多的顶层目录"""
+
+        method = "按文件大小预估" if self.estimated_from_size else self.tokenizer.name
+        logger.info(
+            f"Token 统计 ({method}): 共 {self.total} tokens "
+            f"(说明提示词 {self.overhead}, {len(self.files)} 个文件 "
+            f"{self.total - self.overhead})"
+        )
+
+        directories = self.by_directory()
+        if not detailed:
+            directories = {
+                directory: tokens
+                for directory, tokens in directories.items()
+                if directory.count("/") == 1
+            }
+        ranked = sorted(directories.items(), key=lambda item: (-item[1], item[0]))
+        if ranked:
+            logger.info("目录 tokens:")
+            for directory, tokens in ranked if detailed else ranked[:top]:
+                logger.info(f"  {tokens:>10}  {directory}")
+        if detailed:
+            logger.info("文件 tokens:")
+            for relative_path, tokens in self.files.items():
+                logger.info(f"  {tokens:>10}  {relative_path}")
+
+        if self.dedup_files:
+            logger.info(
+                f"内容去重: {self.dedup_files} 个重复文件改为 [SAME_AS] 引用, "
+                f"减少 {self.dedup_bytes} 字节, {self.dedup_tokens} tokens"
+            )
+        if self.max_tokens is not None:
+            logger.info(f"Token 预算: {self.max_tokens}, 已使用: {self.total}")
+        if self.dropped:
+            dropped_tokens = sum(tokens for _, tokens in self.dropped)
+            logger.info(
+                f"超出预算未包含 {len(self.dropped)} 个文件 (共 {dropped_tokens} tokens):"
+            )
+            for relative_path, tokens in self.dropped:
+                logger.info(f"  {tokens:>10}  {relative_path}")
+
+
+def _match_priority_path(relative_path: str, pattern: str) -> bool:
+    pattern = pattern.strip("/")
+    return (
+        relative_path == pattern
+        or relative_path.startswith(f"{pattern}/")
+        or fnmatch.fnmatchcase(relative_path, pattern)
+    )
+
+
+class TokenBudget:
+    """按优先级规则筛选文件块，使描述总 token 数不超过预算
+
+    priority_paths 中的路径 (目录前缀或通配符，按给出顺序) 最先纳入，
+    其余文件按 priority 规则排序：smallest 优先小文件，recent 优先最近修改的文件。
+    依次纳入放得下的文件，筛选结果仍保持原有的路径顺序。
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        priority: str = PRIORITY_SMALLEST,
+        priority_paths: Sequence[str] = (),
+    ):
+        if priority not in TOKEN_PRIORITIES:
+            raise ValueError(f"未知的优先级规则: {priority}")
+        self.max_tokens = max_tokens
+        self.priority = priority
+        self.priority_paths = list(priority_paths)
+
+    def _rank(self, block: FileBlock, tokens: int):
+        explicit = next(
+            (
+                index
+                for index, pattern in enumerate(self.priority_paths)
+                if _match_priority_path(block.relative_path, pattern)
+            ),
+            len(self.priority_paths),
+        )
+        if self.priority == PRIORITY_RECENT:
+            return (explicit, -block.mtime_ns, block.relative_path)
+        return (explicit, tokens, block.relative_path)
+
+    def select(
+        self, counted: Iterable[Tuple[FileBlock, int]], reserved: int = 0
+    ) -> Tuple[List[Tuple[FileBlock, int]], List[Tuple[str, int]]]:
+        """返回 (纳入的文件块, 未纳入的文件路径与 token 数)，reserved 为说明提示词等固定开销"""
+
+        counted = list(counted)
+        order = sorted(range(len(counted)), key=lambda i: self._rank(*counted[i]))
+        remaining = self.max_tokens - reserved
+        kept = set()
+        for index in order:
+            tokens = counted[index][1]
+            if tokens <= remaining:
+                kept.add(index)
+                remaining -= tokens
+
+        selected = [item for index, item in enumerate(counted) if index in kept]
+        dropped = [
+            (block.relative_path, tokens)
+            for index, (block, tokens) in enumerate(counted)
+            if index not in kept
+        ]
+        return selected, dropped
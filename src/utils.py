@@ -1,10 +1,10 @@
+import codecs
 import locale
 import os
 import sys
-import threading
-import time
+from typing import Optional
 
-import keyboard
+from src.setting import BINARY_FILE_EXTENSIONS
 
 
 def shell_init():
@@ -13,6 +13,9 @@ def shell_init():
     if preferred_encoding.lower() != "utf-8":
         sys.stdout = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
         sys.stderr = open(sys.stderr.fileno(), mode="w", encoding="utf-8", buffering=1)
+    # 输出被重定向时 (脚本调用) 跳过终端设置与清屏，避免启动子进程及控制字符混入输出内容
+    if not sys.stdout.isatty():
+        return
     # 设置终端编码为 UTF-8
     if os.name == "nt":
         os.system("chcp 65001")
@@ -20,52 +23,94 @@ def shell_init():
     os.system("cls" if os.name == "nt" else "clear")
 
 
+# 按 BOM 识别的文本编码 (UTF-32 的 BOM 以 UTF-16 的 BOM 开头，需优先判断)
+_TEXT_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# 检测 NUL 字节时扫描的文件头长度
+_BINARY_SNIFF_SIZE = 8192
+
+
+def is_known_binary_file(file_path: str) -> bool:
+    """根据扩展名判断是否为已知的二进制文件 (无需打开文件)"""
+    return os.path.splitext(file_path)[1].lower() in BINARY_FILE_EXTENSIONS
+
+
+def decode_text_content(data: bytes) -> Optional[str]:
+    """将已读取的文件内容解码为文本，非文本内容返回 None
+
+    依次进行 BOM 识别、NUL 字节检测与 UTF-8 解码，换行符统一为 `\\n`。
+    """
+
+    for bom, encoding in _TEXT_BOMS:
+        if data.startswith(bom):
+            try:
+                text = data.decode(encoding)
+            except UnicodeDecodeError:
+                return None
+            break
+    else:
+        if b"\x00" in data[:_BINARY_SNIFF_SIZE]:
+            return None
+        try:
+            text = data.decode("utf-8")  # 保留 UTF-8 BOM，写回时内容不变
+        except UnicodeDecodeError:
+            return None
+
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_text_file(file_path: str) -> Optional[str]:
+    """一次完成文件分类与读取：文本文件返回其内容，二进制文件返回 None
+
+    已知二进制扩展名的文件不会被打开；其余文件以二进制模式读取一次后直接解码。
+    """
+
+    if is_known_binary_file(file_path):
+        return None
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return decode_text_content(data)
+
+
 def is_text_file(file_path: str):
     """判断文件是否是文本文件。"""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            f.read(1024)
-        return True
-    except UnicodeDecodeError:
-        return False
+    return read_text_file(file_path) is not None
 
 
-def format_path(path):
-    return path.replace("\\\\", "\\").replace("\\", "/")
+def get_cache_dir(*parts: str) -> str:
+    """返回 fis-tool 的用户级缓存目录 (不存在时自动创建)
 
+    可通过环境变量 FIS_TOOL_CACHE_DIR 指定，否则 Windows 使用 %LOCALAPPDATA%，
+    其他系统使用 $XDG_CACHE_HOME 或 ~/.cache。
+    """
 
-def read_multiline_input(prompt: str):
-    """读取多行输入; Ctrl+Enter 结束输入, Enter / Shift+Enter 键换行"""
-
-    end_input = False
-
-    def check_ctrl_enter():
-        nonlocal end_input
-        while True:
-            if (
-                keyboard.is_pressed("ctrl")
-                and keyboard.is_pressed("enter")
-                and not keyboard.is_pressed("shift")
-            ):
-                end_input = True
-                time.sleep(0.05)
-                keyboard.release("ctrl")
-                keyboard.release("enter")
-                time.sleep(0.05)
-                keyboard.press_and_release("enter")
-                break
-
-    lines = []
-    print(prompt, end="")
-
-    # 启动一个线程来检测 Ctrl+Enter
-    thread = threading.Thread(target=check_ctrl_enter, daemon=True)
-    thread.start()
-
-    while True:
-        lines.append(input())
-        if end_input:
-            break
+    base = os.environ.get("FIS_TOOL_CACHE_DIR")
+    if not base:
+        if os.name == "nt":
+            root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+            base = os.path.join(root, "fis-tool", "cache")
+        else:
+            root = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+            base = os.path.join(root, "fis-tool")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
 
-    thread.join()  # 等待线程结束
-    return "\n".join(lines).strip()
+
+def remove_if_exists(file_path: str):
+    """删除文件，文件不存在时忽略"""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def format_path(path):
+    return path.replace("\\\\", "\\").replace("\\", "/")
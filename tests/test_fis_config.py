@@ -0,0 +1,69 @@
+import os
+
+from src.fis_config import FisConfig
+from src.fis_scan import walk_project_files
+from src.setting import DEFAULT_FIS_CONFIG_FILE
+
+
+def _touch(root, relative_path):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("x\n")
+
+
+def test_rules_do_not_match_name_suffixes(tmp_path):
+    """`/?build/`、`/?temp/` 只匹配完整的目录名，不匹配仅后缀相同的 `rebuild/`、`contemp/`"""
+
+    config = FisConfig.create_fis_config_template(
+        str(tmp_path / DEFAULT_FIS_CONFIG_FILE)
+    )
+    for relative_path in [
+        "rebuild/a.py",
+        "templates/contemp/b.py",
+        "builder/c.py",
+        "build/d.py",
+        "src/build/e.py",
+        "temp/f.py",
+        "pkg/g.pyc",
+        "poetry.lock",
+        "pnpm-lock.yaml",
+        "locked/h.py",
+    ]:
+        _touch(tmp_path, relative_path)
+
+    files = walk_project_files(str(tmp_path), config, False, False)
+    assert files == [
+        "builder/c.py",
+        "locked/h.py",
+        "rebuild/a.py",
+        "templates/contemp/b.py",
+    ]
+
+
+def test_file_rules_do_not_prune_directories(tmp_path):
+    config_file = tmp_path / DEFAULT_FIS_CONFIG_FILE
+    config_file.write_text("ignore_regex:\n- '[^/]*\\.lock$'\n- 'dist/'\n")
+    config = FisConfig(str(config_file))
+
+    assert not config.is_ignored_dir("deps.lock")
+    assert config.is_ignored_file("deps.lock")
+    assert config.is_ignored_dir("pkg/dist")
+    assert not config.is_ignored_dir("pkg/redist")
+    assert not config.is_ignored_file("dist")
+
+
+def test_repository_config():
+    """仓库自带的 .fis_config.yaml 与模板一样按完整的路径片段匹配"""
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = FisConfig(os.path.join(root, DEFAULT_FIS_CONFIG_FILE))
+
+    for relative_path in ["poetry.lock", "src/__init__.pyc", "a/b.pyo"]:
+        assert config.is_ignored_file(relative_path), relative_path
+    for relative_path in [".git", "src/__pycache__", "build", "pkg/dist"]:
+        assert config.is_ignored_dir(relative_path), relative_path
+
+    assert not config.is_ignored_file("src/lock.py")
+    assert not config.is_ignored_dir("rebuild")
+    assert "poetry.lock" not in walk_project_files(root, config, False, False)
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from src.fis_shard import plan_shards
+from src.prj_forge import generate_description
+from src.setting import SHARD_MAX_DEPTH, SHARD_MAX_FILES
+
+
+def _write(root, relative_path, content):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _build_project(root):
+    deep = "/".join(f"d{i}" for i in range(SHARD_MAX_DEPTH + 2))
+    files = {
+        ".gitignore": "*.log\nignored/\n",
+        "a.py": "a = 1\n",
+        "top.log": "ignored\n",
+        "ignored/x.py": "ignored\n",
+        # 分片深度以下的 .gitignore：否定规则重新包含被上级目录忽略的文件
+        f"{deep}/.gitignore": "!keep.log\n*.tmp\n",
+        f"{deep}/keep.log": "kept\n",
+        f"{deep}/drop.log": "dropped\n",
+        f"{deep}/x.tmp": "dropped\n",
+        f"{deep}/sub/keep.log": "kept\n",
+        f"{deep}/sub/.gitignore": "!*.tmp\n",
+        f"{deep}/sub/y.tmp": "kept\n",
+        "d0/other.log": "dropped\n",
+        "d0/d1/mid.py": "mid = 1\n",
+        "bin/data.bin": "\x00\x01",
+    }
+    # 单个目录中的文件数超过分片上限
+    for i in range(SHARD_MAX_FILES + 44):
+        files[f"flat/f{i:04}.txt"] = f"{i}\n"
+    for i in range(30):
+        files[f"pkg{i}/mod/m.py"] = f"pkg = {i}\n"
+    for relative_path, content in files.items():
+        _write(root, relative_path, content)
+
+
+@pytest.mark.parametrize("use_explanation", ["", "zh"])
+def test_sharded_output_is_identical(tmp_path, use_explanation):
+    project = tmp_path / "project"
+    _build_project(str(project))
+
+    outputs = []
+    for processes in (1, 2, 5):  # 5 个进程时分片深入到更深的目录
+        fis_file = tmp_path / f"p{processes}.fis"
+        generate_description(
+            str(project),
+            str(fis_file),
+            use_explanation,
+            True,
+            False,
+            False,
+            processes=processes,
+        )
+        outputs.append(fis_file.read_bytes())
+    assert outputs[0] == outputs[1] == outputs[2]
+
+    text = outputs[0].decode("utf-8")
+    deep = "/".join(f"d{i}" for i in range(SHARD_MAX_DEPTH + 2))
+    assert f"$$$ {deep}/keep.log\n" in text
+    assert f"$$$ {deep}/sub/y.tmp\n" in text
+    for relative_path in [
+        f"{deep}/drop.log",
+        f"{deep}/x.tmp",
+        "d0/other.log",
+        "top.log",
+        "ignored/x.py",
+    ]:
+        assert f"$$$ {relative_path}\n" not in text
+
+
+def test_shards_split_below_the_top_level(tmp_path):
+    project = tmp_path / "project"
+    _build_project(str(project))
+    shards = plan_shards(str(project), None, False, True, (), 2)
+    assert len(shards) > 2
+    assert all(len(shard) <= SHARD_MAX_FILES for shard in shards)
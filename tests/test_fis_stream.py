@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from src.fis_document import FisChange
+from src.fis_stream import FisStreamParser
+from src.prj_forge import iter_fis_changes
+
+REPLIES = [
+    # 没有 fis 代码块时整个回复即为 FIS 内容
+    "$$$ a.py\nprint('a')\n$$$ b/c.py [DELETE]\n$$$ d.txt\nlast line",
+    "$$$ a.py\nprint('a')\n\n\n",
+    # fis 代码块前后的说明文字会被忽略，最后一个文件块去除结尾空白
+    "好的，修改如下：\n```fis\n$$$ a.py\nx = 1\n\n$$$ b.py [DELETE]\n$$$ c.py\ny = 2\n\n```\n完成。",
+    # 文件内容中的内嵌代码块不会被误判为 fis 代码块结束
+    "```fis\n$$$ README.md\n# 标题\n```python\nprint(1)\n```\n结尾\n```",
+    # 注释 (可跨行) 会被去除，未闭合的注释原样保留
+    "```fis\n{/* 说明\n多行注释 */}$$$ a.py\nx = 1 {/* 行内 */}\n$$$ b.py\n{/* 未闭合\n```",
+    "$$$ a.py {/* 注释 */}\nbody\n{/* 说明 */}\n$$$ b.py [REPLACE]\nnew\n",
+    # 文件路径行没有换行符时内容为 None
+    "```fis\n$$$ a.py\nx\n```",
+    "$$$ a.py [DELETE]",
+    "前言中的 $ 符号\n没有文件块",
+    "",
+]
+
+
+def _random_chunks(text, rng):
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.choice([1, 1, 2, 3, 5, 8, 13, 64])
+        chunks.append(text[i : i + size])
+        i += size
+    return chunks
+
+
+def _stream(chunks):
+    parser = FisStreamParser()
+    changes = []
+    for chunk in chunks:
+        changes += parser.feed(chunk)
+    return changes + parser.close()
+
+
+@pytest.mark.parametrize("reply", REPLIES)
+def test_stream_matches_batch_parser_for_any_chunking(reply):
+    expected = list(iter_fis_changes(reply))
+    assert _stream([reply]) == expected
+    assert _stream(list(reply)) == expected
+    rng = random.Random(reply)
+    for _ in range(200):
+        assert _stream(_random_chunks(reply, rng)) == expected
+
+
+def test_stream_parses_each_fis_block_separately():
+    """回复包含多个 fis 代码块时逐个解析，忽略代码块之间的文字
+
+    批量解析截取第一个 ```fis 到最后一个 ``` 之间的内容，代码块之间的文字会并入前一个文件。
+    """
+
+    reply = "```fis\n$$$ a.py\nA\n```\n说明\n```fis\n$$$ b.py\nB\n```\n"
+    parser = FisStreamParser()
+    changes = parser.feed(reply)
+    assert parser.fence_closed
+    assert changes + parser.close() == [
+        FisChange("a.py", None, "A"),
+        FisChange("b.py", None, "B"),
+    ]
+    assert list(iter_fis_changes(reply)) == [
+        FisChange("a.py", None, "A\n```\n说明\n```fis\n"),
+        FisChange("b.py", None, "B"),
+    ]
+
+
+def test_stream_treats_a_bare_fence_as_the_end_of_the_block():
+    """不带语言标记的 ``` 结束 fis 代码块 (批量解析会将其视为内嵌代码块)"""
+
+    reply = "```fis\n$$$ a.md\n```\ncode\n```\n"
+    assert _stream(list(reply)) == [FisChange("a.md", None, None)]
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from src.fis_txn import FisTransaction, get_txn_dir, rollback_last_transaction
+from src.prj_forge import apply_changes_from_fis_content
+from src.setting import FIS_TXN_DIR
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("FIS_TOOL_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _crash_during_commit(project, env):
+    """在子进程中提交变更，移走 b.txt 的原文件后立即退出进程 (模拟提交中途崩溃)"""
+
+    script = textwrap.dedent(f"""
+        import os
+        import src.fis_txn as fis_txn
+
+        original = fis_txn._move
+        def move_then_exit(src, dst):
+            original(src, dst)
+            if "b.txt" in src:
+                os._exit(1)
+        fis_txn._move = move_then_exit
+
+        txn = fis_txn.FisTransaction({str(project)!r})
+        txn.stage_write("a.txt", "new a")
+        txn.stage_write("b.txt", "new b")
+        txn.stage_write("c/new.txt", "new file")
+        txn.commit()
+        """)
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env)
+    assert result.returncode == 1
+
+
+def test_interrupted_commit_is_rolled_back(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.txt").write_text("old a")
+    (project / "b.txt").write_text("old b")
+
+    _crash_during_commit(project, dict(os.environ))
+    assert _read(project / "a.txt") == "new a"
+    assert not (project / "b.txt").exists()
+
+    FisTransaction(str(project))  # 开始新事务前回滚中断的事务
+    assert _read(project / "a.txt") == "old a"
+    assert _read(project / "b.txt") == "old b"
+    assert sorted(os.listdir(project)) == ["a.txt", "b.txt"]
+
+
+def test_stray_temp_files_are_removed(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    txn = FisTransaction(str(project))
+    txn.stage_write("a.txt", "staged but never committed")
+    assert len(os.listdir(project)) == 1
+
+    FisTransaction(str(project))  # 模拟进程退出后的下一次事务
+    assert os.listdir(project) == []
+
+
+def test_transaction_data_stays_out_of_project(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.txt").write_text("old")
+
+    with FisTransaction(str(project)) as txn:
+        txn.stage_write("a.txt", "new")
+    assert os.listdir(project) == ["a.txt"]
+    assert not (project / FIS_TXN_DIR).exists()
+    assert os.listdir(get_txn_dir(str(project)))
+
+    assert rollback_last_transaction(str(project))
+    assert _read(project / "a.txt") == "old"
+    assert not rollback_last_transaction(str(project))
+
+
+def test_delete_then_recreate_same_path(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.txt").write_text("old\n")
+
+    apply_changes_from_fis_content(str(project), "$$$ a.txt [DELETE]\n$$$ a.txt\nnew\n")
+    assert _read(project / "a.txt") == "new\n"
+
+    assert rollback_last_transaction(str(project))
+    assert _read(project / "a.txt") == "old\n"
+
+
+def test_create_then_delete_same_path(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+
+    apply_changes_from_fis_content(str(project), "$$$ a.txt\nnew\n$$$ a.txt [DELETE]\n")
+    assert os.listdir(project) == []
+
+    assert rollback_last_transaction(str(project))
+    assert os.listdir(project) == []
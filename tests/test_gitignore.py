@@ -0,0 +1,140 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from src.fis_scan import walk_project_files
+from src.gitignore import parse_gitignore_line
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+
+
+def _write(root, relative_path, content="x\n"):
+    path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _git_files(root):
+    """git 认为未被忽略的文件 (均未跟踪)"""
+    result = subprocess.run(
+        ["git", "ls-files", "-o", "--exclude-standard"],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return sorted(result.stdout.splitlines())
+
+
+def _make_repo(root, files, ignores, exclude=""):
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    for relative_path in files:
+        _write(root, relative_path)
+    for relative_path, content in ignores.items():
+        _write(root, relative_path, content)
+    if exclude:
+        _write(root, ".git/info/exclude", exclude)
+
+
+FILES = [
+    "a.log",
+    "keep.log",
+    "src/a.log",
+    "src/keep.log",
+    "build/out.txt",
+    "src/build/out.txt",
+    "src/build.txt",
+    "docs/build",
+    "root.txt",
+    "src/root.txt",
+    "deep/a/b/c/x.tmp",
+    "deep/x.tmp",
+    "logs/2024/a.txt",
+    "logs/keep/a.txt",
+    "vendor/lib/a.py",
+    "vendor/lib/keep.py",
+    "vendor/other/a.py",
+    "pkg/generated/a.py",
+    "pkg/generated/b.py",
+    "pkg/sub/generated/a.py",
+    "local.txt",
+    "src/local.txt",
+    "space .txt",
+    "#hash.txt",
+    "!bang.txt",
+    "x[1].txt",
+    "x1.txt",
+]
+
+IGNORES = {
+    ".gitignore": (
+        "# 注释\n"
+        "*.log\n"
+        "!keep.log\n"  # 否定规则
+        "build/\n"  # 只匹配目录
+        "/root.txt\n"  # 开头的 / 锚定到 .gitignore 所在目录
+        "deep/**/*.tmp\n"  # `**/` 匹配零或多级目录
+        "logs/**\n"
+        "!logs/keep/\n"  # 目录下的内容被忽略后不能通过否定规则重新包含
+        "vendor/*\n"
+        "!vendor/lib/\n"
+        "space\\ .txt\n"
+        "\\#hash.txt\n"
+        "\\!bang.txt\n"
+        "x[0-9].txt\n"
+    ),
+    "vendor/lib/.gitignore": "*.py\n!keep.py\n",
+    # 子目录中的规则优先于上级目录的规则
+    "pkg/.gitignore": "generated/\n",
+    "pkg/sub/.gitignore": "!generated/\n",
+    "src/.gitignore": "!*.log\n",
+}
+
+
+def test_matches_git_ls_files(tmp_path):
+    _make_repo(tmp_path, FILES, IGNORES, exclude="local.txt\n")
+    files = walk_project_files(str(tmp_path), None, False, True)
+    assert files == _git_files(tmp_path)
+    # 固定的预期结果，避免 git 版本差异掩盖问题
+    assert files == sorted(
+        [
+            ".gitignore",
+            "keep.log",
+            "src/.gitignore",
+            "src/a.log",
+            "src/keep.log",
+            "src/build.txt",
+            "docs/build",
+            "src/root.txt",
+            "vendor/lib/.gitignore",
+            "vendor/lib/keep.py",
+            "pkg/.gitignore",
+            "pkg/sub/.gitignore",
+            "pkg/sub/generated/a.py",
+            "x[1].txt",
+        ]
+    )
+
+
+def test_project_in_repo_subdirectory(tmp_path):
+    """项目位于仓库子目录时，上级目录的 .gitignore 与 .git/info/exclude 同样生效"""
+
+    _make_repo(tmp_path, FILES, IGNORES, exclude="local.txt\n")
+    project = tmp_path / "src"
+    files = walk_project_files(str(project), None, False, True)
+    assert files == sorted(
+        os.path.relpath(os.path.join(tmp_path, path), project)
+        for path in _git_files(tmp_path)
+        if path.startswith("src/")
+    )
+
+
+def test_blank_lines_and_comments_are_skipped():
+    assert parse_gitignore_line("\n") is None
+    assert parse_gitignore_line("# comment\n") is None
+    assert parse_gitignore_line("/\n") is None
+    rule = parse_gitignore_line("!dir/ \n")
+    assert rule.negate and rule.dir_only
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fis_tool(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "src.fis_tool", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_profile_does_not_swallow_project_path(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("a = 1\n")
+    fis_file = tmp_path / "project.fis"
+
+    result = _fis_tool("generate", "--profile", str(project), "-o", str(fis_file))
+    assert result.returncode == 0, result.stderr
+    assert "性能分析" in result.stderr
+    assert fis_file.read_text(encoding="utf-8") == "$$$ a.py\na = 1\n"
+
+    result = _fis_tool("generate", "-q", "--profile", str(project), "-o", "-")
+    assert result.returncode == 0, result.stderr
+    assert "性能分析" not in result.stderr + result.stdout
@@ -0,0 +1,62 @@
+import os
+
+from src.chat_models.session import ChatSession
+from src.prj_forge import generate_description
+from src.setting import SESSION_MAX_REQUEST_RATIO
+
+
+def _generate(project, fis_file):
+    generate_description(str(project), str(fis_file), "", False, False, False, 1, True)
+
+
+def _request_bytes(messages):
+    return sum(len(m["content"].encode("utf-8")) for m in messages)
+
+
+def test_turn_stats_report_the_whole_request(tmp_path, capsys):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("a = 1\n" * 200)
+    (project / "b.py").write_text("b = 1\n")
+    fis_file = tmp_path / "project.fis"
+    _generate(project, fis_file)
+
+    session = ChatSession()
+    turn = session.prepare(str(fis_file), "q1")
+    assert len(session.request_messages(turn)) == 1
+    session.commit(turn, "reply")
+
+    (project / "b.py").write_text("b = 2\n")
+    _generate(project, fis_file)  # 提问前刷新清单
+    turn = session.prepare(str(fis_file), "q2")
+    assert not turn.full and turn.changed_files == 1
+
+    messages = session.request_messages(turn)
+    capsys.readouterr()
+    session.print_turn_stats(turn)
+    out = capsys.readouterr().out
+    assert f"{len(messages)} 条消息, {_request_bytes(messages)} 字节" in out
+
+
+def test_history_is_dropped_once_the_request_reaches_the_cap(tmp_path, capsys):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text("a = 1\n" * 200)
+    fis_file = tmp_path / "project.fis"
+
+    session = ChatSession()
+    full_turns = 0
+    for i in range(10):
+        (project / "b.py").write_text(f"b = {i}\n")
+        _generate(project, fis_file)
+        turn = session.prepare(str(fis_file), f"q{i}")
+        if turn.full and session.messages:
+            capsys.readouterr()
+            session.print_turn_stats(turn)
+            assert "清空对话历史" in capsys.readouterr().out
+        full_turns += turn.full
+        # 每轮请求不超过上限，不会随对话轮数持续增长
+        history = 0 if turn.full else sum(session._message_tokens)
+        assert history + turn.sent_tokens < turn.full_tokens * SESSION_MAX_REQUEST_RATIO
+        session.commit(turn, "reply " * 50)
+    assert 1 < full_turns < 10
@@ -0,0 +1,64 @@
+import codecs
+
+import pytest
+
+from src.fis_scan import read_file_block
+from src.setting import SIZE_MODE_OMIT, SIZE_MODE_TRUNCATE
+from src.size_policy import SizeLimit, SizePolicy, elided_marker
+
+LINES = [f"第 {i} 行 𝄞" for i in range(1, 201)]
+TEXT = "\n".join(LINES) + "\n"
+
+
+def _read(tmp_path, data, mode, max_bytes=1024):
+    (tmp_path / "a.txt").write_bytes(data)
+    policy = SizePolicy([SizeLimit(None, max_bytes, mode, 3, 2)])
+    return read_file_block(str(tmp_path), "a.txt", policy=policy).text
+
+
+@pytest.mark.parametrize(
+    "encoding, bom",
+    [
+        ("utf-8", b""),
+        ("utf-8", codecs.BOM_UTF8),
+        ("utf-16-le", codecs.BOM_UTF16_LE),
+        ("utf-16-be", codecs.BOM_UTF16_BE),
+        ("utf-32-le", codecs.BOM_UTF32_LE),
+    ],
+)
+def test_bom_text_is_classified_regardless_of_size(tmp_path, encoding, bom):
+    """带 BOM 的文本文件超出大小上限时按文本截断或省略，而不是视为 [BINARY]"""
+
+    data = bom + TEXT.encode(encoding)
+
+    head = "".join(line + "\n" for line in LINES[:3])
+    if bom == codecs.BOM_UTF8:
+        head = "\ufeff" + head  # 与 decode_text_content 一致，保留 UTF-8 BOM
+    assert _read(tmp_path, data, SIZE_MODE_TRUNCATE, max_bytes=10**6) == (
+        f"$$$ a.txt\n{head}{''.join(line + chr(10) for line in LINES[3:])}"
+    )
+
+    tail = f"{LINES[-2]}\n{LINES[-1]}\n"
+    elided_bytes = len(data) - len(head.encode(encoding)) - len(tail.encode(encoding))
+    if encoding != "utf-8":
+        elided_bytes -= len(bom)
+    assert _read(tmp_path, data, SIZE_MODE_TRUNCATE) == (
+        f"$$$ a.txt [TRUNCATED]\n{head}{elided_marker(195, elided_bytes)}\n{tail}"
+    )
+
+    assert _read(tmp_path, data, SIZE_MODE_OMIT) == (
+        f"$$$ a.txt [OMITTED]\nsize={len(data)} lines=200\n"
+    )
+
+
+def test_small_truncation_budget_keeps_whole_characters(tmp_path):
+    data = TEXT.encode("utf-16")
+    block = _read(tmp_path, data, SIZE_MODE_TRUNCATE, max_bytes=16)
+    assert "�" not in block and "\x00" not in block
+    assert block.startswith("$$$ a.txt [TRUNCATED]\n第 1 \n")
+    assert block.endswith("\n 𝄞\n")  # 代理对不会被拆开
+
+
+def test_nul_bytes_without_bom_are_binary(tmp_path):
+    data = b"\x00\x01" * 2048
+    assert _read(tmp_path, data, SIZE_MODE_TRUNCATE) == "$$$ a.txt [BINARY]\n"
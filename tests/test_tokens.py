@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import src.prj_forge as prj_forge
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _fis_tool(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "src.fis_tool", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+
+def _project(tmp_path):
+    project = tmp_path / "project"
+    (project / "pkg").mkdir(parents=True)
+    (project / "pkg" / "a.py").write_text("a = 1\n")
+    return project
+
+
+def test_tokens_are_only_counted_on_request(tmp_path, monkeypatch):
+    def no_tokenizer(*args, **kwargs):
+        raise AssertionError("未请求 token 统计时不应加载分词器")
+
+    monkeypatch.setattr(prj_forge, "get_tokenizer", no_tokenizer)
+    project = _project(tmp_path)
+    fis_file = tmp_path / "project.fis"
+    prj_forge.generate_description(str(project), str(fis_file), "", False, False, False)
+    assert fis_file.read_text(encoding="utf-8") == "$$$ pkg/a.py\na = 1\n"
+
+
+def test_token_report_follows_log_level(tmp_path):
+    project = _project(tmp_path)
+
+    result = _fis_tool("generate", str(project), "-o", "-")
+    assert result.returncode == 0, result.stderr
+    assert "tokens" not in result.stderr
+
+    args = ("generate", str(project), "-o", "-", "--token-report")
+    result = _fis_tool(*args)
+    assert result.returncode == 0, result.stderr
+    assert "目录 tokens:" in result.stderr
+    assert result.stdout == "$$$ pkg/a.py\na = 1\n"
+
+    result = _fis_tool(*args, "-q")
+    assert result.returncode == 0, result.stderr
+    assert "tokens" not in result.stderr + result.stdout